@@ -5,12 +5,39 @@ from dotenv import load_dotenv
 from src.utils.save_graph import save_graph
 from src.utils.save_conversations import save_conversation
 from src.workflows.workflow import run_agent_workflow
+from src.workflows.sessions import get_session_manager
 # from workflows.single_agent import run_agent_workflow
 
 load_dotenv()
 # save_graph()
 
+SESSION_COMMANDS = "/new, /resume <thread id>, /fork, /sessions"
+
+
+def handle_session_command(command: str, thread_id: str) -> str:
+    """Run a session command and return the thread id to continue with."""
+    sessions = get_session_manager()
+    name, _, argument = command.partition(" ")
+    try:
+        if name == "/new":
+            thread_id = sessions.create().thread_id
+        elif name == "/resume" and argument:
+            thread_id = sessions.resume(argument.strip()).thread_id
+        elif name == "/fork":
+            thread_id = sessions.fork(thread_id).thread_id
+        elif name == "/sessions":
+            for session in sessions.sessions():
+                print(f"{session.thread_id}{' (current)' if session.thread_id == thread_id else ''}")
+        else:
+            print(f"Unknown command, use one of: {SESSION_COMMANDS}")
+    except KeyError as e:
+        print(e.args[0])
+    print(f"Thread: {thread_id}")
+    return thread_id
+
+
 if __name__ == "__main__":
+    thread_id = "default"
     while True:
         try:
             user_query = input("Enter your query (type 'exit' to quit): ")
@@ -18,12 +45,17 @@ if __name__ == "__main__":
             if user_query.lower() == 'exit':
                 print("Exiting voice assistant. Goodbye!")
                 break
+
+            if user_query.startswith("/"):
+                thread_id = handle_session_command(user_query.strip(), thread_id)
+                continue
     
             result = run_agent_workflow(
                 user_input=user_query, 
                 deep_thinking_mode=True,
                 search_before_planning=False,
-                debug=False
+                debug=False,
+                thread_id=thread_id,
             )
             
             print("\n=== Conversation History ===")
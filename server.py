@@ -1,4 +1,6 @@
+import argparse
 import logging
+import os
 import uvicorn
 import sys
 import pyngrok.ngrok as ngrok
@@ -51,11 +53,32 @@ def get_user_choice():
         else:
             print("Invalid choice. Please try again.")
 
+URL_CHOICES = {"public": 1, "network": 2, "local": 3}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Start the back-end API server")
+    parser.add_argument("--port", type=int, default=8833)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("API_WORKERS", "1")),
+        help="API worker processes; more than one serves concurrent chats on all cores and disables reload",
+    )
+    parser.add_argument(
+        "--url",
+        choices=URL_CHOICES,
+        help="URL to show instead of asking: public (ngrok), network or local",
+    )
+    return parser.parse_args()
+
+
 def start_server():
-    port = 8833
+    args = parse_args()
+    port = args.port
     
     # Get user choice
-    choice = get_user_choice()
+    choice = URL_CHOICES[args.url] if args.url else get_user_choice()
     
     public_url = None
     local_ip = get_local_ip()
@@ -81,14 +104,20 @@ def start_server():
 
     # Start uvicorn
     reload = True
-    if sys.platform.startswith("win"):
+    if sys.platform.startswith("win") or args.workers > 1:
         reload = False
+
+    if args.workers > 1:
+        # Read by the workers to check that their state is shared (see src/api/app.py)
+        os.environ["API_WORKERS"] = str(args.workers)
+        logger.info(f"Starting {args.workers} API workers")
     
     uvicorn.run(
         "src.api.app:app",
         host="0.0.0.0",
         port=port,
         reload=reload,
+        workers=args.workers,
         log_level="info",
     )
 
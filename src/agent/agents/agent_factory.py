@@ -0,0 +1,62 @@
+import logging
+import threading
+from functools import partial
+from typing import Any, Dict, Sequence, Tuple
+
+from langgraph.prebuilt import create_react_agent
+
+from src.agent.agents.prompts.template import apply_prompt_template
+from src.config.llm import get_llm
+from src.tools.executor import bind_tool_executor
+
+logger = logging.getLogger(__name__)
+
+# (LLM name, tools, prompt name) -> (llm, tools, compiled agent). The tools are kept
+# in the value so their ids cannot be reused by new objects while cached.
+_agents: Dict[Tuple[str, Tuple[int, ...], str], Tuple[Any, Tuple[Any, ...], Any]] = {}
+_agents_lock = threading.Lock()
+
+
+def get_react_agent(llm_name: str, tools: Sequence[Any], prompt_name: str):
+    """Return a compiled ReAct agent for the given LLM, tools and prompt template.
+
+    The agent graph is built and compiled once and then shared by every invocation
+    and thread; compiled graphs hold no per-run state. The model is looked up with
+    ``get_llm`` on every call, so an agent is rebuilt when its model was recreated
+    (e.g. after ``aclose_http_clients``). When the agent runs async, sync-only
+    tools run in the bounded tool executor.
+
+    Args:
+        llm_name: Name of the chat model in credentials.json driving the agent
+        tools: The tools the agent may call
+        prompt_name: Name of the prompt template rendered as the system prompt
+
+    Returns:
+        The compiled agent graph
+    """
+    llm = get_llm(llm_name)
+    tools = tuple(tools)
+    key = (llm_name, tuple(id(tool) for tool in tools), prompt_name)
+    entry = _agents.get(key)
+    if entry is None or entry[0] is not llm:
+        with _agents_lock:
+            entry = _agents.get(key)
+            if entry is None or entry[0] is not llm:
+                logger.debug(f"Building {prompt_name} agent")
+                agent = create_react_agent(
+                    llm,
+                    tools=[bind_tool_executor(tool) for tool in tools],
+                    prompt=partial(apply_prompt_template, prompt_name),
+                )
+                entry = _agents[key] = (llm, tools, agent)
+    return entry[2]
+
+
+def clear_react_agents() -> None:
+    """Drop all cached agents so they are rebuilt on next use.
+
+    Called when models or prompts are reset (``aclose_http_clients``,
+    ``clear_prompt_cache``).
+    """
+    with _agents_lock:
+        _agents.clear()
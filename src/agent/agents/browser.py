@@ -5,11 +5,10 @@ import json
 import json_repair
 from typing import Literal
 from src.utils.json_utils import repair_json_output
-from src.agent.agents.prompts.template import apply_prompt_template
 from src.agent.state import State, Router
-from src.config.llm import browser_llm
-from langchain_core.messages import HumanMessage
-from langgraph.prebuilt import create_react_agent
+from src.agent.plan import agent_response
+from src.agent.agents.agent_factory import get_react_agent
+from src.utils.process_lock import aexclusive, exclusive
 from src.tools.browser_tools import tools
 
 logger = logging.getLogger(__name__)
@@ -17,25 +16,31 @@ logger = logging.getLogger(__name__)
 def browser_node(state: State) -> Command[Literal["supervisor"]]:
     logger.info("Browser agent starting task")
     
-    browser_agent = create_react_agent(
-        browser_llm,
-        tools=tools,
-        prompt=lambda state: apply_prompt_template('browser', state)
-    )
+    browser_agent = get_react_agent("browser_llm", tools, 'browser')
     
-    result = browser_agent.invoke(state)
+    # One browser step at a time on this machine, whichever API worker runs it
+    with exclusive("browser"):
+        result = browser_agent.invoke(state)
+    return _browser_command(state, result)
+
+
+async def abrowser_node(state: State) -> Command[Literal["supervisor"]]:
+    logger.info("Browser agent starting task")
+
+    browser_agent = get_react_agent("browser_llm", tools, 'browser')
+    async with aexclusive("browser"):
+        result = await browser_agent.ainvoke(state)
+    return _browser_command(state, result)
+
+
+def _browser_command(state: State, result) -> Command[Literal["supervisor"]]:
     logger.info("Browser agent completed task")
     response_content = result["messages"][-1].content
     response_content = repair_json_output(response_content)
     logger.debug(f"Browser agent response: {response_content}")
     return Command(
         update={
-            "messages": [
-                HumanMessage(
-                    content=response_content,
-                    name="browser",
-                )
-            ]
+            "messages": [agent_response(state, "browser", response_content)]
         },
         goto="supervisor",
-    )
\ No newline at end of file
+    )
@@ -1,14 +1,12 @@
 import logging
 import json
 from typing import Literal
-from langchain_core.messages import HumanMessage
 from langgraph.types import Command
 from langgraph.types import Command
 from src.utils.json_utils import repair_json_output
-from src.agent.agents.prompts.template import apply_prompt_template
 from src.agent.state import State
-from src.config.llm import coder_llm
-from langgraph.prebuilt import create_react_agent
+from src.agent.plan import agent_response
+from src.agent.agents.agent_factory import get_react_agent
 from src.tools.coder_tools import tools
 from langgraph_codeact import create_codeact
 from langgraph.checkpoint.memory import MemorySaver
@@ -49,25 +47,28 @@ def code_node(state: State) -> Command[Literal["supervisor"]]:
     # )
     # coder_agent = code_act.compile(checkpointer=MemorySaver())
 
-    coder_agent = create_react_agent(
-        coder_llm,
-        tools=tools,
-        prompt=lambda state: apply_prompt_template('coder', state)
-    )
+    coder_agent = get_react_agent("coder_llm", tools, 'coder')
 
     result = coder_agent.invoke(state)
+    return _coder_command(state, result)
+
+
+async def acode_node(state: State) -> Command[Literal["supervisor"]]:
+    logger.info("Code agent starting task")
+
+    coder_agent = get_react_agent("coder_llm", tools, 'coder')
+    result = await coder_agent.ainvoke(state)
+    return _coder_command(state, result)
+
+
+def _coder_command(state: State, result) -> Command[Literal["supervisor"]]:
     logger.info("Code agent completed task")
     response_content = result["messages"][-1].content
     response_content = repair_json_output(response_content)
     logger.debug(f"Code agent response: {response_content}")
     return Command(
         update={
-            "messages": [
-                HumanMessage(
-                    content=response_content,
-                    name="coder",
-                )
-            ]
+            "messages": [agent_response(state, "coder", response_content)]
         },
         goto="supervisor",
-    )
\ No newline at end of file
+    )
@@ -2,13 +2,13 @@ import logging
 import json
 import json_repair
 import logging
-from typing import Literal
-from langchain_core.messages import AIMessage
+from typing import AsyncIterator, Literal, Optional
+from langchain_core.messages import AIMessage, AIMessageChunk
 from langgraph.types import Command
 from src.utils.json_utils import repair_json_output
 from src.agent.agents.prompts.template import apply_prompt_template
 from src.agent.state import State
-from src.config.llm import coordinator_llm
+from src.config.llm import get_llm
 from langchain_core.tools import tool
 
 logger = logging.getLogger(__name__)
@@ -19,15 +19,65 @@ def handoff_to_planner():
     return "done"
 
 def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
+    if handoff := _streamed_handoff(state):
+        return handoff
     logger.info("Coordinator talking.")
     messages = apply_prompt_template("coordinator", state)
 
     response = (
-        coordinator_llm
+        get_llm("coordinator_llm")
             .bind_tools([handoff_to_planner])
             .invoke(messages)
     )
+    return _coordinator_command(response)
 
+
+async def acoordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
+    if handoff := _streamed_handoff(state):
+        return handoff
+    logger.info("Coordinator talking.")
+    messages = apply_prompt_template("coordinator", state)
+
+    response = await (
+        get_llm("coordinator_llm")
+            .bind_tools([handoff_to_planner])
+            .ainvoke(messages)
+    )
+    return _coordinator_command(response)
+
+
+async def astream_coordinator(state: State) -> AsyncIterator[AIMessageChunk]:
+    """Stream the coordinator's turn outside the graph.
+
+    The stream stops after the first chunk of a ``handoff_to_planner`` call, so
+    the caller can start the planning graph right away.
+    """
+    logger.info("Coordinator talking.")
+    messages = apply_prompt_template("coordinator", state)
+
+    stream = (
+        get_llm("coordinator_llm")
+            .bind_tools([handoff_to_planner])
+            .astream(messages)
+    )
+    try:
+        async for chunk in stream:
+            yield chunk
+            if chunk.tool_call_chunks:
+                return
+    finally:
+        await stream.aclose()
+
+
+def _streamed_handoff(state: State) -> Optional[Command[Literal["planner"]]]:
+    """Route to the planner without an LLM call if the streamed turn already handed off."""
+    if not state.get("handoff_to_planner"):
+        return None
+    # Cleared so later turns of a checkpointed conversation run the coordinator again
+    return Command(update={"handoff_to_planner": False}, goto="planner")
+
+
+def _coordinator_command(response: AIMessage) -> Command[Literal["planner", "__end__"]]:
     goto = "__end__"
     if len(response.tool_calls) > 0:
         goto = "planner"
@@ -5,11 +5,9 @@ import json
 import json_repair
 from typing import Literal
 from src.utils.json_utils import repair_json_output
-from src.agent.agents.prompts.template import apply_prompt_template
 from src.agent.state import State, Router
-from src.config.llm import file_manager_llm
-from langchain_core.messages import HumanMessage
-from langgraph.prebuilt import create_react_agent
+from src.agent.plan import agent_response
+from src.agent.agents.agent_factory import get_react_agent
 from src.tools.file_manager_tools import tools
 
 logger = logging.getLogger(__name__)
@@ -17,25 +15,28 @@ logger = logging.getLogger(__name__)
 def file_manage_node(state: State) -> Command[Literal["supervisor"]]:
     logger.info("File manager agent starting task")
     
-    file_manager_agent = create_react_agent(
-        file_manager_llm,
-        tools=tools,
-        prompt=lambda state: apply_prompt_template('file_manager', state)
-    )
+    file_manager_agent = get_react_agent("file_manager_llm", tools, 'file_manager')
     
     result = file_manager_agent.invoke(state)
+    return _file_manager_command(state, result)
+
+
+async def afile_manage_node(state: State) -> Command[Literal["supervisor"]]:
+    logger.info("File manager agent starting task")
+
+    file_manager_agent = get_react_agent("file_manager_llm", tools, 'file_manager')
+    result = await file_manager_agent.ainvoke(state)
+    return _file_manager_command(state, result)
+
+
+def _file_manager_command(state: State, result) -> Command[Literal["supervisor"]]:
     logger.info("File manager agent completed task")
     response_content = result["messages"][-1].content
     response_content = repair_json_output(response_content)
     logger.debug(f"File manager agent response: {response_content}")
     return Command(
         update={
-            "messages": [
-                HumanMessage(
-                    content=response_content,
-                    name="file_manager",
-                )
-            ]
+            "messages": [agent_response(state, "file_manager", response_content)]
         },
         goto="supervisor",
     )
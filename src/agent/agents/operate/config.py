@@ -8,7 +8,7 @@ from openai import OpenAI
 import anthropic
 from prompt_toolkit.shortcuts import input_dialog
 from dotenv import load_dotenv
-from src.config.llm import computer_tool_llm
+from src.config.llm import get_computer_tool_llm
 
 load_dotenv()
 
@@ -65,7 +65,7 @@ class Config:
         #         )
         #     api_key = os.getenv("OPENAI_API_KEY")
 
-        client = computer_tool_llm
+        client = get_computer_tool_llm()
         # client.api_key = api_key
         # client.base_url = os.getenv("OPENAI_API_BASE_URL", client.base_url)
         # client.base_url = os.getenv("OPENAI_API_BASE_URL", client.base_url)
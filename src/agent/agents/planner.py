@@ -1,4 +1,3 @@
-from copy import deepcopy
 from langchain_core.messages import HumanMessage
 from langgraph.types import Command
 
@@ -7,13 +6,20 @@ import logging
 import json
 import json_repair
 import logging
-from typing import Literal
+import time
+from typing import Literal, Tuple
+from langchain_core.messages import AIMessage
 from langgraph.types import Command
+from src.agent.plan import parse_plan
+from src.agent.plan_cache import get_plan_cache, plan_scope, request_text
 from src.utils.json_utils import repair_json_output
 from src.agent.agents.prompts.template import apply_prompt_template
 from src.agent.state import State
 from src.config.llm import planner_llm
-from src.tools.planner_tools import search
+from src.config.llm_cache import ReplayChatModel
+from src.tools.executor import run_blocking
+from src.tools.planner_tools import asearch, search
+from src.workflows.admission import enter_workflow_lane
 
 logger = logging.getLogger(__name__)
 
@@ -21,21 +27,76 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
     logger.info("Planner generating full plan")
     messages = apply_prompt_template("planner", state)
     llm = planner_llm(state.get('deep_thinking_mode'))
-    if state.get("search_before_planning"):
-        searched_content = search(state["messages"][-1].content)
-        if isinstance(searched_content, list):
-            messages = deepcopy(messages)
-            messages[-1].content += f"\n\n# Relative Search Results\n\n{json.dumps([{'title': elem['title'], 'content': elem['content']} for elem in searched_content], ensure_ascii=False)}"
-        else:
-            logger.error(
-                f"Tavily search returned malformed response: {searched_content}"
-            )
-   
+
+    # Timed from here so the time saved by a cache hit includes the search
+    started = time.time()
+    plan_cache = get_plan_cache()
+    cache_request = request_text(state) if plan_cache is not None else None
+    cached = plan_cache.lookup(cache_request, plan_scope(state)) if cache_request else None
+    if cached is not None:
+        logger.info(f"Reusing cached plan of a {cached.similarity:.3f} similar request")
+        # Replayed as a stream so clients see the same events as for a fresh plan
+        llm = ReplayChatModel(message=AIMessage(content=cached.plan))
+    elif state.get("search_before_planning"):
+        messages = _with_search_results(messages, search(state["messages"][-1].content))
+
     stream = llm.stream(messages)
     full_response = ""
     for chunk in stream:
         full_response += chunk.content
-    
+
+    full_response, goto = _parse_plan_response(state, full_response)
+    if cache_request and cached is None and _cacheable(state, full_response, goto):
+        plan_cache.add(cache_request, plan_scope(state), full_response, time.time() - started)
+    return _planner_command(full_response, goto)
+
+
+async def aplanner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
+    # API runs queue here for a workflow slot; the coordinator's reply lane is left
+    await enter_workflow_lane()
+    logger.info("Planner generating full plan")
+    messages = apply_prompt_template("planner", state)
+    llm = planner_llm(state.get('deep_thinking_mode'))
+
+    started = time.time()
+    plan_cache = get_plan_cache()
+    cache_request = request_text(state) if plan_cache is not None else None
+    # The cache may call an embedding API and always reads SQLite
+    cached = await run_blocking(plan_cache.lookup, cache_request, plan_scope(state)) if cache_request else None
+    if cached is not None:
+        logger.info(f"Reusing cached plan of a {cached.similarity:.3f} similar request")
+        llm = ReplayChatModel(message=AIMessage(content=cached.plan))
+    elif state.get("search_before_planning"):
+        messages = _with_search_results(messages, await asearch(state["messages"][-1].content))
+
+    full_response = ""
+    async for chunk in llm.astream(messages):
+        full_response += chunk.content
+
+    full_response, goto = _parse_plan_response(state, full_response)
+    if cache_request and cached is None and _cacheable(state, full_response, goto):
+        await run_blocking(plan_cache.add, cache_request, plan_scope(state), full_response, time.time() - started)
+    return _planner_command(full_response, goto)
+
+
+def _with_search_results(messages: list, searched_content) -> list:
+    if not isinstance(searched_content, list):
+        logger.error(
+            f"Tavily search returned malformed response: {searched_content}"
+        )
+        return messages
+    search_results = f"\n\n# Relative Search Results\n\n{json.dumps([{'title': elem['title'], 'content': elem['content']} for elem in searched_content], ensure_ascii=False)}"
+    # Only the request gets the results appended; copy it rather than the whole history
+    request = messages[-1]
+    if isinstance(request.content, list):
+        content = request.content + [{"type": "text", "text": search_results}]
+    else:
+        content = request.content + search_results
+    return messages[:-1] + [request.model_copy(update={"content": content})]
+
+
+def _parse_plan_response(state: State, full_response: str) -> Tuple[str, str]:
+    """Normalize the planner's answer to JSON and pick the next node."""
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"Planner response: {full_response}")
 
@@ -45,8 +106,6 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
     if full_response.endswith("```"):
         full_response = full_response.removesuffix("```")
 
-    # print(full_response)
-
     goto = "supervisor"
     try:
         repaired_response = json_repair.loads(full_response)
@@ -54,11 +113,22 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
     except json.JSONDecodeError:
         logger.warning("Planner response is not a valid JSON")
         goto = "__end__"
+    return full_response, goto
+
+
+def _cacheable(state: State, full_response: str, goto: str) -> bool:
+    """Only plans the supervisor can follow are worth reusing."""
+    if goto != "supervisor":
+        return False
+    steps = parse_plan(full_response)
+    return bool(steps) and all(step.agent in state["TEAM_MEMBERS"] for step in steps)
+
 
+def _planner_command(full_response: str, goto: str) -> Command[Literal["supervisor", "__end__"]]:
     return Command(
         update={
             "messages": [HumanMessage(content=full_response, name="planner")],
             "full_plan": full_response,
         },
         goto=goto,
-    )
\ No newline at end of file
+    )
@@ -1,8 +1,14 @@
+import json
 import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from typing import Any, Dict, FrozenSet, Tuple
+from jinja2 import Environment, FileSystemLoader, Template, meta, select_autoescape
 from langgraph.prebuilt.chat_agent_executor import AgentState
 
+from src.agent.context import context_budget, count_tokens, fit_messages
+
 env = Environment(
     loader=FileSystemLoader(os.path.dirname(__file__)),
     autoescape=select_autoescape(),
@@ -10,23 +16,78 @@ env = Environment(
     lstrip_blocks=True,
 )
 
+# Rendered system prompts, keyed on the prompt name and the values of the variables
+# the template actually uses (team members, their configuration, ...), so the
+# message history and other state never invalidate or bloat the cache.
+PROMPT_RENDER_CACHE_SIZE = 256
+
+_templates: Dict[str, Tuple[Template, FrozenSet[str]]] = {}
+_rendered: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _load_template(prompt_name: str) -> Tuple[Template, FrozenSet[str]]:
+    """Compile a prompt template once and find the variables it reads."""
+    cached = _templates.get(prompt_name)
+    if cached is None:
+        source, _, _ = env.loader.get_source(env, f"{prompt_name}.md")
+        variables = frozenset(meta.find_undeclared_variables(env.parse(source)))
+        cached = _templates[prompt_name] = (env.get_template(f"{prompt_name}.md"), variables)
+    return cached
+
+
+def _render(prompt_name: str, state_vars: Dict[str, Any]) -> str:
+    template, variables = _load_template(prompt_name)
+    values = {name: state_vars[name] for name in variables if name in state_vars}
+    key = (prompt_name, json.dumps(values, sort_keys=True, default=repr))
+    with _cache_lock:
+        rendered = _rendered.get(key)
+        if rendered is not None:
+            _rendered.move_to_end(key)
+            return rendered
+    rendered = template.render(**values)
+    with _cache_lock:
+        _rendered[key] = rendered
+        if len(_rendered) > PROMPT_RENDER_CACHE_SIZE:
+            _rendered.popitem(last=False)
+    return rendered
+
+
+def clear_prompt_cache() -> None:
+    """Forget compiled and rendered templates, e.g. after editing a prompt file."""
+    with _cache_lock:
+        _templates.clear()
+        _rendered.clear()
+    # Agents render their prompt per call, but are rebuilt with the fresh templates too
+    from src.agent.agents.agent_factory import clear_react_agents
+
+    clear_react_agents()
+    env.cache.clear()
+
+
 def get_prompt_template(prompt_name: str) -> str:
     try:
-        template = env.get_template(f"{prompt_name}.md")
-        return template.render()
+        return _render(prompt_name, {})
     except Exception as e:
         raise ValueError(f"Error loading template {prompt_name}: {e}")
 
 
 def apply_prompt_template(prompt_name: str, state: AgentState) -> list:
+    current_time = datetime.now().strftime("%a %b %d %Y %H:%M:%S %z")
     state_vars = {
-        "CURRENT_TIME": datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"),
+        "CURRENT_TIME": current_time,
         **state,
     }
 
     try:
-        template = env.get_template(f"{prompt_name}.md")
-        system_prompt = template.render(**state_vars)
-        return [{"role": "system", "content": system_prompt}] + state["messages"]
+        system_prompt = _render(prompt_name, state_vars)
+        _, variables = _load_template(prompt_name)
+        if "CURRENT_TIME" not in variables:
+            # The time goes after the static prompt, so the prompt prefix stays
+            # byte-identical between calls and provider prompt caching can hit
+            system_prompt += f"\n\n---\nCURRENT_TIME: {current_time}\n---"
+        budget = context_budget(prompt_name, state) - count_tokens(system_prompt)
+        messages = fit_messages(state["messages"], budget)
+        return [{"role": "system", "content": system_prompt}] + messages
     except Exception as e:
         raise ValueError(f"Error applying template {prompt_name}: {e}")
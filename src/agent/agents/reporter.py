@@ -4,15 +4,26 @@ from typing import Literal
 from src.utils.json_utils import repair_json_output
 from src.agent.agents.prompts.template import apply_prompt_template
 from src.agent.state import State
-from src.config.llm import reporter_llm
-from langchain_core.messages import HumanMessage
+from src.agent.plan import agent_response
+from src.config.llm import get_llm
 
 logger = logging.getLogger(__name__)
 
 def reporter_node(state: State) -> Command[Literal["supervisor"]]:
     logger.info("Reporter write final report")
     messages = apply_prompt_template("reporter", state)
-    response = reporter_llm.invoke(messages)
+    response = get_llm("reporter_llm").invoke(messages)
+    return _reporter_command(state, response)
+
+
+async def areporter_node(state: State) -> Command[Literal["supervisor"]]:
+    logger.info("Reporter write final report")
+    messages = apply_prompt_template("reporter", state)
+    response = await get_llm("reporter_llm").ainvoke(messages)
+    return _reporter_command(state, response)
+
+
+def _reporter_command(state: State, response) -> Command[Literal["supervisor"]]:
     logger.debug(f"Current state messages: {state['messages']}")
     response_content = response.content
     response_content = repair_json_output(response_content)
@@ -20,12 +31,7 @@ def reporter_node(state: State) -> Command[Literal["supervisor"]]:
 
     return Command(
         update={
-            "messages": [
-                HumanMessage(
-                    content=response_content,
-                    name="reporter",
-                )
-            ]
+            "messages": [agent_response(state, "reporter", response_content)]
         },
         goto="supervisor",
-    )
\ No newline at end of file
+    )
@@ -5,11 +5,9 @@ import json
 import json_repair
 from typing import Literal
 from src.utils.json_utils import repair_json_output
-from src.agent.agents.prompts.template import apply_prompt_template
 from src.agent.state import State, Router
-from src.config.llm import researcher_llm
-from langchain_core.messages import HumanMessage
-from langgraph.prebuilt import create_react_agent
+from src.agent.plan import agent_response
+from src.agent.agents.agent_factory import get_react_agent
 from src.tools.researcher_tools import tools
 from src.agent.agents.web_researcher.graph import graph
 
@@ -31,12 +29,20 @@ def research_node(state: State) -> Command[Literal["supervisor"]]:
     #     response_content = repair_json_output(response_content)
     # else:
     
-    research_agent = create_react_agent(
-        researcher_llm,
-        tools=tools,
-        prompt=lambda state: apply_prompt_template('researcher', state)
-    )    
+    research_agent = get_react_agent("researcher_llm", tools, 'researcher')
     result = research_agent.invoke(state)
+    return _researcher_command(state, result)
+
+
+async def aresearch_node(state: State) -> Command[Literal["supervisor"]]:
+    logger.info("Research agent starting task")
+
+    research_agent = get_react_agent("researcher_llm", tools, 'researcher')
+    result = await research_agent.ainvoke(state)
+    return _researcher_command(state, result)
+
+
+def _researcher_command(state: State, result) -> Command[Literal["supervisor"]]:
     response_content = result["messages"][-1].content
     response_content = repair_json_output(response_content)
         
@@ -44,12 +50,7 @@ def research_node(state: State) -> Command[Literal["supervisor"]]:
     logger.debug(f"Research agent response: {response_content}")
     return Command(
         update={
-            "messages": [
-                HumanMessage(
-                    content=response_content,
-                    name="researcher",
-                )
-            ]
+            "messages": [agent_response(state, "researcher", response_content)]
         },
         goto="supervisor",
     )
@@ -1,28 +1,146 @@
-from copy import deepcopy
-from langgraph.types import Command
+from langgraph.types import Command, Send
 import logging
 import json
 import json_repair
-from typing import Literal
+import threading
+from collections import OrderedDict
+from typing import List, Literal, Tuple
 from src.utils.json_utils import repair_json_output
 from src.agent.agents.prompts.template import apply_prompt_template
 from src.agent.state import State, Router
-from src.config.llm import supervisor_llm
+from src.agent.plan import dumps_plan, plan_progress, parse_plan, ready_steps, step_instruction
+from src.config.llm import get_llm
 from src.config.team import TEAM_MEMBERS
 from langchain_core.messages import HumanMessage, BaseMessage
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
 
+# Formatted copies of team member responses, so each response is wrapped in
+# RESPONSE_FORMAT once instead of on every hop
+FORMATTED_RESPONSE_CACHE_SIZE = 1024
+
+_formatted_responses: "OrderedDict[Tuple[str, str, int], BaseMessage]" = OrderedDict()
+_formatted_lock = threading.Lock()
+
+# Follow the planner's steps without asking the supervisor LLM who goes next
+PLAN_ROUTING = os.getenv("PLAN_ROUTING", "True") == "True"
+
+# Agents driving a single shared session (browser window, desktop) run one step at a time
+EXCLUSIVE_AGENTS = {"browser", "computer"}
+
+
+def dispatch_plan_steps(state: State):
+    """Route to the agents of the next plan steps without an LLM call.
+
+    Every step whose dependencies are done is sent to its agent; steps that do not
+    declare dependencies wait for the previous step. Returns None when the
+    supervisor LLM should decide instead: there is no usable plan, it names
+    unknown agents, a step failed or the run already left the plan.
+    """
+    steps = parse_plan(state.get("full_plan"))
+    if not steps:
+        return None
+    team_members = state.get("TEAM_MEMBERS", TEAM_MEMBERS)
+    if any(step.agent not in team_members for step in steps):
+        logger.warning(f"Plan uses unknown agents, falling back to supervisor LLM: {dumps_plan(steps)}")
+        return None
+
+    completed, failed, off_plan = plan_progress(state["messages"])
+    if failed or off_plan:
+        logger.info(f"Plan not followed (failed steps: {sorted(failed)}), falling back to supervisor LLM")
+        return None
+    if len(completed) == len(steps):
+        logger.info("All plan steps completed")
+        return Command(goto="__end__", update={"next": "__end__"})
+
+    dispatched = []
+    for step in ready_steps(steps, completed):
+        if step.agent in EXCLUSIVE_AGENTS and any(s.agent == step.agent for s in dispatched):
+            continue
+        dispatched.append(step)
+    if not dispatched:
+        logger.warning(f"No runnable plan steps, falling back to supervisor LLM: {dumps_plan(steps)}")
+        return None
+
+    logger.info(f"Supervisor dispatching plan steps: {[(s.number, s.agent) for s in dispatched]}")
+    # Each agent sees the shared history plus its own step. LangGraph applies the
+    # writes of parallel tasks in the order of this list, so their results are
+    # appended to the messages in plan order whatever order they finish in.
+    sends = [
+        Send(step.agent, {
+            **state,
+            "messages": state["messages"] + [step_instruction(step)],
+            "plan_step": step.number,
+        })
+        for step in dispatched
+    ]
+    return Command(goto=sends, update={"next": ",".join(step.agent for step in dispatched)})
+
+
+def format_member_responses(messages: list) -> list:
+    """Wrap team member responses in RESPONSE_FORMAT.
+
+    Other messages are passed through as they are and the originals are never
+    modified. Formatted copies are cached by message id (and content length, as
+    the same message may be shortened to fit the context), so only responses new
+    since the last hop are copied.
+    """
+    formatted: List = []
+    for message in messages:
+        if not (isinstance(message, BaseMessage) and message.name in TEAM_MEMBERS):
+            formatted.append(message)
+            continue
+        key = (message.id, message.name, len(message.content)) if message.id else None
+        if key is not None:
+            with _formatted_lock:
+                cached = _formatted_responses.get(key)
+                if cached is not None:
+                    _formatted_responses.move_to_end(key)
+                    formatted.append(cached)
+                    continue
+        cached = message.model_copy(
+            update={"content": RESPONSE_FORMAT.format(message.name, message.content)}
+        )
+        if key is not None:
+            with _formatted_lock:
+                _formatted_responses[key] = cached
+                if len(_formatted_responses) > FORMATTED_RESPONSE_CACHE_SIZE:
+                    _formatted_responses.popitem(last=False)
+        formatted.append(cached)
+    return formatted
+
+
 def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
     logger.info("Supervisor evaluating next action")
-    messages = apply_prompt_template("supervisor", state)
-    messages = deepcopy(messages)
-    for message in messages:
-        if isinstance(message, BaseMessage) and message.name in TEAM_MEMBERS:
-            message.content = RESPONSE_FORMAT.format(message.name, message.content)
-    response = supervisor_llm.invoke(messages)
+    if PLAN_ROUTING:
+        command = dispatch_plan_steps(state)
+        if command is not None:
+            return command
+
+    messages = format_member_responses(apply_prompt_template("supervisor", state))
+    response = get_llm("supervisor_llm").invoke(messages)
+    return _supervisor_command(state, response)
+
+
+async def asupervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
+    logger.info("Supervisor evaluating next action")
+    if PLAN_ROUTING:
+        command = dispatch_plan_steps(state)
+        if command is not None:
+            return command
+
+    messages = format_member_responses(apply_prompt_template("supervisor", state))
+    response = await get_llm("supervisor_llm").ainvoke(messages)
+    return _supervisor_command(state, response)
+
+
+def _supervisor_command(state: State, response) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
     try:
         if hasattr(response, "content"):
             response_content = response.content
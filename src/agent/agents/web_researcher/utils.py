@@ -11,7 +11,7 @@ from langchain_core.messages import AIMessage, HumanMessage
 
 from src.agent.agents.web_researcher.state import InterviewState
 
-from src.config.llm import deep_researcher_llm
+from src.config.llm import get_llm
 
 def get_message_text(msg: BaseMessage) -> str:
     """Get the text content of a message."""
@@ -37,7 +37,7 @@ def load_chat_model(fully_specified_name: str, max_tokens: Optional[int] = None)
     if max_tokens is not None:
         kwargs["max_tokens"] = max_tokens
     # return init_chat_model(model, model_provider=provider, **kwargs)
-    return deep_researcher_llm
+    return get_llm("deep_researcher_llm")
 
 def dict_to_section(section_dict: Dict[str, Any]) -> Section:
     """Convert a dictionary to a Section object."""
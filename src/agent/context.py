@@ -0,0 +1,187 @@
+"""
+Token budgets for the message history sent to each agent.
+
+``State.messages`` keeps every crawled page, tool output and report of a session.
+Before a prompt is sent, :func:`fit_messages` keeps it under the agent's token
+budget: the latest messages, the user's request and the current plan stay
+verbatim, while older long outputs are cut down to an excerpt and, if that is not
+enough, to a short reference. Messages are only ever shortened, never dropped, so
+tool calls stay paired with their results.
+
+The budget of a team member is the ``context_budget`` entry of its
+``TEAM_MEMBER_CONFIGRATIONS``; other prompts use ``CONTEXT_BUDGET_TOKENS``.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence
+
+from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+
+from src.config.team import TEAM_MEMBER_CONFIGRATIONS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_BUDGET_TOKENS = int(os.getenv("CONTEXT_BUDGET_TOKENS", "64000"))
+# Latest messages that are never shortened
+CONTEXT_KEEP_RECENT = int(os.getenv("CONTEXT_KEEP_RECENT", "6"))
+# Size of the excerpt left of a shortened message
+CONTEXT_EXCERPT_TOKENS = int(os.getenv("CONTEXT_EXCERPT_TOKENS", "300"))
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+
+# Rough size of a message's role and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Token counts of recently counted texts, keyed by a digest so a cached count
+# never keeps a page dump or tool output alive
+TOKEN_COUNT_CACHE_SIZE = 4096
+
+_token_counts: "OrderedDict[bytes, int]" = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """The tiktoken encoding, or None to fall back to estimating from length."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+
+                    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception as e:
+                    logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in ``text``."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    with _token_counts_lock:
+        count = _token_counts.get(key)
+        if count is not None:
+            _token_counts.move_to_end(key)
+            return count
+    count = len(encoding.encode(text, disallowed_special=()))
+    with _token_counts_lock:
+        _token_counts[key] = count
+        if len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+    return count
+
+
+def _head(text: str, tokens: int) -> str:
+    """The first ``tokens`` tokens of ``text``."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:tokens * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:tokens])
+
+
+def message_tokens(message: Any) -> int:
+    """Approximate prompt tokens of a message (text parts only)."""
+    if isinstance(message, dict):
+        content = message.get("content", "")
+    else:
+        content = getattr(message, "content", "")
+    if isinstance(content, list):
+        content = "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+        )
+    return count_tokens(str(content)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def context_budget(prompt_name: str, state: Any) -> int:
+    """Token budget of the prompt ``prompt_name``."""
+    configurations = state.get("TEAM_MEMBER_CONFIGRATIONS") or TEAM_MEMBER_CONFIGRATIONS
+    budget = configurations.get(prompt_name, {}).get("context_budget")
+    return int(budget) if budget else CONTEXT_BUDGET_TOKENS
+
+
+def _shorten(message: BaseMessage, excerpt_tokens: int) -> BaseMessage:
+    content = message.content
+    omitted = count_tokens(content)
+    source = "tool output" if isinstance(message, ToolMessage) else f"output of {message.name or 'a message'}"
+    if excerpt_tokens:
+        excerpt = _head(content, excerpt_tokens)
+        omitted -= count_tokens(excerpt)
+        text = f"{excerpt}\n\n[... {omitted} more tokens of this earlier {source} omitted to fit the context window]"
+    else:
+        text = f"[Earlier {source} of {omitted} tokens omitted to fit the context window]"
+    return message.model_copy(update={"content": text})
+
+
+def _protected(messages: Sequence[Any], keep_recent: int) -> set:
+    """Indexes of messages that are always sent verbatim."""
+    protected = set(range(max(len(messages) - keep_recent, 0), len(messages)))
+    first_request = next(
+        (i for i, m in enumerate(messages) if isinstance(m, HumanMessage) and not m.name), None
+    )
+    latest_plan = next(
+        (i for i in range(len(messages) - 1, -1, -1) if getattr(messages[i], "name", None) == "planner"), None
+    )
+    protected.update(i for i in (first_request, latest_plan) if i is not None)
+    return protected
+
+
+def fit_messages(
+    messages: Sequence[Any],
+    budget: int,
+    keep_recent: Optional[int] = None,
+) -> List[Any]:
+    """Shorten older messages, oldest first, until ``messages`` fit in ``budget`` tokens.
+
+    Args:
+        messages: The message history, oldest first.
+        budget: Token budget for the whole history.
+        keep_recent: Number of latest messages never shortened.
+
+    Returns:
+        The history with the same messages; shortened ones are copies.
+    """
+    counts = [message_tokens(message) for message in messages]
+    total = sum(counts)
+    if total <= budget:
+        return list(messages)
+
+    if keep_recent is None:
+        keep_recent = CONTEXT_KEEP_RECENT
+    protected = _protected(messages, keep_recent)
+    candidates = [
+        i for i, message in enumerate(messages)
+        if i not in protected
+        and isinstance(message, BaseMessage)
+        and isinstance(message.content, str)
+        and counts[i] > CONTEXT_EXCERPT_TOKENS + MESSAGE_OVERHEAD_TOKENS
+    ]
+
+    result = list(messages)
+    # Excerpts first; only reduce messages to references if excerpts are not enough
+    for excerpt_tokens in (CONTEXT_EXCERPT_TOKENS, 0):
+        for i in candidates:
+            if total <= budget:
+                break
+            shortened = _shorten(messages[i], excerpt_tokens)
+            shortened_tokens = message_tokens(shortened)
+            total -= counts[i] - shortened_tokens
+            counts[i] = shortened_tokens
+            result[i] = shortened
+
+    if total > budget:
+        logger.warning(f"Context of {total} tokens is over its budget of {budget} after shortening older messages")
+    return result
@@ -1,40 +1,157 @@
+import asyncio
+import importlib
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
 from langgraph.graph import StateGraph, START
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.errors import GraphBubbleUp
+from langgraph.types import Command
+from langgraph.utils.runnable import RunnableCallable
 
+from src.agent.plan import PLAN_STEP_KEY, step_failure
 from src.agent.state import State
-from src.agent.agents.coordinator import coordinator_node
-from src.agent.agents.planner import planner_node
-from src.agent.agents.supervisor import supervisor_node
-from src.agent.agents.researcher import research_node
-from src.agent.agents.coder import code_node
-from src.agent.agents.browser import browser_node
-from src.agent.agents.reporter import reporter_node
-from src.agent.agents.file_manager import file_manage_node
-from src.agent.agents.computer import computer_node
+from src.config.team import TEAM_MEMBERS
 
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
-def build_graph():
-    memory = MemorySaver()
+logger = logging.getLogger(__name__)
+
+# Graph node -> (module, node function, async node function, nodes it can route to).
+# Agent modules pull in their tools (browser automation, OCR, crawlers, ...) and
+# LLM clients, so they are only imported the first time their node runs. The
+# async functions are used by `ainvoke`/`astream_events`, so the API's event loop
+# never waits on an LLM or tool call.
+AGENT_NODES = {
+    "coordinator": ("src.agent.agents.coordinator", "coordinator_node", "acoordinator_node", ("planner", "__end__")),
+    "planner": ("src.agent.agents.planner", "planner_node", "aplanner_node", ("supervisor", "__end__")),
+    "supervisor": ("src.agent.agents.supervisor", "supervisor_node", "asupervisor_node", (*TEAM_MEMBERS, "__end__")),
+    "researcher": ("src.agent.agents.researcher", "research_node", "aresearch_node", ("supervisor",)),
+    "file_manager": ("src.agent.agents.file_manager", "file_manage_node", "afile_manage_node", ("supervisor",)),
+    "coder": ("src.agent.agents.coder", "code_node", "acode_node", ("supervisor",)),
+    "browser": ("src.agent.agents.browser", "browser_node", "abrowser_node", ("supervisor",)),
+    "computer": ("src.agent.agents.computer", "computer_node", "acomputer_node", ("supervisor",)),
+    "reporter": ("src.agent.agents.reporter", "reporter_node", "areporter_node", ("supervisor",)),
+}
+
+
+class LazyNode:
+    """Graph node that imports its implementation on first call.
+
+    An agent running a plan step that raises reports the error as its step result
+    instead of ending the run, so the supervisor can route around the failure.
+    """
+
+    def __init__(self, node: str, module: str, name: str, async_name: str):
+        self.node = node
+        self.module = module
+        self.name = name
+        self.async_name = async_name
+        self._func: Optional[Callable[[State], Any]] = None
+        self._afunc: Optional[Callable[[State], Awaitable[Any]]] = None
+
+    def load(self) -> Callable[[State], Any]:
+        if self._func is None:
+            module = importlib.import_module(self.module)
+            self._afunc = getattr(module, self.async_name)
+            self._func = getattr(module, self.name)
+        return self._func
+
+    def __call__(self, state: State) -> Any:
+        try:
+            return self.load()(state)
+        except Exception as e:
+            return self._step_failed(state, e)
+
+    async def acall(self, state: State) -> Any:
+        if self._afunc is None:
+            # Importing an agent module is slow; keep it off the event loop
+            await asyncio.to_thread(self.load)
+        try:
+            return await self._afunc(state)
+        except Exception as e:
+            return self._step_failed(state, e)
+
+    def _step_failed(self, state: State, error: Exception) -> Command:
+        """Record ``error`` as the result of the running plan step; other errors propagate."""
+        if isinstance(error, GraphBubbleUp) or state.get(PLAN_STEP_KEY) is None:
+            raise error
+        logger.error(f"{self.node} failed on plan step {state[PLAN_STEP_KEY]}: {error}")
+        return Command(update={"messages": [step_failure(state, self.node, error)]}, goto="supervisor")
+
+    def as_runnable(self, node: str) -> RunnableCallable:
+        return RunnableCallable(self, self.acall, name=node, trace=False)
+
+
+_nodes = {
+    node: LazyNode(node, module, name, async_name) for node, (module, name, async_name, _) in AGENT_NODES.items()
+}
+
 
+def create_checkpointer():
+    """Checkpointer selected by GRAPH_MEMORY_BACKEND: "memory" (default) or "sqlite"."""
+    backend = os.getenv("GRAPH_MEMORY_BACKEND", "memory").lower()
+    if backend == "memory":
+        return MemorySaver()
+    if backend != "sqlite":
+        raise ValueError(f"Unknown GRAPH_MEMORY_BACKEND: {backend}")
+    from src.storage.checkpointer import SQLiteCheckpointSaver
+
+    checkpointer = SQLiteCheckpointSaver()
+    checkpointer.start_compaction()
+    return checkpointer
+
+
+def build_graph():
     builder = StateGraph(State)
     builder.add_edge(START, "coordinator")
-    builder.add_node("coordinator", coordinator_node)
-    builder.add_node("planner", planner_node)
-    builder.add_node("supervisor", supervisor_node)
-    builder.add_node("researcher", research_node)
-    builder.add_node("file_manager", file_manage_node)
-    builder.add_node("coder", code_node)
-    builder.add_node("browser", browser_node)
-    builder.add_node("computer", computer_node)
-    builder.add_node("reporter", reporter_node)
-    
+    for node, (_, _, _, destinations) in AGENT_NODES.items():
+        builder.add_node(node, _nodes[node].as_runnable(node), destinations=destinations)
+
     if os.getenv("USE_GRAPH_MEMORY", "False") == "True":
-        return builder.compile(checkpointer=memory)
+        return builder.compile(checkpointer=create_checkpointer())
     else:
         return builder.compile()
 
-graph = build_graph()
\ No newline at end of file
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """Return the process wide agent graph, building it on first use.
+
+    Every caller shares one compiled graph (and so one checkpointer).
+    """
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = build_graph()
+    return _graph
+
+
+def close_graph() -> None:
+    """Stop background work of the graph's checkpointer, e.g. on shutdown."""
+    if _graph is not None and hasattr(_graph.checkpointer, "close"):
+        _graph.checkpointer.close()
+
+
+def preload_agents() -> None:
+    """Import every agent module ahead of its first use, e.g. in the background after startup."""
+    for node, lazy_node in _nodes.items():
+        try:
+            lazy_node.load()
+        except Exception as e:
+            logger.warning(f"Could not preload {node} agent: {e}")
+
+
+def __getattr__(name: str) -> Any:
+    # `graph` stays importable (langgraph.json points at it) but is built lazily
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,141 @@
+"""
+Helpers for executing the planner's plan step by step.
+
+The planner emits ``{"thought", "title", "steps": [...]}`` where every step names an
+agent and may list the (1-based) numbers of the steps it ``depends_on``; a step
+without that list depends on the previous one. Steps whose dependencies are all
+complete are ready to run, so independent steps can be dispatched to their agents
+at the same time.
+
+Progress is recorded on the agents' result messages (``additional_kwargs``
+``plan_step``, plus ``plan_step_error`` when the agent failed) rather than in
+separate state, so it is saved with the messages by the checkpointer and naturally
+starts over with every new plan.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, FrozenSet, List, NamedTuple, Optional, Sequence, Set
+
+import json_repair
+from langchain_core.messages import BaseMessage, HumanMessage
+
+logger = logging.getLogger(__name__)
+
+PLAN_STEP_KEY = "plan_step"
+PLAN_STEP_ERROR_KEY = "plan_step_error"
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    number: int
+    agent: str
+    title: str
+    description: str
+    note: str
+    depends_on: FrozenSet[int]
+
+
+def parse_plan(full_plan: Optional[str]) -> List[PlanStep]:
+    """Parse the planner output into steps; returns [] when there is no usable plan."""
+    if not full_plan:
+        return []
+    try:
+        plan = json_repair.loads(full_plan) if isinstance(full_plan, str) else full_plan
+    except Exception as e:
+        logger.warning(f"Could not parse plan: {e}")
+        return []
+    raw_steps = plan.get("steps") if isinstance(plan, dict) else None
+    if not isinstance(raw_steps, list):
+        return []
+
+    steps = []
+    for number, raw_step in enumerate(raw_steps, start=1):
+        if not isinstance(raw_step, dict) or not raw_step.get("agent_name"):
+            return []
+        depends_on = raw_step.get("depends_on")
+        if isinstance(depends_on, list):
+            # Only earlier steps can be dependencies, which also rules out cycles
+            depends_on = {d for d in depends_on if isinstance(d, int) and 0 < d < number}
+        else:
+            depends_on = {number - 1} if number > 1 else set()
+        steps.append(
+            PlanStep(
+                number=number,
+                agent=str(raw_step["agent_name"]),
+                title=str(raw_step.get("title", "")),
+                description=str(raw_step.get("description", "")),
+                note=str(raw_step.get("note", "") or ""),
+                depends_on=frozenset(depends_on),
+            )
+        )
+    return steps
+
+
+class PlanProgress(NamedTuple):
+    completed: Set[int]
+    # Steps whose agent raised an error instead of returning a result
+    failed: Set[int]
+    # Whether an agent ran outside the plan (routed by the supervisor LLM)
+    off_plan: bool
+
+
+def plan_progress(messages: Sequence[BaseMessage]) -> PlanProgress:
+    """Which plan steps were answered since the latest plan was made."""
+    completed, failed = set(), set()
+    off_plan = False
+    for message in reversed(messages):
+        name = getattr(message, "name", None)
+        if name == "planner":
+            break
+        step = getattr(message, "additional_kwargs", {}).get(PLAN_STEP_KEY)
+        if isinstance(step, int):
+            completed.add(step)
+            if message.additional_kwargs.get(PLAN_STEP_ERROR_KEY):
+                failed.add(step)
+        elif name and name != "supervisor":
+            off_plan = True
+    return PlanProgress(completed, failed, off_plan)
+
+
+def ready_steps(steps: Sequence[PlanStep], completed: Set[int]) -> List[PlanStep]:
+    """Steps not yet completed whose dependencies all are, in plan order."""
+    return [
+        step for step in steps
+        if step.number not in completed and step.depends_on <= completed
+    ]
+
+
+def step_instruction(step: PlanStep) -> HumanMessage:
+    """Message telling an agent which plan step it is executing."""
+    content = f"Execute step {step.number} of the plan: {step.title}\n\n{step.description}"
+    if step.note:
+        content += f"\n\nNote: {step.note}"
+    return HumanMessage(content=content, name="supervisor")
+
+
+def agent_response(state: Any, agent_name: str, content: str, error: Optional[str] = None) -> HumanMessage:
+    """An agent's result message, tagged with the plan step it completes (if any).
+
+    ``error`` marks the step as failed, which hands routing back to the supervisor LLM.
+    """
+    additional_kwargs = {}
+    if state.get(PLAN_STEP_KEY) is not None:
+        additional_kwargs[PLAN_STEP_KEY] = state[PLAN_STEP_KEY]
+        if error is not None:
+            additional_kwargs[PLAN_STEP_ERROR_KEY] = error
+    return HumanMessage(content=content, name=agent_name, additional_kwargs=additional_kwargs)
+
+
+def step_failure(state: Any, agent_name: str, error: Exception) -> HumanMessage:
+    """Result message of a plan step whose agent raised ``error``."""
+    description = f"{type(error).__name__}: {error}"
+    return agent_response(state, agent_name, f"Step failed with an error: {description}", error=description)
+
+
+def dumps_plan(steps: Sequence[PlanStep]) -> str:
+    """Compact description of the steps, for logging."""
+    return json.dumps(
+        [{"step": s.number, "agent": s.agent, "depends_on": sorted(s.depends_on)} for s in steps]
+    )
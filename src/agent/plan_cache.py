@@ -0,0 +1,302 @@
+"""
+Semantic cache of planner output.
+
+Planning is one of the slowest steps of a run. With ``PLAN_CACHE=True`` every
+validated plan is stored with an embedding of the request it answered, and a new
+request whose nearest stored request is at least ``PLAN_CACHE_THRESHOLD`` similar
+(cosine) reuses that plan instead of calling the planner LLM.
+
+Requests are embedded with the ``embedding_llm`` of credentials.json when one is
+configured, otherwise with a local hashed n-gram vector. The hashed vector
+cannot tell "... in Germany" from "... in France", so with it only near-exact
+matches (``HASHED_EMBEDDING_THRESHOLD``) are reused. Either way a stored plan is
+reused as is, so a hit also needs the same words as the new request once case,
+Arabic spelling variants, word order and stopwords are ignored: a request naming
+another place, date or number never gets the old plan. Plans are only shared
+between runs with the same team and planning options, and only for the first
+request of a conversation, since follow-ups depend on what came before.
+
+The index is a SQLite file (``PLAN_CACHE_DB``) searched in memory with numpy;
+entries expire after ``PLAN_CACHE_TTL`` seconds and at most
+``PLAN_CACHE_MAX_ENTRIES`` are kept.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.storage.text_index import tokenize
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PLAN_CACHE = os.getenv("PLAN_CACHE", "False") == "True"
+PLAN_CACHE_DB = os.getenv("PLAN_CACHE_DB", "history/plan_cache.db")
+PLAN_CACHE_THRESHOLD = float(os.getenv("PLAN_CACHE_THRESHOLD", "0.92"))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "500"))
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", str(30 * 24 * 3600)))
+
+HASHED_EMBEDDING_DIMENSIONS = 2048
+# Similarity the hashed embedding needs for a hit, whatever PLAN_CACHE_THRESHOLD says
+HASHED_EMBEDDING_THRESHOLD = 0.99
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Words that do not change what a request asks for (after normalize_text)
+STOPWORDS = frozenset(
+    "a an the and or of to in on at for with by from about into as is are was were be been "
+    "it this that these those me my i you your we our us please can could would will "
+    "do does did what which how who whom whose when where why some any all "
+    "في من على الى عن مع هذا هذه ذلك تلك هو هي انا انت نحن ما ماذا كيف متى اين هل او و ثم لي لنا"
+    .split()
+)
+
+
+def hashed_embedding(text: str) -> np.ndarray:
+    """Unit vector of hashed words and character trigrams of ``text``."""
+    vector = np.zeros(HASHED_EMBEDDING_DIMENSIONS, dtype=np.float32)
+    words = _WORD.findall(text.lower())
+    normalized = " ".join(words)
+    features = words + [normalized[i:i + 3] for i in range(max(len(normalized) - 2, 0))]
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % HASHED_EMBEDDING_DIMENSIONS
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def request_keys(text: str) -> FrozenSet[str]:
+    """The normalized words of a request other than stopwords, which a reused plan must share.
+
+    Entities, numbers and dates are words like any other, whatever their case or
+    script, so two requests match only if they differ in wording alone.
+    """
+    return frozenset(token for token in tokenize(text) if token not in STOPWORDS)
+
+
+def request_text(state: Dict[str, Any]) -> Optional[str]:
+    """The request to look plans up by, or None when the plan cannot be shared.
+
+    Only the first request of a conversation qualifies, and only plain text: the
+    plan of a follow-up or of a request with attachments depends on more than its
+    wording.
+    """
+    messages = state.get("messages", [])
+    user_messages = [m for m in messages if getattr(m, "type", None) == "human" and not m.name]
+    if len(user_messages) != 1 or any(getattr(m, "name", None) == "planner" for m in messages):
+        return None
+    content = user_messages[0].content
+    if isinstance(content, list):
+        if any(isinstance(part, dict) and part.get("type") != "text" for part in content):
+            return None
+        content = " ".join(part["text"] if isinstance(part, dict) else str(part) for part in content)
+    return content.strip() or None
+
+
+def plan_scope(state: Dict[str, Any]) -> str:
+    """Options a plan depends on besides the request; plans are only shared within one scope."""
+    return json.dumps(
+        {
+            "team": sorted(state.get("TEAM_MEMBERS") or []),
+            "deep_thinking_mode": bool(state.get("deep_thinking_mode")),
+            "search_before_planning": bool(state.get("search_before_planning")),
+        },
+        sort_keys=True,
+    )
+
+
+@dataclass
+class CachedPlan:
+    plan: str
+    request: str
+    similarity: float
+    plan_seconds: float
+
+
+@dataclass
+class PlanCacheStats:
+    lookups: int = 0
+    hits: int = 0
+    stored: int = 0
+    # Planner time the hits would have taken, going by the original planning time
+    seconds_saved: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats["hit_rate"] = round(self.hits / self.lookups, 4) if self.lookups else 0.0
+        stats["seconds_saved"] = round(self.seconds_saved, 3)
+        return stats
+
+
+class PlanCache:
+    """Nearest-neighbour index from requests to the plans made for them."""
+
+    def __init__(
+        self,
+        db_path: str = PLAN_CACHE_DB,
+        threshold: float = PLAN_CACHE_THRESHOLD,
+        max_entries: int = PLAN_CACHE_MAX_ENTRIES,
+        ttl: float = PLAN_CACHE_TTL,
+        embed: Optional[Callable[[str], Sequence[float]]] = None,
+        embedder: str = "hashed",
+    ):
+        self.db_path = db_path
+        # The hashed embedding only recognizes near-duplicate wording
+        self.threshold = threshold if embed else max(threshold, HASHED_EMBEDDING_THRESHOLD)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed = embed or hashed_embedding
+        # Vectors of different embedders are not comparable, so entries are tagged
+        self.embedder = embedder if embed else "hashed"
+        self.stats = PlanCacheStats()
+        self._lock = threading.Lock()
+        # scope -> (entry ids, unit vectors as rows); rebuilt after every change
+        self._index: Optional[Dict[str, Tuple[List[int], np.ndarray]]] = None
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS plan_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope TEXT NOT NULL,
+                embedder TEXT NOT NULL,
+                request TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                plan TEXT NOT NULL,
+                plan_seconds REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embed(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _load_index(self) -> Dict[str, Tuple[List[int], np.ndarray]]:
+        """Group live entries by scope; call with the lock held."""
+        if self._index is None:
+            rows = self._conn.execute(
+                "SELECT id, scope, embedding FROM plan_cache WHERE embedder = ? AND created_at > ?",
+                (self.embedder, time.time() - self.ttl),
+            ).fetchall()
+            grouped: Dict[str, Tuple[List[int], List[np.ndarray]]] = {}
+            for entry_id, scope, embedding in rows:
+                ids, vectors = grouped.setdefault(scope, ([], []))
+                ids.append(entry_id)
+                vectors.append(np.frombuffer(embedding, dtype=np.float32))
+            self._index = {scope: (ids, np.vstack(vectors)) for scope, (ids, vectors) in grouped.items()}
+        return self._index
+
+    def lookup(self, request: str, scope: str) -> Optional[CachedPlan]:
+        """The stored plan of the most similar earlier request, if similar enough."""
+        vector = self._vector(request)
+        with self._lock:
+            self.stats.lookups += 1
+            ids, matrix = self._load_index().get(scope, ([], None))
+            if not ids or matrix.shape[1] != vector.shape[0]:
+                return None
+            similarities = matrix @ vector
+            keys = request_keys(request)
+            # Most similar first; a candidate naming other entities or numbers is skipped
+            for best in np.argsort(-similarities):
+                similarity = float(similarities[best])
+                if similarity < self.threshold:
+                    return None
+                row = self._conn.execute(
+                    "SELECT request, plan, plan_seconds FROM plan_cache WHERE id = ?", (ids[best],)
+                ).fetchone()
+                if row is not None and request_keys(row[0]) == keys:
+                    break
+            else:
+                return None
+            self._conn.execute(
+                "UPDATE plan_cache SET hits = hits + 1, last_used = ? WHERE id = ?", (time.time(), ids[best])
+            )
+            self.stats.hits += 1
+            self.stats.seconds_saved += row[2]
+        return CachedPlan(plan=row[1], request=row[0], similarity=similarity, plan_seconds=row[2])
+
+    def add(self, request: str, scope: str, plan: str, plan_seconds: float) -> None:
+        """Store a validated plan for ``request``."""
+        vector = self._vector(request)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO plan_cache (scope, embedder, request, embedding, plan, plan_seconds, created_at, "
+                    "last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (scope, self.embedder, request, vector.tobytes(), plan, plan_seconds, now, now),
+                )
+                self._conn.execute("DELETE FROM plan_cache WHERE created_at <= ?", (now - self.ttl,))
+                self._conn.execute(
+                    "DELETE FROM plan_cache WHERE id IN ("
+                    " SELECT id FROM plan_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self.stats.stored += 1
+            self._index = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM plan_cache")
+            self._index = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0]
+
+
+_plan_cache: Optional[PlanCache] = None
+_plan_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> Optional[PlanCache]:
+    """The process wide plan cache, or None when PLAN_CACHE is off."""
+    global _plan_cache
+    if not PLAN_CACHE:
+        return None
+    if _plan_cache is None:
+        with _plan_cache_lock:
+            if _plan_cache is None:
+                from src.config.llm import get_embeddings, tokens
+
+                embeddings = get_embeddings()
+                if embeddings is not None:
+                    _plan_cache = PlanCache(
+                        embed=embeddings.embed_query,
+                        embedder=f"{tokens['embedding_llm']['base_url']}#{tokens['embedding_llm']['model']}",
+                    )
+                else:
+                    _plan_cache = PlanCache()
+    return _plan_cache
+
+
+def plan_cache_stats() -> Dict[str, Any]:
+    """Hit rate, planner time saved and size of the plan cache."""
+    cache = get_plan_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "embedder": cache.embedder, "entries": len(cache), **cache.stats.as_dict()}
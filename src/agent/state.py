@@ -16,6 +16,11 @@ class State(MessagesState):
     full_plan: str
     deep_thinking_mode: bool
     search_before_planning: bool
+    # Plan step an agent is executing; only set on the input of fanned out agents
+    plan_step: int
+    # Set when the API's fast path already streamed the coordinator's turn and saw
+    # it hand off; the coordinator node then goes straight to the planner
+    handoff_to_planner: bool
 
 
 
@@ -2,48 +2,93 @@
 FastAPI application for Autonoma.
 """
 
-import json
 import logging
 import os
-import uuid
-import shutil
+import time
+from contextlib import aclosing, asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Union
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from pydantic import BaseModel, Field
 from sse_starlette.sse import EventSourceResponse
 import asyncio
 from typing import AsyncGenerator, Dict, List, Any
 
-from src.agent.graph import build_graph
+from src.agent.graph import close_graph, get_graph, preload_agents
+from src.config.llm import aclose_http_clients
 from src.config.team import TEAM_MEMBERS, TEAM_MEMBER_CONFIGRATIONS
 from src.workflows.stream_workflow import run_agent_workflow
+from src.workflows.batch import get_batch_jobs
+from src.workflows.admission import (
+    ADMISSION_CONTROL,
+    REPLY_LANE,
+    AdmissionRejected,
+    get_admission_controller,
+)
+from src.storage import (
+    AsyncChatHistoryStore,
+    BlobNotFoundError,
+    ChatNotFoundError,
+    FolderNotFoundError,
+    get_blob_store,
+    get_chat_history_store,
+)
+from src.storage.blobs import absolute_blob_urls
+from src.api.sse import STREAM_BATCH_INTERVAL_MS, batch_message_deltas, sse_frame
+from src.config.llm_cache import llm_cache_stats
+from src.agent.plan_cache import plan_cache_stats
+from src.tools.executor import shutdown_tool_executor
+from src.storage.chat_history import CHAT_HISTORY_BACKEND, SORT_FIELDS, decode_cursor, encode_cursor
 from dotenv import load_dotenv
 
 load_dotenv()
 
 BROWSER_HISTORY_DIR = os.getenv("BROWSER_HISTORY_DIR", "history/browser_history")
-CHAT_HISTORY_DIR = os.getenv("CHAT_HISTORY_DIR", "history/chat_history")
-CHAT_FOLDERS_DIR = os.path.join(CHAT_HISTORY_DIR, "folders")
-CHAT_GLOBAL_DIR = os.path.join(CHAT_HISTORY_DIR, "global")
-
-# Ensure directories exist
-os.makedirs(CHAT_HISTORY_DIR, exist_ok=True)
-os.makedirs(CHAT_FOLDERS_DIR, exist_ok=True)
-os.makedirs(CHAT_GLOBAL_DIR, exist_ok=True)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+def check_shared_state() -> None:
+    """Warn about state that is not shared when the API runs in several worker processes."""
+    workers = int(os.getenv("API_WORKERS", "1"))
+    if workers <= 1:
+        return
+    if os.getenv("USE_GRAPH_MEMORY", "False") == "True" and os.getenv("GRAPH_MEMORY_BACKEND", "memory").lower() == "memory":
+        logger.warning(
+            f"GRAPH_MEMORY_BACKEND=memory with {workers} workers: each worker only sees the "
+            "conversations it served; use the sqlite backend"
+        )
+    if CHAT_HISTORY_BACKEND == "file":
+        logger.warning(
+            f"CHAT_HISTORY_BACKEND=file with {workers} workers: concurrent updates of one chat "
+            "from different workers can be lost; use the sqlite backend"
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    check_shared_state()
+    if os.getenv("PRELOAD_AGENTS", "True") == "True":
+        # Agents are imported lazily; warm them up without delaying startup
+        asyncio.get_running_loop().run_in_executor(None, preload_agents)
+    yield
+    # Release pooled LLM connections and storage threads on shutdown
+    await aclose_http_clients()
+    chat_store.shutdown()
+    close_graph()
+    shutdown_tool_executor()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Autonoma API",
     description="API for Autonoma LangGraph-based agent workflow",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -56,7 +101,22 @@ app.add_middleware(
 )
 
 # Create the graph
-graph = build_graph()
+graph = get_graph()
+
+# Chat history storage backend (SQLite by default, see src/storage). Store calls
+# run on a dedicated I/O pool so they never block the event loop.
+chat_store = AsyncChatHistoryStore(get_chat_history_store())
+
+# Images and files from messages are stored once, by content hash, and referenced
+# from chat records and replayed SSE events as /api/blobs/<sha256>
+blob_store = get_blob_store()
+
+# Stream events whose payload repeats whole messages (and their attachments)
+BLOB_EVENTS = {"start_of_workflow", "final_session_state"}
+
+# Seconds between checks for a disconnected client while a workflow streams;
+# the SSE response also stops the stream as soon as the disconnect arrives
+DISCONNECT_CHECK_INTERVAL = 1.0
 
 
 class ContentItem(BaseModel):
@@ -98,6 +158,9 @@ class ChatRequest(BaseModel):
     thread_id: Optional[str] = Field(
         "default", description="a specifc conversation identifier"
     )
+    bypass_cache: Optional[bool] = Field(
+        False, description="Whether to skip the LLM response cache for this request"
+    )
 
 
 class ChatFolder(BaseModel):
@@ -209,41 +272,107 @@ async def chat_endpoint(request: ChatRequest, req: Request):
 
             messages.append(message_dict)
 
+        # Rejected requests get a 429 before any work is done; the ticket itself is
+        # taken in the generator, whose cleanup runs however the stream ends
+        admission = get_admission_controller() if ADMISSION_CONTROL else None
+        client_id = client_key(req)
+        if admission is not None:
+            admission.check(client_id)
+
+        # The model needs the attachment bytes, not our blob URLs
+        messages = await chat_store.run(blob_store.resolve, messages)
+
         async def event_generator():
+            ticket = None
             try:
-                async for event in run_agent_workflow(
+                if admission is not None:
+                    ticket = admission.admit(client_id)
+                    async for status in ticket.enter(REPLY_LANE):
+                        yield sse_frame("queue_status", status)
+                events = run_agent_workflow(
                     messages,
                     request.debug,
                     request.deep_thinking_mode,
                     request.search_before_planning,
                     request.team_members,
                     request.thread_id,
-                ):
-                    # Check if client is still connected
-                    if await req.is_disconnected():
-                        logger.info("Client disconnected, stopping workflow")
-                        break
-                    yield {
-                        "event": event["event"],
-                        "data": json.dumps(event["data"], ensure_ascii=False),
-                    }
+                    request.bypass_cache,
+                    # The planner moves the ticket to the workflow lane if the coordinator hands off
+                    ticket,
+                )
+                if STREAM_BATCH_INTERVAL_MS > 0:
+                    events = batch_message_deltas(events)
+                next_disconnect_check = 0.0
+                async with aclosing(events):
+                    async for event in events:
+                        # Check if client is still connected, at most once per interval
+                        now = time.monotonic()
+                        if now >= next_disconnect_check:
+                            next_disconnect_check = now + DISCONNECT_CHECK_INTERVAL
+                            if await req.is_disconnected():
+                                logger.info("Client disconnected, stopping workflow")
+                                break
+                        data = event["data"]
+                        if event["event"] in BLOB_EVENTS:
+                            data = await chat_store.run(blob_store.externalize, data)
+                            data = absolute_blob_urls(data, str(req.base_url))
+                        yield sse_frame(event["event"], data)
+            except AdmissionRejected as e:
+                logger.warning(f"Request of {client_id} rejected: {e}")
+                yield sse_frame("queue_rejected", {"detail": str(e), "retry_after": e.retry_after})
             except asyncio.CancelledError:
                 logger.info("Stream processing cancelled")
                 raise
             except Exception as e:
                 logger.error(f"Error in workflow: {e}")
                 raise
+            finally:
+                if ticket is not None:
+                    ticket.close()
 
         return EventSourceResponse(
             event_generator(),
             media_type="text/event-stream",
             sep="\n",
         )
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists ``etag`` (weak or strong) or is ``*``."""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
+
+
+def client_key(req: Request) -> str:
+    """Identify the client for per-client limits: the X-Client-Id header, else its address."""
+    return req.headers.get("x-client-id") or (req.client.host if req.client else "unknown")
+
+
+@app.get("/api/admission/stats")
+async def get_admission_stats():
+    """
+    Get the running and queued requests of each admission lane.
+
+    Returns:
+        dict: Lane statistics, or {"enabled": false} when admission control is off
+    """
+    if not ADMISSION_CONTROL:
+        return {"enabled": False}
+    return {"enabled": True, **get_admission_controller().stats()}
+
+
 @app.get("/api/browser_history/{filename}")
 async def get_browser_history_file(filename: str):
     """
@@ -268,6 +397,40 @@ async def get_browser_history_file(filename: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/blobs/{blob_hash}")
+async def get_blob(blob_hash: str, req: Request):
+    """
+    Get an image or file referenced from a chat message.
+
+    Blobs are immutable, so the hash doubles as a strong ETag and responses may be
+    cached indefinitely. Range requests are supported for partial downloads.
+
+    Args:
+        blob_hash: The sha256 hash of the blob
+        req: The FastAPI request object, for conditional request headers
+
+    Returns:
+        The blob content, or 304 Not Modified if the client already has it
+    """
+    try:
+        path = blob_store.path(blob_hash)
+        if not os.path.exists(path):
+            raise BlobNotFoundError(blob_hash)
+        headers = {
+            "ETag": f'"{blob_hash}"',
+            "Cache-Control": "public, max-age=31536000, immutable",
+        }
+        if etag_matches(req.headers.get("if-none-match", ""), blob_hash):
+            return Response(status_code=304, headers=headers)
+        media_type = await chat_store.run(blob_store.media_type, blob_hash)
+        return FileResponse(path, media_type=media_type, headers=headers)
+    except BlobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error retrieving blob: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/team_members")
 async def get_team_members():
     """
@@ -283,6 +446,140 @@ async def get_team_members():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/llm_cache/stats")
+async def get_llm_cache_stats():
+    """
+    Get the hit/miss counters and size of the LLM response cache.
+
+    Returns:
+        dict: Cache statistics, or {"enabled": false} when the cache is off
+    """
+    try:
+        return await asyncio.to_thread(llm_cache_stats)
+    except Exception as e:
+        logger.error(f"Error getting LLM cache stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/plan_cache/stats")
+async def get_plan_cache_stats():
+    """
+    Get the hit rate, planner time saved and size of the plan cache.
+
+    Returns:
+        dict: Cache statistics, or {"enabled": false} when the cache is off
+    """
+    try:
+        return await asyncio.to_thread(plan_cache_stats)
+    except Exception as e:
+        logger.error(f"Error getting plan cache stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class BatchRequest(BaseModel):
+    """Request to run many prompts through the agent workflow in the background"""
+    items: List[Dict[str, Any]] = Field(
+        ..., min_length=1,
+        description="Prompts, each an object like a line of a batch JSONL file (prompt, id, deep_thinking_mode, ...)",
+    )
+    concurrency: int = Field(4, ge=1, le=32, description="Number of workflows running at the same time")
+
+
+class ResumeBatchRequest(BaseModel):
+    """Request to run the prompts of a batch job that have no result yet"""
+    retry_failed: bool = Field(False, description="Whether to run prompts again whose run failed")
+    concurrency: Optional[int] = Field(None, ge=1, le=32, description="Number of workflows running at the same time")
+
+
+@app.post("/api/batch")
+async def start_batch(request: BatchRequest):
+    """
+    Start a batch job running the given prompts in the background.
+
+    Args:
+        request: The prompts and the concurrency to run them with
+
+    Returns:
+        dict: The job, with the id to poll its progress with
+    """
+    try:
+        job = await asyncio.to_thread(get_batch_jobs().start, request.items, request.concurrency)
+        return job.to_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting batch job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/batch/{job_id}")
+async def get_batch(job_id: str):
+    """
+    Get the progress of a batch job.
+
+    Args:
+        job_id: The id of the batch job
+
+    Returns:
+        dict: The job status and counts of succeeded, failed and skipped prompts
+    """
+    try:
+        job = await asyncio.to_thread(get_batch_jobs().get, job_id)
+        return job.to_dict()
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    except Exception as e:
+        logger.error(f"Error getting batch job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/batch/{job_id}/results")
+async def get_batch_results(job_id: str):
+    """
+    Download the results of a batch job as JSONL, one line per finished prompt.
+
+    Args:
+        job_id: The id of the batch job
+
+    Returns:
+        The results file
+    """
+    try:
+        job = await asyncio.to_thread(get_batch_jobs().get, job_id)
+        if not os.path.exists(job.output_path):
+            return Response(content=b"", media_type="application/x-ndjson")
+        return FileResponse(job.output_path, media_type="application/x-ndjson", filename=f"batch-{job_id}.jsonl")
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    except Exception as e:
+        logger.error(f"Error getting batch results: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/batch/{job_id}/resume")
+async def resume_batch(job_id: str, request: ResumeBatchRequest):
+    """
+    Run the prompts of a finished or interrupted batch job that have no result yet.
+
+    Args:
+        job_id: The id of the batch job
+        request: Whether to retry failed prompts, and the concurrency
+
+    Returns:
+        dict: The job
+    """
+    try:
+        job = await asyncio.to_thread(get_batch_jobs().resume, job_id, request.retry_failed, request.concurrency)
+        return job.to_dict()
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error resuming batch job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Chat History Pydantic Models
 class ChatHistoryArgs(BaseModel):
     """Arguments for saving a chat history"""
@@ -302,6 +599,18 @@ class UpdateChatRequest(BaseModel):
     args: Optional[Dict[str, Any]] = Field(None, description="Additional arguments for the chat")
 
 
+class AppendMessagesRequest(BaseModel):
+    """Request model for appending messages to a chat history"""
+    messages: List[MessageItem] = Field(..., description="Messages to add to the end of the chat")
+
+
+# Fields a chat listing entry can contain, used to validate ?fields= projections
+CHAT_LIST_FIELDS = {
+    "title", "uuid", "location", "folder_id", "folder_name",
+    "created_at", "updated_at", "is_favorite",
+}
+
+
 class ChatHistoryItem(BaseModel):
     """Basic information about a saved chat"""
     title: str = Field(..., description="The title of the chat")
@@ -311,7 +620,7 @@ class ChatHistoryItem(BaseModel):
 @app.post("/api/chat/save")
 async def save_chat_history(request: SaveChatRequest):
     """
-    Save a chat history to a JSON file.
+    Save a chat history to the chat history store.
     
     Args:
         request: The SaveChatRequest containing chat title, messages and arguments
@@ -320,71 +629,29 @@ async def save_chat_history(request: SaveChatRequest):
         dict: A dictionary with the UUID of the saved chat
     """
     try:
-        # Generate UUID if not provided in args
-        chat_uuid = str(uuid.uuid4())
-        
-        # Determine if this is a global chat or in a folder
-        folder_id = request.folder_id
-        
-        if folder_id:
-            # Verify the folder exists
-            folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_id)
-            if not os.path.exists(folder_path):
-                # Create the folder if it doesn't exist with a default index.json
-                os.makedirs(folder_path, exist_ok=True)
-                index_data = {
-                    "folder_id": folder_id,
-                    "name": f"Folder {folder_id[:8]}",
-                    "created_at": datetime.now().isoformat()
-                }
-                with open(os.path.join(folder_path, "index.json"), "w", encoding="utf-8") as f:
-                    json.dump(index_data, f, ensure_ascii=False, indent=2)
-            
-            # Create the chat folder inside the folder
-            chat_folder_path = os.path.join(folder_path, chat_uuid)
-        else:
-            # Global chat (not in any folder)
-            chat_folder_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid)
-        
-        # Create the chat folder
-        os.makedirs(chat_folder_path, exist_ok=True)
-        
-        # Create the file path
-        chat_file_path = os.path.join(chat_folder_path, "chat.json")
-        
-        # Set timestamps
-        now = datetime.now().isoformat()
-        
-        # Extract args from request
-        is_favorite = request.args.get("is_favorite", False)
-        tags = request.args.get("tags", [])
-        
-        # Prepare data to save
-        save_data = {
-            "args": {
-                "title": request.title,
-                "uuid": chat_uuid,
-                "created_at": now,
-                "updated_at": now,
-                "model": "default",
-                "is_favorite": is_favorite,
-                "tags": tags
-            },
-            "messages": [message.dict() for message in request.messages]
-        }
-        
-        # Save to JSON file
-        with open(chat_file_path, "w", encoding="utf-8") as f:
-            json.dump(save_data, f, ensure_ascii=False, indent=2)
-        
-        return {"uuid": chat_uuid, "status": "success", "folder_id": folder_id}
+        messages = await chat_store.run(
+            blob_store.externalize, [message.dict() for message in request.messages]
+        )
+        chat_uuid = await chat_store.save_chat(
+            request.title,
+            messages,
+            request.args,
+            request.folder_id,
+        )
+        return {"uuid": chat_uuid, "status": "success", "folder_id": request.folder_id}
     except Exception as e:
         logger.error(f"Error saving chat history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/chat/history")
-async def list_chat_history(folder_id: Optional[str] = None):
+async def list_chat_history(
+    folder_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = "updated_at",
+    fields: Optional[str] = None,
+):
     """
     Get a list of all saved chats.
     
@@ -392,163 +659,62 @@ async def list_chat_history(folder_id: Optional[str] = None):
         folder_id: Optional folder ID to filter chats from a specific folder
                   If 'global', returns only global chats
                   If None, returns all chats
+        limit: Optional page size; when set, the response includes a next_cursor
+        cursor: The next_cursor of the previous page
+        sort: Sort key, 'updated_at' (default) or 'created_at', newest first
+        fields: Optional comma separated list of fields to return (e.g.
+                'title,updated_at'); the uuid is always included
     
     Returns:
-        list: A list of ChatHistoryItem objects with title and UUID
+        list: A list of ChatHistoryItem objects with title and UUID, and the
+            cursor of the next page (None when there are no more chats)
     """
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORT_FIELDS)}")
+    projection = None
+    if fields:
+        projection = {"uuid", *(field.strip() for field in fields.split(",") if field.strip())}
+        unknown = projection - CHAT_LIST_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
     try:
-        result = []
-        
-        # Get global chats if requested or if no folder specified
-        if folder_id is None or folder_id == "global":
-            # List global chats (chats not in any folder)
-            global_chat_dirs = [d for d in os.listdir(CHAT_GLOBAL_DIR) 
-                              if os.path.isdir(os.path.join(CHAT_GLOBAL_DIR, d))]
-            
-            for chat_uuid in global_chat_dirs:
-                file_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid, "chat.json")
-                
-                if os.path.exists(file_path):
-                    try:
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            chat_data = json.load(f)
-                            
-                        # Extract title and UUID
-                        if "args" in chat_data and "title" in chat_data["args"]:
-                            title = chat_data["args"]["title"]
-                            chat_uuid = chat_data["args"]["uuid"]
-                            created_at = chat_data["args"]["created_at"]
-                            is_favorite = chat_data["args"]["is_favorite"]
-                            
-                            result.append({
-                                "title": title, 
-                                "uuid": chat_uuid,
-                                "location": "global",
-                                "created_at": created_at,
-                                "is_favorite": is_favorite,
-                            })
-                    except Exception as e:
-                        logger.warning(f"Error reading global chat file {file_path}: {e}")
-                        continue
-        
-        # Get folder chats if no specific folder requested or if specific folder requested
-        if folder_id is None or (folder_id != "global" and folder_id is not None):
-            # List folders in the folders directory
-            if folder_id is None:
-                # Get all folders
-                folder_dirs = [d for d in os.listdir(CHAT_FOLDERS_DIR) 
-                             if os.path.isdir(os.path.join(CHAT_FOLDERS_DIR, d))]
-            else:
-                # Get specific folder
-                folder_dirs = [folder_id] if os.path.isdir(os.path.join(CHAT_FOLDERS_DIR, folder_id)) else []
-            
-            for folder_name in folder_dirs:
-                folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-                
-                # Get folder name from index.json
-                folder_info = {"name": folder_name, "folder_id": folder_name}
-                index_path = os.path.join(folder_path, "index.json")
-                if os.path.exists(index_path):
-                    try:
-                        with open(index_path, "r", encoding="utf-8") as f:
-                            folder_info = json.load(f)
-                    except Exception as e:
-                        logger.warning(f"Error reading folder index file {index_path}: {e}")
-                
-                # Get all chat directories in this folder
-                chat_dirs = [d for d in os.listdir(folder_path) 
-                           if os.path.isdir(os.path.join(folder_path, d)) and d != "index.json"]
-                
-                for chat_uuid in chat_dirs:
-                    chat_file_path = os.path.join(folder_path, chat_uuid, "chat.json")
-                    
-                    if os.path.exists(chat_file_path):
-                        try:
-                            with open(chat_file_path, "r", encoding="utf-8") as f:
-                                chat_data = json.load(f)
-                                
-                            # Extract title and UUID
-                            if "args" in chat_data and "title" in chat_data["args"]:
-                                title = chat_data["args"]["title"]
-                                chat_uuid = chat_data["args"]["uuid"]
-                                created_at = chat_data["args"]["created_at"]
-                                is_favorite = chat_data["args"]["is_favorite"]
-                            
-                                result.append({
-                                    "title": title, 
-                                    "uuid": chat_uuid,
-                                    "location": "folder",
-                                    "folder_id": folder_name,
-                                    "folder_name": folder_info.get("name", folder_name),
-                                    "created_at": created_at,
-                                    "is_favorite": is_favorite,       
-                                })
-                        except Exception as e:
-                            logger.warning(f"Error reading folder chat file {chat_file_path}: {e}")
-                            continue
-        
-        # Sort by updated_at (newest first)
-        result.sort(key=lambda x: x.get("updated_at", ""), reverse=True)
-        
-        return {"history": result}
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        page_size = None if limit is None else limit + 1
+        history = await chat_store.list_chats(folder_id, sort, page_size, after)
+        next_cursor = None
+        if limit is not None and len(history) > limit:
+            history = history[:limit]
+            last = history[-1]
+            next_cursor = encode_cursor(last.get(sort) or "", last["uuid"])
+        if projection is not None:
+            history = [{k: v for k, v in chat.items() if k in projection} for chat in history]
+        return {"history": history, "next_cursor": next_cursor}
     except Exception as e:
         logger.error(f"Error listing chat history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/chat/history/{chat_uuid}")
-async def get_chat_history(chat_uuid: str):
+async def get_chat_history(chat_uuid: str, req: Request):
     """
     Get a specific chat history by UUID.
     
     Args:
         chat_uuid: The UUID of the chat to retrieve
+        req: The FastAPI request object, used to build absolute blob URLs
         
     Returns:
         dict: The full chat history data
     """
     try:
-        # First, check in global chats
-        global_chat_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid, "chat.json")
-        
-        if os.path.exists(global_chat_path):
-            with open(global_chat_path, "r", encoding="utf-8") as f:
-                chat_data = json.load(f)
-            chat_data["location"] = "global"
-            return chat_data
-        
-        # If not found in global, search in folders
-        for folder_name in os.listdir(CHAT_FOLDERS_DIR):
-            folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-            
-            if not os.path.isdir(folder_path):
-                continue
-                
-            chat_path = os.path.join(folder_path, chat_uuid, "chat.json")
-            
-            if os.path.exists(chat_path):
-                with open(chat_path, "r", encoding="utf-8") as f:
-                    chat_data = json.load(f)
-                
-                # Get folder info
-                folder_info = {"name": folder_name, "folder_id": folder_name}
-                index_path = os.path.join(folder_path, "index.json")
-                if os.path.exists(index_path):
-                    try:
-                        with open(index_path, "r", encoding="utf-8") as f:
-                            folder_info = json.load(f)
-                    except Exception as e:
-                        logger.warning(f"Error reading folder index: {e}")
-                
-                chat_data["location"] = "folder"
-                chat_data["folder_id"] = folder_name
-                chat_data["folder_name"] = folder_info.get("name", folder_name)
-                return chat_data
-        
-        # If we get here, the chat wasn't found
-        raise HTTPException(status_code=404, detail=f"Chat with UUID {chat_uuid} not found")
-    except HTTPException:
-        raise
+        chat_data = await chat_store.get_chat(chat_uuid)
+        return absolute_blob_urls(chat_data, str(req.base_url))
+    except ChatNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving chat history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -567,72 +733,48 @@ async def update_chat_history(chat_uuid: str, request: UpdateChatRequest):
         dict: A dictionary with the status of the update operation
     """
     try:
-        
-        # Find the chat location (global or in a folder)
-        chat_file_path = None
-        location = None
-        folder_id = None
-        
-        # Check global first
-        global_chat_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid, "chat.json")
-        if os.path.exists(global_chat_path):
-            chat_file_path = global_chat_path
-            location = "global"
-        else:
-            # Search in folders
-            for folder_name in os.listdir(CHAT_FOLDERS_DIR):
-                folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-                
-                if not os.path.isdir(folder_path):
-                    continue
-                    
-                potential_path = os.path.join(folder_path, chat_uuid, "chat.json")
-                
-                if os.path.exists(potential_path):
-                    chat_file_path = potential_path
-                    location = "folder"
-                    folder_id = folder_name
-                    break
-        
-        if not chat_file_path:
-            raise HTTPException(status_code=404, detail=f"Chat with UUID {chat_uuid} not found")
-        
-        # Read existing data
-        with open(chat_file_path, "r", encoding="utf-8") as f:
-            existing_data = json.load(f)
-        
-        # Update the data with new values if provided
-        if request.title:
-            existing_data["args"]["title"] = request.title
-            
+        messages = None
         if request.messages is not None:
-            # Convert Pydantic models to dictionaries
-            existing_data["messages"] = [message.dict() for message in request.messages]
-            
-        if request.args:
-            # Update with new args if provided
-            existing_data["args"].update(request.args)
-        
-        # Update the timestamp
-        existing_data["args"]["updated_at"] = datetime.now().isoformat()
-        
-        # Save updated data back to file
-        with open(chat_file_path, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, ensure_ascii=False, indent=2)
-        
-        return {
-            "uuid": chat_uuid, 
-            "status": "updated",
-            "location": location,
-            "folder_id": folder_id
-        }
-    except HTTPException:
-        raise
+            messages = await chat_store.run(
+                blob_store.externalize, [message.dict() for message in request.messages]
+            )
+        location = await chat_store.update_chat(chat_uuid, request.title, messages, request.args)
+        return {"uuid": chat_uuid, "status": "updated", **location}
+    except ChatNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating chat history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/chat/history/{chat_uuid}/messages")
+async def append_chat_messages(chat_uuid: str, request: AppendMessagesRequest):
+    """
+    Append messages to an existing chat history.
+    
+    Only the new messages are written, so saving a turn of a long conversation does
+    not re-serialize the whole message list the way a full update does.
+    
+    Args:
+        chat_uuid: The UUID of the chat to append to
+        request: The AppendMessagesRequest containing the new messages
+        
+    Returns:
+        dict: A dictionary with the status of the append operation
+    """
+    try:
+        messages = await chat_store.run(
+            blob_store.externalize, [message.dict() for message in request.messages]
+        )
+        location = await chat_store.append_messages(chat_uuid, messages)
+        return {"uuid": chat_uuid, "status": "appended", "appended": len(messages), **location}
+    except ChatNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error appending to chat history: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.put("/api/chat/history/{chat_uuid}/favorite")
 async def favorite_chat(chat_uuid: str, favorite_status: bool = True):
     """
@@ -646,56 +788,15 @@ async def favorite_chat(chat_uuid: str, favorite_status: bool = True):
         dict: A dictionary with the status of the operation
     """
     try:
-        # Find the chat location (global or in a folder)
-        chat_file_path = None
-        location = None
-        folder_id = None
-        
-        # Check global first
-        global_chat_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid, "chat.json")
-        if os.path.exists(global_chat_path):
-            chat_file_path = global_chat_path
-            location = "global"
-        else:
-            # Search in folders
-            for folder_name in os.listdir(CHAT_FOLDERS_DIR):
-                folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-                
-                if not os.path.isdir(folder_path):
-                    continue
-                    
-                potential_path = os.path.join(folder_path, chat_uuid, "chat.json")
-                
-                if os.path.exists(potential_path):
-                    chat_file_path = potential_path
-                    location = "folder"
-                    folder_id = folder_name
-                    break
-        
-        if not chat_file_path:
-            raise HTTPException(status_code=404, detail=f"Chat with UUID {chat_uuid} not found")
-        
-        # Read existing data
-        with open(chat_file_path, "r", encoding="utf-8") as f:
-            existing_data = json.load(f)
-        
-        # Update favorite status
-        existing_data["args"]["is_favorite"] = favorite_status
-        existing_data["args"]["updated_at"] = datetime.now().isoformat()
-        
-        # Save updated data back to file
-        with open(chat_file_path, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, ensure_ascii=False, indent=2)
-        
+        location = await chat_store.set_favorite(chat_uuid, favorite_status)
         return {
             "uuid": chat_uuid, 
             "is_favorite": favorite_status, 
             "status": "updated",
-            "location": location,
-            "folder_id": folder_id
+            **location,
         }
-    except HTTPException:
-        raise
+    except ChatNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating favorite status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -714,76 +815,16 @@ async def move_chat(chat_uuid: str, request: MoveChatRequest):
         dict: A dictionary with the status of the move operation
     """
     try:
-        # Find the chat location (global or in a folder)
-        source_path = None
-        destination_path = None
-        location = None
-        source_folder_id = None
-        
-        # Check global first
-        global_chat_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid)
-        if os.path.exists(global_chat_path):
-            source_path = global_chat_path
-            location = "global"
-        else:
-            # Search in folders
-            for folder_name in os.listdir(CHAT_FOLDERS_DIR):
-                folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-                
-                if not os.path.isdir(folder_path):
-                    continue
-                    
-                potential_path = os.path.join(folder_path, chat_uuid)
-                
-                if os.path.exists(potential_path):
-                    source_path = potential_path
-                    location = "folder"
-                    source_folder_id = folder_name
-                    break
-        
-        if not source_path:
-            raise HTTPException(status_code=404, detail=f"Chat with UUID {chat_uuid} not found")
-        
-        # Determine destination path
-        if request.destination == "global":
-            destination_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid)
-        else:
-            # Verify the destination folder exists
-            folder_path = os.path.join(CHAT_FOLDERS_DIR, request.destination)
-            if not os.path.exists(folder_path):
-                # Create the folder if it doesn't exist with a default index.json
-                os.makedirs(folder_path, exist_ok=True)
-                index_data = {
-                    "folder_id": request.destination,
-                    "name": f"Folder {request.destination[:8]}",
-                    "created_at": datetime.now().isoformat()
-                }
-                with open(os.path.join(folder_path, "index.json"), "w", encoding="utf-8") as f:
-                    json.dump(index_data, f, ensure_ascii=False, indent=2)
-            
-            destination_path = os.path.join(folder_path, chat_uuid)
-        
-        # Move the chat if it's not already at the destination
-        if os.path.normpath(source_path) != os.path.normpath(destination_path):
-            # Make sure destination doesn't already exist
-            if os.path.exists(destination_path):
-                shutil.rmtree(destination_path)
-            
-            # Copy the chat folder to the destination
-            shutil.copytree(source_path, destination_path)
-            
-            # Remove the source folder
-            shutil.rmtree(source_path)
-        
+        source = await chat_store.move_chat(chat_uuid, request.destination)
         return {
             "uuid": chat_uuid,
             "status": "moved",
-            "from": {"location": location, "folder_id": source_folder_id},
+            "from": source,
             "to": {"location": "global" if request.destination == "global" else "folder", 
                   "folder_id": None if request.destination == "global" else request.destination}
         }
-    except HTTPException:
-        raise
+    except ChatNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error moving chat: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -801,46 +842,10 @@ async def delete_chat_history(chat_uuid: str):
         dict: A dictionary with the status of the delete operation
     """
     try:
-        # Find the chat location (global or in a folder)
-        location = None
-        folder_id = None
-        path_to_delete = None
-        
-        # Check global first
-        global_chat_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid)
-        if os.path.exists(global_chat_path):
-            path_to_delete = global_chat_path
-            location = "global"
-        else:
-            # Search in folders
-            for folder_name in os.listdir(CHAT_FOLDERS_DIR):
-                folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-                
-                if not os.path.isdir(folder_path):
-                    continue
-                    
-                potential_path = os.path.join(folder_path, chat_uuid)
-                
-                if os.path.exists(potential_path):
-                    path_to_delete = potential_path
-                    location = "folder"
-                    folder_id = folder_name
-                    break
-        
-        if not path_to_delete:
-            raise HTTPException(status_code=404, detail=f"Chat with UUID {chat_uuid} not found")
-        
-        # Delete the chat folder
-        shutil.rmtree(path_to_delete)
-        
-        return {
-            "uuid": chat_uuid,
-            "status": "deleted",
-            "location": location,
-            "folder_id": folder_id
-        }
-    except HTTPException:
-        raise
+        location = await chat_store.delete_chat(chat_uuid)
+        return {"uuid": chat_uuid, "status": "deleted", **location}
+    except ChatNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error deleting chat history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -858,24 +863,9 @@ async def create_folder(request: CreateFolderRequest):
         dict: A dictionary with the created folder info
     """
     try:
-        folder_id = str(uuid.uuid4())
-        folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_id)
-        
-        # Create the folder
-        os.makedirs(folder_path, exist_ok=True)
-        
-        # Create folder index.json
-        folder_data = {
-            "folder_id": folder_id,
-            "name": request.name,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        with open(os.path.join(folder_path, "index.json"), "w", encoding="utf-8") as f:
-            json.dump(folder_data, f, ensure_ascii=False, indent=2)
-        
+        folder_data = await chat_store.create_folder(request.name)
         return {
-            "folder_id": folder_id,
+            "folder_id": folder_data["folder_id"],
             "name": request.name,
             "created_at": folder_data["created_at"],
             "status": "created"
@@ -894,68 +884,7 @@ async def list_folders():
         list: A list of folder objects
     """
     try:
-        result = []
-        
-        # List all folders
-        folder_dirs = [d for d in os.listdir(CHAT_FOLDERS_DIR) 
-                     if os.path.isdir(os.path.join(CHAT_FOLDERS_DIR, d))]
-        
-        for folder_id in folder_dirs:
-            folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_id)
-            index_path = os.path.join(folder_path, "index.json")
-            
-            # Read folder metadata
-            if os.path.exists(index_path):
-                try:
-                    with open(index_path, "r", encoding="utf-8") as f:
-                        folder_data = json.load(f)
-                        
-                    # Count chats in this folder
-                    chat_count = len([d for d in os.listdir(folder_path) 
-                                   if os.path.isdir(os.path.join(folder_path, d)) and d != "index.json"])
-                    
-                    result.append({
-                        "folder_id": folder_data.get("folder_id", folder_id),
-                        "name": folder_data.get("name", f"Folder {folder_id[:8]}"),
-                        "created_at": folder_data.get("created_at", ""),
-                        "chat_count": chat_count
-                    })
-                except Exception as e:
-                    logger.warning(f"Error reading folder metadata: {e}")
-                    # Add basic info for the folder
-                    result.append({
-                        "folder_id": folder_id,
-                        "name": f"Folder {folder_id[:8]}",
-                        "created_at": "",
-                        "chat_count": 0
-                    })
-            else:
-                # Folder exists but has no index.json
-                # Create a default index.json
-                folder_data = {
-                    "folder_id": folder_id,
-                    "name": f"Folder {folder_id[:8]}",
-                    "created_at": datetime.now().isoformat()
-                }
-                
-                with open(index_path, "w", encoding="utf-8") as f:
-                    json.dump(folder_data, f, ensure_ascii=False, indent=2)
-                
-                # Count chats in this folder
-                chat_count = len([d for d in os.listdir(folder_path) 
-                               if os.path.isdir(os.path.join(folder_path, d))])
-                
-                result.append({
-                    "folder_id": folder_id,
-                    "name": folder_data["name"],
-                    "created_at": folder_data["created_at"],
-                    "chat_count": chat_count
-                })
-        
-        # Sort by name
-        result.sort(key=lambda x: x.get("name", ""))
-        
-        return {"folders": result}
+        return {"folders": await chat_store.list_folders()}
     except Exception as e:
         logger.error(f"Error listing folders: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -974,37 +903,14 @@ async def update_folder(folder_id: str, request: CreateFolderRequest):
         dict: A dictionary with the updated folder info
     """
     try:
-        folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_id)
-        index_path = os.path.join(folder_path, "index.json")
-        
-        if not os.path.exists(folder_path):
-            raise HTTPException(status_code=404, detail=f"Folder with ID {folder_id} not found")
-        
-        # Read existing folder data
-        if os.path.exists(index_path):
-            with open(index_path, "r", encoding="utf-8") as f:
-                folder_data = json.load(f)
-        else:
-            folder_data = {
-                "folder_id": folder_id,
-                "created_at": datetime.now().isoformat()
-            }
-        
-        # Update folder name
-        folder_data["name"] = request.name
-        folder_data["updated_at"] = datetime.now().isoformat()
-        
-        # Save updated data
-        with open(index_path, "w", encoding="utf-8") as f:
-            json.dump(folder_data, f, ensure_ascii=False, indent=2)
-        
+        await chat_store.rename_folder(folder_id, request.name)
         return {
             "folder_id": folder_id,
             "name": request.name,
             "status": "updated"
         }
-    except HTTPException:
-        raise
+    except FolderNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating folder: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1024,209 +930,48 @@ async def delete_folder(folder_id: str, delete_chats: bool = False):
         dict: A dictionary with the status of the delete operation
     """
     try:
-        folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_id)
-        
-        if not os.path.exists(folder_path):
-            raise HTTPException(status_code=404, detail=f"Folder with ID {folder_id} not found")
-        
-        # Get all chat directories in this folder
-        chat_dirs = [d for d in os.listdir(folder_path) 
-                   if os.path.isdir(os.path.join(folder_path, d)) and d != "index.json"]
-        
-        if delete_chats:
-            # Delete all chats in the folder
-            for chat_uuid in chat_dirs:
-                chat_path = os.path.join(folder_path, chat_uuid)
-                if os.path.exists(chat_path):
-                    shutil.rmtree(chat_path)
-        else:
-            # Move all chats to global
-            for chat_uuid in chat_dirs:
-                source_path = os.path.join(folder_path, chat_uuid)
-                destination_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid)
-                
-                if os.path.exists(source_path):
-                    # Handle case where destination already exists
-                    if os.path.exists(destination_path):
-                        shutil.rmtree(destination_path)
-                    
-                    # Move chat to global
-                    shutil.copytree(source_path, destination_path)
-        
-        # Delete the folder
-        shutil.rmtree(folder_path)
-        
+        await chat_store.delete_folder(folder_id, delete_chats)
         return {
             "folder_id": folder_id,
             "status": "deleted",
             "chats_deleted": delete_chats,
             "chats_moved": not delete_chats
         }
-    except HTTPException:
-        raise
+    except FolderNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error deleting folder: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/chat/search")
-async def search_chats(query: str = "", folder_id: Optional[str] = None, filter_favorites: bool = False, filter_tags: Optional[List[str]] = None):
+async def search_chats(query: str = "", folder_id: Optional[str] = None, filter_favorites: bool = False, filter_tags: Optional[List[str]] = None, limit: Optional[int] = Query(None, ge=1, le=500), offset: int = Query(0, ge=0)):
     """
     Search through chat history.
     
+    Query words are matched as prefixes against chat titles and message text
+    (English and Arabic) and results are ranked by relevance.
+    
     Args:
         query: The search query string
         folder_id: Optional filter by folder ID ('global' for global chats)
         filter_favorites: Whether to filter for favorite chats only
         filter_tags: Optional list of tags to filter by
+        limit: Optional maximum number of results to return
+        offset: Number of results to skip (for pagination)
         
     Returns:
-        list: A list of chat history items matching the search criteria
+        list: A list of chat history items matching the search criteria, and the
+            offset of the next page (None when there are no more results)
     """
     try:
-        result = []
-        
-        # Determine which locations to search
-        search_global = folder_id is None or folder_id == "global"
-        search_folders = folder_id is None or (folder_id != "global" and folder_id is not None)
-        
-        # Search in global chats
-        if search_global:
-            global_chat_dirs = [d for d in os.listdir(CHAT_GLOBAL_DIR) 
-                              if os.path.isdir(os.path.join(CHAT_GLOBAL_DIR, d))]
-            
-            for chat_uuid in global_chat_dirs:
-                chat_file_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid, "chat.json")
-                
-                if not os.path.exists(chat_file_path):
-                    continue
-                    
-                try:
-                    with open(chat_file_path, "r", encoding="utf-8") as f:
-                        chat_data = json.load(f)
-                    
-                    # Apply filters
-                    if filter_favorites and not chat_data.get("args", {}).get("is_favorite", False):
-                        continue
-                        
-                    if filter_tags:
-                        chat_tags = chat_data.get("args", {}).get("tags", [])
-                        if not any(tag in chat_tags for tag in filter_tags):
-                            continue
-                    
-                    # Apply text search
-                    if query:
-                        title = chat_data.get("args", {}).get("title", "")
-                        # Simple text search in title
-                        if query.lower() not in title.lower():
-                            # Search in chat content (as a fallback)
-                            chat_content = json.dumps(chat_data.get("chat", {}))
-                            if query.lower() not in chat_content.lower():
-                                continue
-                    
-                    # Extract metadata for results                    
-                    chat_uuid = chat_data.get("args", {}).get("uuid", "")
-                    title = chat_data.get("args", {}).get("title", "")
-                    created_at = chat_data.get("args", {}).get("created_at", "")
-                    updated_at = chat_data.get("args", {}).get("updated_at", "")
-                    is_favorite = chat_data.get("args", {}).get("is_favorite", False)
-                    tags = chat_data.get("args", {}).get("tags", [])
-                    
-                    result.append({
-                        "uuid": chat_uuid,
-                        "title": title,
-                        "created_at": created_at,
-                        "updated_at": updated_at,
-                        "is_favorite": is_favorite,
-                        "tags": tags,
-                        "location": "global"
-                    })
-                except Exception as e:
-                    logger.warning(f"Error reading global chat file {chat_file_path}: {e}")
-                    continue
-        
-        # Search in folders
-        if search_folders:
-            # Determine which folders to search
-            if folder_id is not None and folder_id != "global":
-                folder_dirs = [folder_id] if os.path.isdir(os.path.join(CHAT_FOLDERS_DIR, folder_id)) else []
-            else:
-                folder_dirs = [d for d in os.listdir(CHAT_FOLDERS_DIR) 
-                             if os.path.isdir(os.path.join(CHAT_FOLDERS_DIR, d))]
-            
-            for folder_name in folder_dirs:
-                folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-                
-                # Get folder info
-                folder_info = {"name": folder_name, "folder_id": folder_name}
-                index_path = os.path.join(folder_path, "index.json")
-                if os.path.exists(index_path):
-                    try:
-                        with open(index_path, "r", encoding="utf-8") as f:
-                            folder_info = json.load(f)
-                    except Exception as e:
-                        logger.warning(f"Error reading folder metadata: {e}")
-                
-                # Search chats in this folder
-                chat_dirs = [d for d in os.listdir(folder_path) 
-                           if os.path.isdir(os.path.join(folder_path, d)) and d != "index.json"]
-                
-                for chat_uuid in chat_dirs:
-                    chat_file_path = os.path.join(folder_path, chat_uuid, "chat.json")
-                    
-                    if not os.path.exists(chat_file_path):
-                        continue
-                        
-                    try:
-                        with open(chat_file_path, "r", encoding="utf-8") as f:
-                            chat_data = json.load(f)
-                        
-                        # Apply filters
-                        if filter_favorites and not chat_data.get("args", {}).get("is_favorite", False):
-                            continue
-                            
-                        if filter_tags:
-                            chat_tags = chat_data.get("args", {}).get("tags", [])
-                            if not any(tag in chat_tags for tag in filter_tags):
-                                continue
-                        
-                        # Apply text search
-                        if query:
-                            title = chat_data.get("args", {}).get("title", "")
-                            # Simple text search in title
-                            if query.lower() not in title.lower():
-                                # Search in chat content (as a fallback)
-                                chat_content = json.dumps(chat_data.get("chat", {}))
-                                if query.lower() not in chat_content.lower():
-                                    continue
-                        
-                        # Extract metadata for results
-                        chat_uuid = chat_data.get("args", {}).get("uuid", "")
-                        title = chat_data.get("args", {}).get("title", "")
-                        created_at = chat_data.get("args", {}).get("created_at", "")
-                        updated_at = chat_data.get("args", {}).get("updated_at", "")
-                        is_favorite = chat_data.get("args", {}).get("is_favorite", False)
-                        tags = chat_data.get("args", {}).get("tags", [])
-                        
-                        result.append({
-                            "uuid": chat_uuid,
-                            "title": title,
-                            "created_at": created_at,
-                            "updated_at": updated_at,
-                            "is_favorite": is_favorite,
-                            "tags": tags,
-                            "location": "folder",
-                            "folder_id": folder_name,
-                            "folder_name": folder_info.get("name", folder_name)
-                        })
-                    except Exception as e:
-                        logger.warning(f"Error reading folder chat file {chat_file_path}: {e}")
-                        continue
-        
-        # Sort results by created_at or updated_at (newest first)
-        result.sort(key=lambda x: x.get("updated_at", x.get("created_at", "")), reverse=True)
-        
-        return {"results": result}
+        page_size = None if limit is None else limit + 1
+        results = await chat_store.search_chats(query, folder_id, filter_favorites, filter_tags, page_size, offset)
+        next_offset = None
+        if limit is not None and len(results) > limit:
+            results = results[:limit]
+            next_offset = offset + limit
+        return {"results": results, "next_offset": next_offset}
     except Exception as e:
         logger.error(f"Error searching chats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1251,34 +996,10 @@ async def bulk_delete_chats(request: BulkChatOperation):
         
         for chat_uuid in request.chat_uuids:
             try:
-                # Find the chat location (global or in a folder)
-                path_to_delete = None
-                
-                # Check global first
-                global_chat_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid)
-                if os.path.exists(global_chat_path):
-                    path_to_delete = global_chat_path
-                else:
-                    # Search in folders
-                    for folder_name in os.listdir(CHAT_FOLDERS_DIR):
-                        folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-                        
-                        if not os.path.isdir(folder_path):
-                            continue
-                            
-                        potential_path = os.path.join(folder_path, chat_uuid)
-                        
-                        if os.path.exists(potential_path):
-                            path_to_delete = potential_path
-                            break
-                
-                if not path_to_delete:
-                    results["failed"].append({"uuid": chat_uuid, "reason": "Chat not found"})
-                    continue
-                
-                # Delete the chat folder
-                shutil.rmtree(path_to_delete)
+                await chat_store.delete_chat(chat_uuid)
                 results["successful"].append(chat_uuid)
+            except ChatNotFoundError:
+                results["failed"].append({"uuid": chat_uuid, "reason": "Chat not found"})
             except Exception as e:
                 results["failed"].append({"uuid": chat_uuid, "reason": str(e)})
         
@@ -1301,20 +1022,14 @@ async def bulk_move_chats(destination: str, request: BulkChatOperation):
         dict: A dictionary with the status of the bulk move operation
     """
     try:
-        # If destination is not global, verify the folder exists
+        # If destination is not global, make sure the folder exists
         if destination != "global":
-            folder_path = os.path.join(CHAT_FOLDERS_DIR, destination)
-            if not os.path.exists(folder_path):
-                # Create the folder if it doesn't exist with a default index.json
-                os.makedirs(folder_path, exist_ok=True)
-                index_data = {
-                    "folder_id": destination,
-                    "name": f"Folder {destination[:8]}",
-                    "created_at": datetime.now().isoformat()
-                }
-                with open(os.path.join(folder_path, "index.json"), "w", encoding="utf-8") as f:
-                    json.dump(index_data, f, ensure_ascii=False, indent=2)
+            await chat_store.ensure_folder(destination)
         
+        destination_location = {
+            "location": "global" if destination == "global" else "folder",
+            "folder_id": None if destination == "global" else destination,
+        }
         results = {
             "successful": [],
             "failed": []
@@ -1322,68 +1037,23 @@ async def bulk_move_chats(destination: str, request: BulkChatOperation):
         
         for chat_uuid in request.chat_uuids:
             try:
-                # Find the chat location (global or in a folder)
-                source_path = None
-                source_location = None
-                source_folder_id = None
-                
-                # Check global first
-                global_chat_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid)
-                if os.path.exists(global_chat_path):
-                    source_path = global_chat_path
-                    source_location = "global"
-                else:
-                    # Search in folders
-                    for folder_name in os.listdir(CHAT_FOLDERS_DIR):
-                        folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-                        
-                        if not os.path.isdir(folder_path):
-                            continue
-                            
-                        potential_path = os.path.join(folder_path, chat_uuid)
-                        
-                        if os.path.exists(potential_path):
-                            source_path = potential_path
-                            source_location = "folder"
-                            source_folder_id = folder_name
-                            break
-                
-                if not source_path:
-                    results["failed"].append({"uuid": chat_uuid, "reason": "Chat not found"})
-                    continue
-                
-                # Determine destination path
-                if destination == "global":
-                    destination_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid)
-                else:
-                    destination_path = os.path.join(CHAT_FOLDERS_DIR, destination, chat_uuid)
-                
-                # Move the chat if it's not already at the destination
-                if os.path.normpath(source_path) != os.path.normpath(destination_path):
-                    # Make sure destination doesn't already exist
-                    if os.path.exists(destination_path):
-                        shutil.rmtree(destination_path)
-                    
-                    # Copy the chat folder to the destination
-                    shutil.copytree(source_path, destination_path)
-                    
-                    # Remove the source folder
-                    shutil.rmtree(source_path)
-                    
+                source = await chat_store.move_chat(chat_uuid, destination)
+                if source != destination_location:
                     results["successful"].append({
                         "uuid": chat_uuid,
-                        "from": {"location": source_location, "folder_id": source_folder_id},
-                        "to": {"location": "global" if destination == "global" else "folder", 
-                              "folder_id": None if destination == "global" else destination}
+                        "from": source,
+                        "to": destination_location,
                     })
                 else:
                     # Chat is already at the destination
                     results["successful"].append({
                         "uuid": chat_uuid,
-                        "from": {"location": source_location, "folder_id": source_folder_id},
-                        "to": {"location": source_location, "folder_id": source_folder_id},
+                        "from": source,
+                        "to": source,
                         "note": "Already at destination"
                     })
+            except ChatNotFoundError:
+                results["failed"].append({"uuid": chat_uuid, "reason": "Chat not found"})
             except Exception as e:
                 results["failed"].append({"uuid": chat_uuid, "reason": str(e)})
         
@@ -1413,44 +1083,10 @@ async def bulk_favorite_chats(favorite_status: bool, request: BulkChatOperation)
         
         for chat_uuid in request.chat_uuids:
             try:
-                # Find the chat location (global or in a folder)
-                chat_file_path = None
-                
-                # Check global first
-                global_chat_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid, "chat.json")
-                if os.path.exists(global_chat_path):
-                    chat_file_path = global_chat_path
-                else:
-                    # Search in folders
-                    for folder_name in os.listdir(CHAT_FOLDERS_DIR):
-                        folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-                        
-                        if not os.path.isdir(folder_path):
-                            continue
-                            
-                        potential_path = os.path.join(folder_path, chat_uuid, "chat.json")
-                        
-                        if os.path.exists(potential_path):
-                            chat_file_path = potential_path
-                            break
-                
-                if not chat_file_path:
-                    results["failed"].append({"uuid": chat_uuid, "reason": "Chat not found"})
-                    continue
-                
-                # Read existing data
-                with open(chat_file_path, "r", encoding="utf-8") as f:
-                    existing_data = json.load(f)
-                
-                # Update favorite status
-                existing_data["args"]["is_favorite"] = favorite_status
-                existing_data["args"]["updated_at"] = datetime.now().isoformat()
-                
-                # Save updated data back to file
-                with open(chat_file_path, "w", encoding="utf-8") as f:
-                    json.dump(existing_data, f, ensure_ascii=False, indent=2)
-                
+                await chat_store.set_favorite(chat_uuid, favorite_status)
                 results["successful"].append(chat_uuid)
+            except ChatNotFoundError:
+                results["failed"].append({"uuid": chat_uuid, "reason": "Chat not found"})
             except Exception as e:
                 results["failed"].append({"uuid": chat_uuid, "reason": str(e)})
         
@@ -1480,47 +1116,10 @@ async def bulk_tag_chats(tags: List[str], request: BulkChatOperation):
         
         for chat_uuid in request.chat_uuids:
             try:
-                # Find the chat location (global or in a folder)
-                chat_file_path = None
-                
-                # Check global first
-                global_chat_path = os.path.join(CHAT_GLOBAL_DIR, chat_uuid, "chat.json")
-                if os.path.exists(global_chat_path):
-                    chat_file_path = global_chat_path
-                else:
-                    # Search in folders
-                    for folder_name in os.listdir(CHAT_FOLDERS_DIR):
-                        folder_path = os.path.join(CHAT_FOLDERS_DIR, folder_name)
-                        
-                        if not os.path.isdir(folder_path):
-                            continue
-                            
-                        potential_path = os.path.join(folder_path, chat_uuid, "chat.json")
-                        
-                        if os.path.exists(potential_path):
-                            chat_file_path = potential_path
-                            break
-                
-                if not chat_file_path:
-                    results["failed"].append({"uuid": chat_uuid, "reason": "Chat not found"})
-                    continue
-                
-                # Read existing data
-                with open(chat_file_path, "r", encoding="utf-8") as f:
-                    chat_data = json.load(f)
-                
-                # Update tags (add new tags without duplicates)
-                existing_tags = chat_data.get("args", {}).get("tags", [])
-                updated_tags = list(set(existing_tags + tags))
-                
-                chat_data["args"]["tags"] = updated_tags
-                chat_data["args"]["updated_at"] = datetime.now().isoformat()
-                
-                # Save updated data
-                with open(chat_file_path, "w", encoding="utf-8") as f:
-                    json.dump(chat_data, f, ensure_ascii=False, indent=2)
-                
+                await chat_store.add_tags(chat_uuid, tags)
                 results["successful"].append(chat_uuid)
+            except ChatNotFoundError:
+                results["failed"].append({"uuid": chat_uuid, "reason": "Chat not found"})
             except Exception as e:
                 results["failed"].append({"uuid": chat_uuid, "reason": str(e)})
         
@@ -1528,5 +1127,3 @@ async def bulk_tag_chats(tags: List[str], request: BulkChatOperation):
     except Exception as e:
         logger.error(f"Error in bulk tag operation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-
-
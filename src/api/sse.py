@@ -0,0 +1,140 @@
+"""
+Server-sent event encoding for the chat stream.
+
+A workflow streams one event per LLM token, so the per-event work of the API
+adds up at high token rates. Events are encoded straight to SSE frames as bytes,
+with orjson when it is installed (it comes with langsmith) and the json module
+otherwise.
+
+With ``STREAM_BATCH_INTERVAL_MS`` set, consecutive message deltas are also
+coalesced into one event per interval (or per ``STREAM_BATCH_MAX_DELTAS``
+deltas), trading a little latency for far fewer frames and socket writes.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH_INTERVAL_MS = int(os.getenv("STREAM_BATCH_INTERVAL_MS", "0"))
+STREAM_BATCH_MAX_DELTAS = int(os.getenv("STREAM_BATCH_MAX_DELTAS", "32"))
+
+# Events buffered between the workflow and the batcher; bounds how far the
+# workflow runs ahead of a slow client
+BATCH_QUEUE_SIZE = 256
+
+_END = object()
+
+
+def encode_json(data: Any) -> bytes:
+    """UTF-8 JSON of ``data``, the same document ``json.dumps(data, ensure_ascii=False)`` gives."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # e.g. integers beyond 64 bits; json handles those or raises as before
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def sse_frame(event: str, data: Any) -> bytes:
+    """A complete SSE frame; the JSON has no raw newlines, so it is a single data line."""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + encode_json(data) + b"\n\n"
+
+
+def _delta_key(event: Dict[str, Any]) -> Optional[tuple]:
+    """What a message event can be merged with, or None when it cannot be merged."""
+    if event["event"] != "message":
+        return None
+    delta = event["data"].get("delta")
+    if not isinstance(delta, dict) or not all(isinstance(value, str) for value in delta.values()):
+        return None
+    return event["data"].get("message_id"), tuple(sorted(delta))
+
+
+def _merge(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if len(events) == 1:
+        return events[0]
+    delta = {key: "".join(event["data"]["delta"][key] for event in events) for key in events[0]["data"]["delta"]}
+    return {"event": "message", "data": {**events[0]["data"], "delta": delta}}
+
+
+async def batch_message_deltas(
+    events: AsyncIterator[Dict[str, Any]],
+    interval_ms: int = STREAM_BATCH_INTERVAL_MS,
+    max_deltas: int = STREAM_BATCH_MAX_DELTAS,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Coalesce consecutive deltas of a message into one event.
+
+    Buffered deltas are sent ``interval_ms`` after the first of them, after
+    ``max_deltas`` of them, or right before any other event, so the order of
+    events is kept. ``events`` is consumed by a task of its own, which lets the
+    interval fire while the model pauses between tokens.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=BATCH_QUEUE_SIZE)
+
+    async def produce() -> None:
+        try:
+            async for event in events:
+                await queue.put(event)
+            await queue.put(_END)
+        except Exception as e:
+            await queue.put(e)
+
+    producer = asyncio.create_task(produce())
+    interval = interval_ms / 1000
+    pending: List[Dict[str, Any]] = []
+    pending_key = None
+    deadline = 0.0
+    try:
+        while True:
+            if pending:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    yield _merge(pending)
+                    pending = []
+                    continue
+            else:
+                item = await queue.get()
+
+            if item is _END or isinstance(item, Exception):
+                if pending:
+                    yield _merge(pending)
+                if item is _END:
+                    return
+                raise item
+
+            key = _delta_key(item)
+            if pending and key != pending_key:
+                yield _merge(pending)
+                pending = []
+            if key is None:
+                yield item
+                continue
+            if not pending:
+                pending_key = key
+                deadline = time.monotonic() + interval
+            pending.append(item)
+            if len(pending) >= max_deltas:
+                yield _merge(pending)
+                pending = []
+    finally:
+        producer.cancel()
+        try:
+            await producer
+        except (asyncio.CancelledError, Exception):
+            pass
@@ -2,7 +2,7 @@ from src.config.team import TEAM_MEMBERS
 from enum import Enum
 
 # List of streaming LLM agents
-STREAMING_LLM_AGENTS = [*TEAM_MEMBERS, "planner", "coordinator"]
+STREAMING_LLM_AGENTS = frozenset([*TEAM_MEMBERS, "planner", "coordinator"])
 
 
 # Event type enumeration
@@ -13,4 +13,9 @@ class EventType(Enum):
     CHAT_MODEL_END = "on_chat_model_end"
     CHAT_MODEL_STREAM = "on_chat_model_stream"
     TOOL_START = "on_tool_start"
-    TOOL_END = "on_tool_end"
\ No newline at end of file
+    TOOL_END = "on_tool_end"
+    CUSTOM = "on_custom_event"
+
+
+# Custom events dispatched by graph nodes that are forwarded to the client as is
+CLIENT_CUSTOM_EVENTS = {"queue_status"}
\ No newline at end of file
@@ -1,9 +1,14 @@
 from dotenv import load_dotenv
 import os
-from langchain_openai import ChatOpenAI
-from openai import OpenAI
+import threading
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from src.config.llm_cache import LLM_CACHE_MODELS, CachedChatOpenAI, get_response_cache
+from openai import OpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient
+import httpx
 import json
 from pathlib import Path
+from typing import Dict, Optional
 
 load_dotenv()
 
@@ -20,102 +25,201 @@ def load_credentials():
 
 tokens = load_credentials()
 
-single_agent_llm = ChatOpenAI(
-    model=tokens["single_agent_llm"]["model"],
-    api_key=tokens["single_agent_llm"]["api_key"],
-    base_url=tokens["single_agent_llm"]["base_url"],
-    temperature=tokens["single_agent_llm"]["temperature"],
-)
-
-coordinator_llm = ChatOpenAI(
-    model=tokens["coordinator_llm"]["model"],
-    api_key=tokens["coordinator_llm"]["api_key"],
-    base_url=tokens["coordinator_llm"]["base_url"],
-    temperature=tokens["coordinator_llm"]["temperature"],
-)
-
-supervisor_llm = ChatOpenAI(
-    model=tokens["supervisor_llm"]["model"],
-    api_key=tokens["supervisor_llm"]["api_key"],
-    base_url=tokens["supervisor_llm"]["base_url"],
-    temperature=tokens["supervisor_llm"]["temperature"],
-)
-
-researcher_llm = ChatOpenAI(
-    model=tokens["researcher_llm"]["model"],
-    api_key=tokens["researcher_llm"]["api_key"],
-    base_url=tokens["researcher_llm"]["base_url"],
-    temperature=tokens["researcher_llm"]["temperature"],
-)
-
-coder_llm = ChatOpenAI(
-    model=tokens["coder_llm"]["model"],
-    api_key=tokens["coder_llm"]["api_key"],
-    base_url=tokens["coder_llm"]["base_url"],
-    temperature=tokens["coder_llm"]["temperature"],
-)
-
-browser_llm = ChatOpenAI(
-    model=tokens["browser_llm"]["model"],
-    api_key=tokens["browser_llm"]["api_key"],
-    base_url=tokens["browser_llm"]["base_url"],
-    temperature=tokens["browser_llm"]["temperature"],
-)
-
-reporter_llm = ChatOpenAI(
-    model=tokens["reporter_llm"]["model"],
-    api_key=tokens["reporter_llm"]["api_key"],
-    base_url=tokens["reporter_llm"]["base_url"],
-    temperature=tokens["reporter_llm"]["temperature"],
-)
-
-file_manager_llm = ChatOpenAI(
-    model=tokens["file_manager_llm"]["model"],
-    api_key=tokens["file_manager_llm"]["api_key"],
-    base_url=tokens["file_manager_llm"]["base_url"],
-    temperature=tokens["file_manager_llm"]["temperature"],
+# Connection pool settings shared by every LLM client, from the optional "http"
+# section of credentials.json
+DEFAULT_HTTP_SETTINGS = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 30.0,
+    "timeout": 600.0,
+    "connect_timeout": 10.0,
+}
+http_settings = {**DEFAULT_HTTP_SETTINGS, **tokens.get("http", {})}
+
+# One sync and one async HTTP client per base_url, so every LLM talking to the
+# same provider reuses its pooled keep-alive connections (and TLS sessions)
+_http_clients: Dict[str, httpx.Client] = {}
+_async_http_clients: Dict[str, httpx.AsyncClient] = {}
+_llms: Dict[str, ChatOpenAI] = {}
+_rate_limiters: Dict[str, InMemoryRateLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def _http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(http_settings["timeout"], connect=http_settings["connect_timeout"])
+
+
+def _http_client_options():
+    return {
+        "limits": httpx.Limits(
+            max_connections=http_settings["max_connections"],
+            max_keepalive_connections=http_settings["max_keepalive_connections"],
+            keepalive_expiry=http_settings["keepalive_expiry"],
+        ),
+        "timeout": _http_timeout(),
+    }
+
+
+def get_http_client(base_url: str) -> httpx.Client:
+    """Return the pooled sync HTTP client for a provider base URL."""
+    with _registry_lock:
+        client = _http_clients.get(base_url)
+        if client is None or client.is_closed:
+            client = _http_clients[base_url] = DefaultHttpxClient(**_http_client_options())
+        return client
+
+
+def get_async_http_client(base_url: str) -> httpx.AsyncClient:
+    """Return the pooled async HTTP client for a provider base URL."""
+    with _registry_lock:
+        client = _async_http_clients.get(base_url)
+        if client is None or client.is_closed:
+            client = _async_http_clients[base_url] = DefaultAsyncHttpxClient(**_http_client_options())
+        return client
+
+
+def get_rate_limiter(base_url: str) -> Optional[InMemoryRateLimiter]:
+    """Return the request rate limiter shared by every LLM of a provider base URL.
+
+    Limits come from the optional "rate_limits" section of credentials.json, keyed
+    by base URL: ``{"requests_per_second": 5, "max_bucket_size": 10}``.
+    """
+    limits = tokens.get("rate_limits", {}).get(base_url)
+    if not limits:
+        return None
+    with _registry_lock:
+        limiter = _rate_limiters.get(base_url)
+        if limiter is None:
+            limiter = _rate_limiters[base_url] = InMemoryRateLimiter(
+                requests_per_second=limits["requests_per_second"],
+                max_bucket_size=limits.get("max_bucket_size", 1),
+            )
+        return limiter
+
+
+def get_llm(name: str) -> ChatOpenAI:
+    """Return the chat model configured under ``name`` in credentials.json.
+
+    Models are created once and share the pooled HTTP clients and rate limiter
+    of their base URL. With LLM_CACHE on, the models in LLM_CACHE_MODELS answer
+    repeated requests from the response cache (see src/config/llm_cache.py).
+    """
+    llm = _llms.get(name)
+    if llm is None:
+        config = tokens[name]
+        options = {}
+        response_cache = get_response_cache() if name in LLM_CACHE_MODELS else None
+        # Only deterministic models can answer from the cache
+        if response_cache is not None and config["temperature"] == 0:
+            llm_class, options["response_cache"] = CachedChatOpenAI, response_cache
+        else:
+            llm_class = ChatOpenAI
+        llm = llm_class(
+            model=config["model"],
+            api_key=config["api_key"],
+            base_url=config["base_url"],
+            temperature=config["temperature"],
+            timeout=_http_timeout(),
+            http_client=get_http_client(config["base_url"]),
+            http_async_client=get_async_http_client(config["base_url"]),
+            rate_limiter=get_rate_limiter(config["base_url"]),
+            **options,
+        )
+        with _registry_lock:
+            llm = _llms.setdefault(name, llm)
+    return llm
+
+
+async def aclose_http_clients():
+    """Close every pooled HTTP client; call on application shutdown.
+
+    The models holding those clients are dropped too, so a later ``get_llm``
+    (e.g. after a reload in the same process) builds them with new clients.
+    """
+    global _computer_tool_llm, _embeddings
+    with _registry_lock:
+        clients = list(_http_clients.values())
+        async_clients = list(_async_http_clients.values())
+        _http_clients.clear()
+        _async_http_clients.clear()
+        _llms.clear()
+        _computer_tool_llm = None
+        _embeddings = None
+    # Compiled agents hold their model, and with it the closed clients
+    from src.agent.agents.agent_factory import clear_react_agents
+
+    clear_react_agents()
+    for client in clients:
+        client.close()
+    for async_client in async_clients:
+        await async_client.aclose()
+
+
+# Chat models importable from this module. They are built on first access (see
+# __getattr__), so importing the module does not construct a client for every agent.
+LLM_NAMES = (
+    "single_agent_llm",
+    "coordinator_llm",
+    "supervisor_llm",
+    "researcher_llm",
+    "coder_llm",
+    "browser_llm",
+    "reporter_llm",
+    "file_manager_llm",
+    "computer_llm",
+    "browser_tool_llm",
+    "deep_researcher_llm",
 )
 
-computer_llm = ChatOpenAI(
-    model=tokens["computer_llm"]["model"],
-    api_key=tokens["computer_llm"]["api_key"],
-    base_url=tokens["computer_llm"]["base_url"],
-    temperature=tokens["computer_llm"]["temperature"],
-)
+_computer_tool_llm = None
 
-browser_tool_llm = ChatOpenAI(
-    model=tokens["browser_tool_llm"]["model"],
-    api_key=tokens["browser_tool_llm"]["api_key"],
-    base_url=tokens["browser_tool_llm"]["base_url"],
-    temperature=tokens["browser_tool_llm"]["temperature"],
-)
 
-deep_researcher_llm = ChatOpenAI(
-    model=tokens["deep_researcher_llm"]["model"],
-    api_key=tokens["deep_researcher_llm"]["api_key"],
-    base_url=tokens["deep_researcher_llm"]["base_url"],
-    temperature=tokens["deep_researcher_llm"]["temperature"],
-)
+def get_computer_tool_llm() -> OpenAI:
+    global _computer_tool_llm
+    if _computer_tool_llm is None:
+        config = tokens["computer_tool_llm"]
+        _computer_tool_llm = OpenAI(
+            base_url=config["base_url"],
+            api_key=config["api_key"],
+            http_client=get_http_client(config["base_url"]),
+        )
+    return _computer_tool_llm
+
+
+def __getattr__(name: str):
+    if name in LLM_NAMES:
+        return get_llm(name)
+    if name == "computer_tool_llm":
+        return get_computer_tool_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_embeddings = None
+
+
+def get_embeddings() -> Optional[OpenAIEmbeddings]:
+    """Embedding model of the optional "embedding_llm" section of credentials.json."""
+    global _embeddings
+    config = tokens.get("embedding_llm")
+    if not config or not config.get("api_key"):
+        return None
+    if _embeddings is None:
+        _embeddings = OpenAIEmbeddings(
+            model=config["model"],
+            api_key=config["api_key"],
+            base_url=config["base_url"],
+            http_client=get_http_client(config["base_url"]),
+            http_async_client=get_async_http_client(config["base_url"]),
+            # Send text as is; token-based chunking needs tiktoken's downloaded encodings
+            check_embedding_ctx_length=False,
+        )
+    return _embeddings
 
-computer_tool_llm = OpenAI(
-    base_url=tokens["computer_tool_llm"]["base_url"],
-    api_key=tokens["computer_tool_llm"]["api_key"],
-)
 
 def planner_llm(deep_thinking_mode: bool = False):
     if deep_thinking_mode:
-        return ChatOpenAI(
-            model=tokens["planner_deepthinking_llm"]["model"],
-            api_key=tokens["planner_deepthinking_llm"]["api_key"],
-            base_url=tokens["planner_deepthinking_llm"]["base_url"],
-            temperature=tokens["planner_deepthinking_llm"]["temperature"],
-        )
+        return get_llm("planner_deepthinking_llm")
     else:
-        return ChatOpenAI(
-            model=tokens["planner_llm"]["model"],
-            api_key=tokens["planner_llm"]["api_key"],
-            base_url=tokens["planner_llm"]["base_url"],
-            temperature=tokens["planner_llm"]["temperature"],
-        )
-    
+        return get_llm("planner_llm")
+
 crewai_tools_config = None
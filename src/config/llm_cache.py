@@ -0,0 +1,444 @@
+"""
+Opt-in response cache for deterministic (temperature 0) LLM calls.
+
+The coordinator, supervisor and planner often get the same input again when a
+conversation is replayed, retried or the client reconnects. With ``LLM_CACHE``
+set to ``memory`` or ``sqlite``, the models named in ``LLM_CACHE_MODELS`` are
+created as :class:`CachedChatOpenAI`, which answers repeated requests from the
+cache, both for ``invoke`` and ``stream``. Cached answers are streamed back in
+chunks, so SSE clients see the same events as for a live response.
+
+Requests are keyed on the model, its base URL and temperature, the normalized
+messages (message ids and the ``CURRENT_TIME`` prompt footer left out), stop
+words and bound tools. Entries expire after ``LLM_CACHE_TTL`` seconds and at most
+``LLM_CACHE_MAX_ENTRIES`` are kept, least recently used first out.
+
+A call bypasses the cache with ``llm.invoke(messages, bypass_cache=True)``, or
+every call in a block (e.g. one API request) does inside ``bypass_llm_cache()``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables.config import run_in_executor
+from langchain_openai import ChatOpenAI
+from pydantic import Field
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE = os.getenv("LLM_CACHE", "off").lower()
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "history/llm_cache.db")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+LLM_CACHE_MODELS = tuple(
+    name.strip()
+    for name in os.getenv(
+        "LLM_CACHE_MODELS", "coordinator_llm,supervisor_llm,planner_llm,planner_deepthinking_llm"
+    ).split(",")
+    if name.strip()
+)
+
+# Characters per chunk when a cached response is streamed back
+REPLAY_CHUNK_CHARS = 16
+
+_CURRENT_TIME = re.compile(r"CURRENT_TIME: [^\n]*")
+
+_bypass: ContextVar[bool] = ContextVar("bypass_llm_cache", default=False)
+
+
+@contextmanager
+def bypass_llm_cache(bypass: bool = True) -> Iterator[None]:
+    """Skip the response cache for every LLM call made inside the block."""
+    token = _bypass.set(bypass)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        lookups = self.hits + self.misses
+        stats["hit_rate"] = round(self.hits / lookups, 4) if lookups else 0.0
+        return stats
+
+
+class ResponseCache(ABC):
+    """Storage for cached responses, keyed by request hash."""
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl: float = LLM_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self.stats, stat, getattr(self.stats, stat) + amount)
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached response of ``key``, or None when missing or expired."""
+
+    @abstractmethod
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Cache the response of ``key``."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every cached response."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU cache."""
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl: float = LLM_CACHE_TTL):
+        super().__init__(max_entries, ttl)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        self._count("hits" if entry is not None else "misses")
+        return entry[1] if entry is not None else None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self._count("writes")
+        self._count("evictions", evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """LRU cache in a local SQLite file, shared by processes and kept across restarts."""
+
+    def __init__(self, db_path: str = LLM_CACHE_DB, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 ttl: float = LLM_CACHE_TTL):
+        super().__init__(max_entries, ttl)
+        self.db_path = db_path
+        self._local = threading.local()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used);
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value FROM llm_cache WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+        ).fetchone()
+        if row is not None:
+            conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+        self._count("hits" if row is not None else "misses")
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False, separators=(",", ":")), now, now),
+            )
+            # Expired entries first, then the least recently used ones over the limit
+            evicted = conn.execute("DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl,)).rowcount
+            evicted += conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._count("writes")
+        self._count("evictions", evicted)
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM llm_cache")
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The process wide response cache selected by LLM_CACHE, or None when it is off."""
+    global _response_cache
+    if LLM_CACHE == "off":
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                if LLM_CACHE == "memory":
+                    _response_cache = MemoryResponseCache()
+                elif LLM_CACHE == "sqlite":
+                    _response_cache = SQLiteResponseCache()
+                else:
+                    raise ValueError(f"Unknown LLM_CACHE: {LLM_CACHE}")
+    return _response_cache
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters and size of the response cache."""
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "backend": LLM_CACHE, "entries": len(cache), **cache.stats.as_dict()}
+
+
+# Request keys
+
+def _normalize_content(content: Any) -> Any:
+    if isinstance(content, str):
+        return _CURRENT_TIME.sub("", content).strip()
+    if isinstance(content, list):
+        return [_normalize_content(part) for part in content]
+    if isinstance(content, dict):
+        return {key: _normalize_content(value) for key, value in content.items()}
+    return content
+
+
+def normalize_message(message: BaseMessage) -> Dict[str, Any]:
+    """The parts of a message that affect the model's answer."""
+    normalized = {"type": message.type, "content": _normalize_content(message.content)}
+    if message.name:
+        normalized["name"] = message.name
+    # Tool call ids are random per run; names and arguments are what matters
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        normalized["tool_calls"] = [{"name": call["name"], "args": call["args"]} for call in tool_calls]
+    return normalized
+
+
+def request_key(llm: ChatOpenAI, messages: List[BaseMessage], stop: Optional[List[str]],
+                kwargs: Dict[str, Any]) -> str:
+    request = {
+        "model": llm.model_name,
+        "base_url": llm.openai_api_base,
+        "temperature": llm.temperature,
+        "messages": [normalize_message(message) for message in messages],
+        "stop": stop,
+        # Bound tools, tool_choice, response_format, ...
+        "kwargs": kwargs,
+    }
+    encoded = json.dumps(request, sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _replay_chunks(message: AIMessage) -> Iterator[ChatGenerationChunk]:
+    """Split a cached response into stream chunks like the ones of a live response."""
+    content = message.content if isinstance(message.content, str) else ""
+    pieces = [content[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(content), REPLAY_CHUNK_CHARS)] or [""]
+    for index, piece in enumerate(pieces):
+        last = index == len(pieces) - 1
+        chunk = AIMessageChunk(content=piece)
+        if last:
+            chunk = AIMessageChunk(
+                content=piece,
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                    for i, call in enumerate(message.tool_calls)
+                ],
+                response_metadata=message.response_metadata,
+                usage_metadata=message.usage_metadata,
+            )
+        yield ChatGenerationChunk(message=chunk)
+
+
+class CachedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI that answers repeated deterministic requests from a ResponseCache."""
+
+    response_cache: Optional[Any] = Field(default=None, exclude=True)
+
+    def _cache_lookup(self, messages: List[BaseMessage], stop: Optional[List[str]],
+                      kwargs: Dict[str, Any]) -> Tuple[Optional[str], Optional[AIMessage]]:
+        """Key and cached answer of a request; pops the per-call bypass flag from ``kwargs``."""
+        bypass = kwargs.pop("bypass_cache", False) or _bypass.get()
+        if self.response_cache is None or bypass:
+            return None, None
+        key = request_key(self, messages, stop, kwargs)
+        try:
+            cached = self.response_cache.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None, None
+        if cached is None:
+            return key, None
+        message = messages_from_dict([cached["message"]])[0]
+        message.response_metadata = {**message.response_metadata, "cached": True}
+        return key, message
+
+    def _cache_store(self, key: Optional[str], message: BaseMessage) -> None:
+        if key is None:
+            return
+        # Stored without its id, so every replay gets a fresh one like a live response
+        message = AIMessage(
+            content=message.content,
+            tool_calls=getattr(message, "tool_calls", []),
+            response_metadata=message.response_metadata,
+            usage_metadata=getattr(message, "usage_metadata", None),
+        )
+        try:
+            self.response_cache.put(key, {"message": message_to_dict(message)})
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    async def _acache_lookup(self, messages: List[BaseMessage], stop: Optional[List[str]],
+                             kwargs: Dict[str, Any]) -> Tuple[Optional[str], Optional[AIMessage]]:
+        # SQLite may wait on a lock for seconds; keep that off the event loop. The
+        # executor call sees this context, so the bypass flag still applies
+        return await run_in_executor(None, self._cache_lookup, messages, stop, kwargs)
+
+    async def _acache_store(self, key: Optional[str], message: BaseMessage) -> None:
+        if key is not None:
+            await run_in_executor(None, self._cache_store, key, message)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key, cached = self._cache_lookup(messages, stop, kwargs)
+        if cached is not None:
+            return ChatResult(generations=[ChatGeneration(message=cached)])
+        result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        if len(result.generations) == 1:
+            self._cache_store(key, result.generations[0].message)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key, cached = await self._acache_lookup(messages, stop, kwargs)
+        if cached is not None:
+            return ChatResult(generations=[ChatGeneration(message=cached)])
+        result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        if len(result.generations) == 1:
+            await self._acache_store(key, result.generations[0].message)
+        return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        key, cached = self._cache_lookup(messages, stop, kwargs)
+        if cached is not None:
+            for chunk in _replay_chunks(cached):
+                # Like ChatOpenAI, report tokens when given a run manager
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        message = None
+        for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            message = chunk.message if message is None else message + chunk.message
+            yield chunk
+        if message is not None:
+            self._cache_store(key, message)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        key, cached = await self._acache_lookup(messages, stop, kwargs)
+        if cached is not None:
+            for chunk in _replay_chunks(cached):
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        message = None
+        async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            message = chunk.message if message is None else message + chunk.message
+            yield chunk
+        if message is not None:
+            await self._acache_store(key, message)
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model answering with a fixed message, streamed like a live response.
+
+    Used where a stored answer replaces an LLM call, so streaming clients still
+    get the usual model events.
+    """
+
+    message: AIMessage
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self.message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        for chunk in _replay_chunks(self.message):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        for chunk in _replay_chunks(self.message):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
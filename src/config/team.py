@@ -1,3 +1,4 @@
+# context_budget: tokens of message history sent to the agent, see src/agent/context.py
 TEAM_MEMBER_CONFIGRATIONS = {
     "researcher": {
         "name": "researcher",
@@ -9,6 +10,7 @@ TEAM_MEMBER_CONFIGRATIONS = {
             "Outputs a Markdown report summarizing findings. Researcher can not do math or programming."
         ),
         "is_optional": False,
+        "context_budget": 48000,
     },
     "coder": {
         "name": "coder",
@@ -20,6 +22,7 @@ TEAM_MEMBER_CONFIGRATIONS = {
             "Must be used for all mathematical computations."
         ),
         "is_optional": True,
+        "context_budget": 32000,
     },
     "browser": {
         "name": "browser",
@@ -29,6 +32,7 @@ TEAM_MEMBER_CONFIGRATIONS = {
             "You can also leverage `browser` to perform in-domain search, like Facebook, Instgram, Github, etc."
         ),
         "is_optional": True,
+        "context_budget": 32000,
     },
     "file_manager": {
         "name": "file_manager",
@@ -39,6 +43,7 @@ TEAM_MEMBER_CONFIGRATIONS = {
             "Use this for any task involving file manipulation or data storage."
         ),
         "is_optional": True,
+        "context_budget": 32000,
     },
     "computer": {
         "name": "computer",
@@ -52,6 +57,7 @@ TEAM_MEMBER_CONFIGRATIONS = {
             "with specific paths, actions, and handling of potential error states."
         ),
         "is_optional": True,
+        "context_budget": 32000,
     },
     "reporter": {
         "name": "reporter",
@@ -60,6 +66,7 @@ TEAM_MEMBER_CONFIGRATIONS = {
         ),
         "desc_for_llm": "Write a professional report based on the result of each step.",
         "is_optional": False,
+        "context_budget": 96000,
     },
 }
 
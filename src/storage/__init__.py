@@ -0,0 +1,19 @@
+from src.storage.async_store import AsyncChatHistoryStore
+from src.storage.blobs import BlobNotFoundError, BlobStore, get_blob_store
+from src.storage.chat_history import (
+    ChatHistoryStore,
+    ChatNotFoundError,
+    FolderNotFoundError,
+    get_chat_history_store,
+)
+
+__all__ = [
+    "AsyncChatHistoryStore",
+    "BlobNotFoundError",
+    "BlobStore",
+    "ChatHistoryStore",
+    "ChatNotFoundError",
+    "FolderNotFoundError",
+    "get_blob_store",
+    "get_chat_history_store",
+]
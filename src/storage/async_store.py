@@ -0,0 +1,55 @@
+"""
+Async facade over a chat history store.
+
+Store backends are synchronous (sqlite3, file I/O). Calling them straight from an
+``async def`` endpoint blocks the event loop and stalls every in-flight SSE stream,
+so the API goes through this wrapper, which runs each call on a small dedicated
+thread pool. The pool size bounds how many storage operations run at once and
+keeps them off the default executor used by the agent workflow.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from src.storage.chat_history import ChatHistoryStore
+
+T = TypeVar("T")
+
+CHAT_HISTORY_IO_WORKERS = int(os.getenv("CHAT_HISTORY_IO_WORKERS", "4"))
+
+
+class AsyncChatHistoryStore:
+    """Exposes every ``ChatHistoryStore`` method as a coroutine.
+
+    ``await async_store.get_chat(uuid)`` runs ``store.get_chat(uuid)`` on the I/O
+    pool and returns its result (or raises its exception).
+    """
+
+    def __init__(self, store: ChatHistoryStore, max_workers: int = CHAT_HISTORY_IO_WORKERS):
+        self.store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="chat-history-io"
+        )
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking callable on the I/O pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.store, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self.run(attr, *args, **kwargs)
+
+        return call
+
+    def shutdown(self) -> None:
+        """Wait for pending operations and stop the I/O threads."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,82 @@
+"""
+Crash-safe and concurrency-safe primitives for file based storage.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+def dumps_compact(data: Any) -> str:
+    """Serialize JSON without indentation or padding whitespace."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _fsync_dir(directory: str) -> None:
+    # Persist the rename itself; directories cannot be opened for fsync on Windows
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    """Replace ``path`` with ``data`` so readers see either the old or the new file.
+
+    The data is written to a temporary file in the same directory, fsynced, then
+    renamed over the target. A crash mid-write leaves the previous file intact.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(directory)
+
+
+def atomic_write_text(path: str, text: str) -> None:
+    """Atomically write ``text`` as UTF-8."""
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path: str, data: Any) -> None:
+    """Atomically write ``data`` as compact JSON."""
+    atomic_write_text(path, dumps_compact(data))
+
+
+class KeyedLock:
+    """One re-entrant lock per key (e.g. per chat UUID).
+
+    Locks are created on demand and dropped once nobody holds a reference, so the
+    table does not grow with the number of chats ever touched.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()
+
+    @contextmanager
+    def __call__(self, key: str) -> Iterator[None]:
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = threading.RLock()
+                self._locks[key] = lock
+        with lock:
+            yield
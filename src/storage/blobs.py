@@ -0,0 +1,231 @@
+"""
+Content-addressed store for images and files embedded in chat messages.
+
+Clients send attachments as base64 ``data:`` URLs. Kept verbatim, every chat record
+and every SSE replay carries the full base64 payload, once per copy. Instead the
+decoded bytes are written once to ``<root>/<aa>/<sha256>`` (``aa`` being the first
+two hex digits) and messages keep a short reference, ``/api/blobs/<sha256>``, that
+the API serves. Identical attachments share one file.
+
+Blobs are never deleted, not even when the last chat referencing them is: chats,
+their copies and graph checkpoints may all hold references, so the store only
+grows. Prune ``BLOB_STORE_DIR`` by hand (e.g. files not accessed for months) if
+its size matters; a pruned blob is served as 404 and left as a reference in
+messages sent to a model.
+"""
+
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+from typing import Any, Callable, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.storage.atomic import atomic_write_bytes, atomic_write_text
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "history/blobs")
+# Data URLs smaller than this stay inline, a reference would not save anything
+BLOB_MIN_BYTES = int(os.getenv("BLOB_MIN_BYTES", "1024"))
+BLOB_URL_PREFIX = "/api/blobs/"
+
+_DATA_URL = re.compile(r"data:([^;,]*)(?:;[^;,]*)*;base64,", re.IGNORECASE)
+# A reference, either as stored or made absolute for a client
+_BLOB_REF = re.compile(r"(?:^|/)api/blobs/([0-9a-f]{64})")
+_BLOB_HASH = re.compile(r"[0-9a-f]{64}")
+_MAX_REF_LENGTH = 2048
+
+
+class BlobNotFoundError(LookupError):
+    """Raised when a blob hash does not exist in the store."""
+
+    def __init__(self, blob_hash: str):
+        super().__init__(f"Blob {blob_hash} not found")
+        self.blob_hash = blob_hash
+
+
+def blob_ref(blob_hash: str) -> str:
+    """Reference stored in messages in place of the blob's data URL."""
+    return BLOB_URL_PREFIX + blob_hash
+
+
+def parse_blob_ref(value: str) -> Optional[str]:
+    """Return the hash a blob reference points to, or None for any other string."""
+    if len(value) > _MAX_REF_LENGTH:
+        return None
+    match = _BLOB_REF.search(value)
+    if match is None or match.end() != len(value):
+        return None
+    return match.group(1)
+
+
+# Content part type -> fields of the part holding an attachment URL. Covers the
+# OpenAI message format ({"type": "image_url", "image_url": {"url": ...}}) and the
+# flat content items clients send ({"type": "input_file", "file_data": ...}).
+_ATTACHMENT_FIELDS = {
+    "image_url": (("image_url", "url"), ("image_url",)),
+    "file": (("file", "file_data"), ("file", "file_url")),
+    "input_file": (("file_data",), ("file_url",)),
+}
+
+
+def _map_field(part: dict, path: Tuple[str, ...], func: Callable[[str], str]) -> None:
+    """Replace the string at ``path`` inside ``part`` (a copy) with ``func`` of it."""
+    parent = part
+    for key in path[:-1]:
+        child = parent.get(key)
+        if not isinstance(child, dict):
+            return
+        parent[key] = child = dict(child)
+        parent = child
+    value = parent.get(path[-1])
+    if isinstance(value, str):
+        parent[path[-1]] = func(value)
+
+
+def map_attachment_urls(value: Any, func: Callable[[str], str]) -> Any:
+    """Copy a JSON-like value, passing the attachment URLs of its content parts through ``func``.
+
+    Only the URL fields of image and file parts are touched; message text that
+    happens to look like a data URL or a blob reference is left alone.
+    """
+    if isinstance(value, list):
+        return [map_attachment_urls(item, func) for item in value]
+    if not isinstance(value, dict):
+        return value
+    result = {key: map_attachment_urls(item, func) for key, item in value.items()}
+    for path in _ATTACHMENT_FIELDS.get(result.get("type"), ()):
+        _map_field(result, path, func)
+    return result
+
+
+def absolute_blob_urls(value: Any, base_url: str) -> Any:
+    """Turn the blob references in ``value`` into absolute URLs on ``base_url``.
+
+    Browsers can then use them directly as ``<img src>`` or download links.
+    """
+    base_url = base_url.rstrip("/")
+
+    def absolute(text: str) -> str:
+        if text.startswith(BLOB_URL_PREFIX) and parse_blob_ref(text):
+            return base_url + text
+        return text
+
+    return map_attachment_urls(value, absolute)
+
+
+class BlobStore:
+    """Immutable blobs keyed by the sha256 of their content."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, blob_hash: str) -> str:
+        """Location of a blob on disk; raises BlobNotFoundError for malformed hashes."""
+        if not _BLOB_HASH.fullmatch(blob_hash):
+            raise BlobNotFoundError(blob_hash)
+        return os.path.join(self.root, blob_hash[:2], blob_hash)
+
+    def exists(self, blob_hash: str) -> bool:
+        try:
+            return os.path.exists(self.path(blob_hash))
+        except BlobNotFoundError:
+            return False
+
+    def put(self, data: bytes, media_type: str = "application/octet-stream") -> str:
+        """Store ``data`` (once) and return its hash."""
+        blob_hash = hashlib.sha256(data).hexdigest()
+        path = self.path(blob_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # The media type is written first, so a visible blob always has one
+            atomic_write_text(path + ".type", media_type)
+            atomic_write_bytes(path, data)
+        return blob_hash
+
+    def read(self, blob_hash: str) -> bytes:
+        try:
+            with open(self.path(blob_hash), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise BlobNotFoundError(blob_hash) from None
+
+    def media_type(self, blob_hash: str) -> str:
+        try:
+            with open(self.path(blob_hash) + ".type", "r", encoding="utf-8") as f:
+                return f.read().strip() or "application/octet-stream"
+        except FileNotFoundError:
+            return "application/octet-stream"
+
+    def data_url(self, blob_hash: str) -> str:
+        """Rebuild the data URL a blob was stored from."""
+        data = base64.b64encode(self.read(blob_hash)).decode("ascii")
+        return f"data:{self.media_type(blob_hash)};base64,{data}"
+
+    def put_data_url(self, url: str) -> Optional[str]:
+        """Store a base64 data URL and return its reference.
+
+        Returns None, storing nothing, for strings that are not base64 data URLs or
+        are below ``BLOB_MIN_BYTES``.
+        """
+        if len(url) < BLOB_MIN_BYTES:
+            return None
+        match = _DATA_URL.match(url)
+        if match is None:
+            return None
+        try:
+            data = base64.b64decode(url[match.end():], validate=True)
+        except (binascii.Error, ValueError):
+            return None
+        return blob_ref(self.put(data, match.group(1) or "application/octet-stream"))
+
+    def externalize(self, value: Any) -> Any:
+        """Copy of ``value`` with large attachment data URLs replaced by blob references.
+
+        Absolute blob URLs handed out to clients are stored as plain references again.
+        """
+
+        def externalize_string(text: str) -> str:
+            if text.startswith("data:"):
+                return self.put_data_url(text) or text
+            blob_hash = parse_blob_ref(text)
+            return text if blob_hash is None else blob_ref(blob_hash)
+
+        return map_attachment_urls(value, externalize_string)
+
+    def resolve(self, value: Any) -> Any:
+        """Copy of ``value`` with attachment blob references expanded back into data URLs.
+
+        Used before messages are handed to a model, which cannot fetch our URLs.
+        References to missing blobs are left as they are.
+        """
+
+        def resolve_string(text: str) -> str:
+            blob_hash = parse_blob_ref(text)
+            if blob_hash is None:
+                return text
+            try:
+                return self.data_url(blob_hash)
+            except BlobNotFoundError:
+                logger.warning(f"Message references missing blob {blob_hash}")
+                return text
+
+        return map_attachment_urls(value, resolve_string)
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Return the process wide blob store, creating it on first use."""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore(BLOB_STORE_DIR)
+    return _blob_store
@@ -0,0 +1,216 @@
+"""
+Chat history storage backends.
+
+The API talks to a ``ChatHistoryStore``; the concrete backend is selected with the
+``CHAT_HISTORY_BACKEND`` environment variable ("sqlite" by default, or "file" for the
+legacy one-directory-per-chat layout).
+"""
+
+import base64
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CHAT_HISTORY_DIR = os.getenv("CHAT_HISTORY_DIR", "history/chat_history")
+CHAT_FOLDERS_DIR = os.path.join(CHAT_HISTORY_DIR, "folders")
+CHAT_GLOBAL_DIR = os.path.join(CHAT_HISTORY_DIR, "global")
+CHAT_HISTORY_BACKEND = os.getenv("CHAT_HISTORY_BACKEND", "sqlite")
+CHAT_HISTORY_DB = os.getenv("CHAT_HISTORY_DB", os.path.join(CHAT_HISTORY_DIR, "chat_history.db"))
+# Appended messages are folded back into the chat once its log grows past this size
+CHAT_LOG_COMPACT_BYTES = int(os.getenv("CHAT_LOG_COMPACT_BYTES", str(4 * 1024 * 1024)))
+
+# Columns chat listings can be ordered by (always newest first, ties broken by uuid)
+SORT_FIELDS = ("updated_at", "created_at")
+
+
+class ChatNotFoundError(LookupError):
+    """Raised when a chat UUID does not exist in the store."""
+
+    def __init__(self, chat_uuid: str):
+        super().__init__(f"Chat with UUID {chat_uuid} not found")
+        self.chat_uuid = chat_uuid
+
+
+class FolderNotFoundError(LookupError):
+    """Raised when a folder ID does not exist in the store."""
+
+    def __init__(self, folder_id: str):
+        super().__init__(f"Folder with ID {folder_id} not found")
+        self.folder_id = folder_id
+
+
+def now_iso() -> str:
+    """Timestamp format used for every chat and folder record."""
+    return datetime.now().isoformat()
+
+
+def default_folder_name(folder_id: str) -> str:
+    """Name given to folders that are created implicitly (e.g. by a move)."""
+    return f"Folder {folder_id[:8]}"
+
+
+def encode_cursor(sort_value: str, chat_uuid: str) -> str:
+    """Opaque pagination cursor pointing just after the given chat."""
+    raw = json.dumps([sort_value, chat_uuid], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of ``encode_cursor``; raises ValueError for malformed cursors."""
+    try:
+        sort_value, chat_uuid = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(sort_value, str) or not isinstance(chat_uuid, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return sort_value, chat_uuid
+
+
+def location_of(folder_id: Optional[str]) -> Dict[str, Any]:
+    """Describe where a chat lives, in the shape the API returns."""
+    if folder_id is None:
+        return {"location": "global", "folder_id": None}
+    return {"location": "folder", "folder_id": folder_id}
+
+
+class ChatHistoryStore(ABC):
+    """Interface shared by all chat history backends.
+
+    Chats are either global (``folder_id`` is None) or belong to exactly one folder.
+    Every chat carries an ``args`` metadata dict (title, uuid, timestamps, model,
+    is_favorite, tags and any client supplied keys) and a list of messages.
+    """
+
+    @abstractmethod
+    def save_chat(
+        self,
+        title: str,
+        messages: List[Dict[str, Any]],
+        args: Optional[Dict[str, Any]] = None,
+        folder_id: Optional[str] = None,
+    ) -> str:
+        """Create a new chat and return its UUID."""
+
+    @abstractmethod
+    def list_chats(
+        self,
+        folder_id: Optional[str] = None,
+        sort_by: str = "updated_at",
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """List chat metadata, newest first.
+
+        Args:
+            folder_id: None for all chats, "global" for global chats only,
+                otherwise the ID of a single folder.
+            sort_by: One of ``SORT_FIELDS``.
+            limit: Maximum number of chats to return (all when None).
+            after: ``(sort value, uuid)`` of the last chat of the previous page;
+                only chats that sort strictly after it are returned.
+        """
+
+    @abstractmethod
+    def get_chat(self, chat_uuid: str) -> Dict[str, Any]:
+        """Return the full chat (args, messages and location info)."""
+
+    @abstractmethod
+    def update_chat(
+        self,
+        chat_uuid: str,
+        title: Optional[str] = None,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        args: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Update a chat in place and return its location."""
+
+    @abstractmethod
+    def append_messages(self, chat_uuid: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Append messages to the end of a chat and return its location.
+
+        Only the new messages are written (to a per-chat append log that is compacted
+        from time to time), so saving a turn costs O(new messages) rather than
+        O(conversation).
+        """
+
+    @abstractmethod
+    def set_favorite(self, chat_uuid: str, favorite_status: bool) -> Dict[str, Any]:
+        """Set the favorite flag of a chat and return its location."""
+
+    @abstractmethod
+    def add_tags(self, chat_uuid: str, tags: List[str]) -> List[str]:
+        """Add tags to a chat (without duplicates) and return the new tag list."""
+
+    @abstractmethod
+    def move_chat(self, chat_uuid: str, destination: str) -> Dict[str, Any]:
+        """Move a chat to "global" or a folder ID and return its previous location."""
+
+    @abstractmethod
+    def delete_chat(self, chat_uuid: str) -> Dict[str, Any]:
+        """Delete a chat and return the location it was deleted from."""
+
+    @abstractmethod
+    def search_chats(
+        self,
+        query: str = "",
+        folder_id: Optional[str] = None,
+        filter_favorites: bool = False,
+        filter_tags: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Search chats by title/content with optional metadata filters.
+
+        Results are ranked by relevance when a query is given, newest first
+        otherwise. ``limit``/``offset`` select one page of the results.
+        """
+
+    @abstractmethod
+    def create_folder(self, name: str, folder_id: Optional[str] = None) -> Dict[str, Any]:
+        """Create a folder and return its metadata."""
+
+    @abstractmethod
+    def ensure_folder(self, folder_id: str) -> None:
+        """Create a folder with a default name if it does not exist yet."""
+
+    @abstractmethod
+    def list_folders(self) -> List[Dict[str, Any]]:
+        """List folders with their chat counts, sorted by name."""
+
+    @abstractmethod
+    def rename_folder(self, folder_id: str, name: str) -> Dict[str, Any]:
+        """Rename a folder and return its metadata."""
+
+    @abstractmethod
+    def delete_folder(self, folder_id: str, delete_chats: bool = False) -> None:
+        """Delete a folder, either deleting its chats or moving them to global."""
+
+
+_store: Optional[ChatHistoryStore] = None
+
+
+def get_chat_history_store() -> ChatHistoryStore:
+    """Return the process wide chat history store, creating it on first use."""
+    global _store
+    if _store is None:
+        if CHAT_HISTORY_BACKEND == "file":
+            from src.storage.file_store import FileChatHistoryStore
+
+            _store = FileChatHistoryStore(CHAT_HISTORY_DIR)
+        elif CHAT_HISTORY_BACKEND == "sqlite":
+            from src.storage.sqlite_store import SQLiteChatHistoryStore
+
+            _store = SQLiteChatHistoryStore(CHAT_HISTORY_DB, legacy_dir=CHAT_HISTORY_DIR)
+        else:
+            raise ValueError(f"Unknown CHAT_HISTORY_BACKEND: {CHAT_HISTORY_BACKEND}")
+        logger.info(f"Using {CHAT_HISTORY_BACKEND} chat history backend")
+    return _store
@@ -0,0 +1,482 @@
+"""
+SQLite checkpointer for the agent graph.
+
+Checkpoints are kept in an embedded SQLite database, so conversation threads
+survive restarts and memory does not grow with every step of every thread. Like
+LangGraph's in-memory saver, channel values are stored once per version, so a
+step that only changes ``next`` does not store the message history again.
+
+Retention keeps the store bounded on a long-running server:
+
+- only the latest ``CHECKPOINT_KEEP_LAST`` checkpoints of each thread are kept,
+- threads idle for ``CHECKPOINT_THREAD_TTL`` seconds are deleted,
+
+and both are applied by a background compaction thread every
+``CHECKPOINT_COMPACT_INTERVAL`` seconds, which also drops the channel values of
+pruned threads that no kept checkpoint refers to.
+
+The database can be shared by several processes (API workers): writes take
+SQLite's write lock, and compaction runs in one of them at a time.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from src.utils.process_lock import try_exclusive
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "history/checkpoints.db")
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "20"))
+CHECKPOINT_THREAD_TTL = float(os.getenv("CHECKPOINT_THREAD_TTL", str(7 * 24 * 3600)))
+CHECKPOINT_COMPACT_INTERVAL = float(os.getenv("CHECKPOINT_COMPACT_INTERVAL", "600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS checkpoint_writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE INDEX IF NOT EXISTS idx_threads_updated ON threads (updated_at);
+"""
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    """LangGraph checkpointer backed by a local SQLite file."""
+
+    def __init__(
+        self,
+        db_path: str = CHECKPOINT_DB,
+        keep_last: int = CHECKPOINT_KEEP_LAST,
+        thread_ttl: float = CHECKPOINT_THREAD_TTL,
+    ):
+        super().__init__()
+        self.db_path = db_path
+        self.keep_last = keep_last
+        self.thread_ttl = thread_ttl
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    # Connection handling
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """Run a transaction; reads use a deferred one that only gives them a consistent snapshot."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    # Reading
+
+    def _load_tuple(self, conn: sqlite3.Connection, thread_id: str, row: Tuple) -> CheckpointTuple:
+        checkpoint_ns, checkpoint_id, parent_checkpoint_id, type_, data, metadata_type, metadata = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, data))
+        versions = {channel: str(version) for channel, version in checkpoint["channel_versions"].items()}
+        channel_values = {}
+        if versions:
+            # One query for all channels; both IN lists use the primary key, and the
+            # rare cross matches (a version of another channel) are dropped below
+            values = set(versions.values())
+            channel_params = ", ".join("?" * len(versions))
+            version_params = ", ".join("?" * len(values))
+            blobs = conn.execute(
+                "SELECT channel, version, type, blob FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                f"AND channel IN ({channel_params}) AND version IN ({version_params})",
+                (thread_id, checkpoint_ns, *versions, *values),
+            )
+            for channel, version, blob_type, blob in blobs:
+                if versions[channel] == version and blob_type != "empty":
+                    channel_values[channel] = self.serde.loads_typed((blob_type, blob))
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM checkpoint_writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config=_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=_config(thread_id, checkpoint_ns, parent_checkpoint_id) if parent_checkpoint_id else None,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, value)))
+                for task_id, channel, type_, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        columns = "checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        # One read transaction, so compaction cannot remove values half way through
+        with self._transaction(immediate=False) as conn:
+            if checkpoint_id:
+                row = conn.execute(
+                    f"SELECT {columns} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._load_tuple(conn, thread_id, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        conditions, params = [], []
+        if config:
+            conditions.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                conditions.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            conditions.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        results: List[CheckpointTuple] = []
+        with self._transaction(immediate=False) as conn:
+            rows = conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                f"metadata_type, metadata FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+                params,
+            )
+            for thread_id, *row in rows.fetchall():
+                if limit is not None and len(results) >= limit:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row[5], row[6]))
+                    if not all(metadata.get(key) == value for key, value in filter.items()):
+                        continue
+                results.append(self._load_tuple(conn, thread_id, tuple(row)))
+        yield from results
+
+    # Writing
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        checkpoint = checkpoint.copy()
+        values = checkpoint.pop("channel_values")
+        type_, data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version),
+             *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)))
+            for channel, version in new_versions.items()
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO checkpoint_blobs "
+                "(thread_id, checkpoint_ns, channel, version, type, blob) VALUES (?, ?, ?, ?, ?, ?)",
+                blobs,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                "parent_checkpoint_id, type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, data, metadata_type, metadata_data),
+            )
+            self._touch(conn, thread_id)
+        return _config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes (errors, interrupts, ...) replace earlier ones; regular writes are kept once
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        rows = [
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel,
+             *self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                f"{verb} INTO checkpoint_writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+                "channel, type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._touch(conn, thread_id)
+
+    @staticmethod
+    def _touch(conn: sqlite3.Connection, thread_id: str) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO threads (thread_id, updated_at) VALUES (?, ?)",
+            (thread_id, time.time()),
+        )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._transaction() as conn:
+            self._delete_thread(conn, thread_id)
+
+    @staticmethod
+    def _delete_thread(conn: sqlite3.Connection, thread_id: str) -> None:
+        for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes", "threads"):
+            conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # Async API; SQLite calls run in the default executor
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for result in results:
+            yield result
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.put_writes, config, writes, task_id, task_path
+        )
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.delete_thread, thread_id)
+
+    # Retention
+
+    def compact(self) -> Dict[str, int]:
+        """Apply the retention policies and drop unreferenced channel values.
+
+        Every thread is pruned in a write transaction of its own, so writers wait
+        for at most one thread's worth of work, and only the channel values of
+        pruned threads are examined.
+
+        Returns:
+            Number of threads, checkpoints and channel values removed.
+        """
+        removed = {"threads": 0, "checkpoints": 0, "blobs": 0}
+        if self.thread_ttl > 0:
+            idle = self._conn().execute(
+                "SELECT thread_id FROM threads WHERE updated_at < ?", (time.time() - self.thread_ttl,)
+            ).fetchall()
+            for (thread_id,) in idle:
+                with self._transaction() as conn:
+                    # Skip threads that were used again since they were selected
+                    if conn.execute(
+                        "SELECT 1 FROM threads WHERE thread_id = ? AND updated_at < ?",
+                        (thread_id, time.time() - self.thread_ttl),
+                    ).fetchone():
+                        self._delete_thread(conn, thread_id)
+                        removed["threads"] += 1
+
+        if self.keep_last > 0:
+            overfull = self._conn().execute(
+                "SELECT thread_id, checkpoint_ns FROM checkpoints "
+                "GROUP BY thread_id, checkpoint_ns HAVING COUNT(*) > ?",
+                (self.keep_last,),
+            ).fetchall()
+            for thread_id, checkpoint_ns in overfull:
+                with self._transaction() as conn:
+                    checkpoints, blobs = self._prune(conn, thread_id, checkpoint_ns)
+                removed["checkpoints"] += checkpoints
+                removed["blobs"] += blobs
+
+        if any(removed.values()):
+            logger.info(f"Compacted checkpoints: {removed}")
+            self._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def _prune(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str) -> Tuple[int, int]:
+        """Keep the latest ``keep_last`` checkpoints of a thread namespace and the values they use.
+
+        Returns:
+            Number of checkpoints and channel values removed.
+        """
+        scope = (thread_id, checkpoint_ns)
+        checkpoints = conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ("
+            " SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+            " ORDER BY checkpoint_id DESC LIMIT ?)",
+            (*scope, *scope, self.keep_last),
+        ).rowcount
+        conn.execute(
+            "DELETE FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ("
+            " SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)",
+            (*scope, *scope),
+        )
+        referenced = set()
+        for type_, data in conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?", scope
+        ):
+            checkpoint = self.serde.loads_typed((type_, data))
+            referenced.update((channel, str(version)) for channel, version in checkpoint["channel_versions"].items())
+        stale = [
+            (*scope, channel, version)
+            for channel, version in conn.execute(
+                "SELECT channel, version FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ?", scope
+            ).fetchall()
+            if (channel, version) not in referenced
+        ]
+        conn.executemany(
+            "DELETE FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+            stale,
+        )
+        return checkpoints, len(stale)
+
+    def start_compaction(self, interval: float = CHECKPOINT_COMPACT_INTERVAL) -> None:
+        """Run ``compact`` every ``interval`` seconds in a background thread."""
+        if self._compactor is not None or interval <= 0:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    # With several API workers on one database, one compaction per interval is enough
+                    with try_exclusive(f"compact-{os.path.basename(self.db_path)}") as acquired:
+                        if acquired:
+                            self.compact()
+                except Exception as e:
+                    logger.error(f"Checkpoint compaction failed: {e}")
+
+        self._compactor = threading.Thread(target=run, name="checkpoint-compaction", daemon=True)
+        self._compactor.start()
+
+    def close(self) -> None:
+        """Stop background compaction."""
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout=5)
+            self._compactor = None
+
+
+def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
@@ -0,0 +1,465 @@
+"""
+Legacy chat history backend: one directory per chat holding a ``chat.json``.
+
+Layout::
+
+    <root>/global/<chat_uuid>/chat.json
+    <root>/folders/<folder_id>/index.json
+    <root>/folders/<folder_id>/<chat_uuid>/chat.json
+
+Messages added with ``append_messages`` are appended, one JSON document per line,
+to ``messages.jsonl`` next to ``chat.json``. The log is folded back into
+``chat.json`` whenever the chat is rewritten anyway, and once it grows past
+``CHAT_LOG_COMPACT_BYTES``.
+
+Files are written atomically (temp file + fsync + rename) as compact JSON, and
+every read-modify-write of a chat happens under that chat's lock.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.storage.chat_history import (
+    CHAT_LOG_COMPACT_BYTES,
+    ChatHistoryStore,
+    ChatNotFoundError,
+    FolderNotFoundError,
+    default_folder_name,
+    location_of,
+    now_iso,
+)
+from src.storage.atomic import KeyedLock, atomic_write_json, dumps_compact
+from src.storage.text_index import extract_message_text, normalize_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LOG = "messages.jsonl"
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    atomic_write_json(path, data)
+
+
+def _read_log(path: str) -> List[Dict[str, Any]]:
+    messages = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                messages.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A line torn by a crash mid-append
+                logger.warning(f"Skipping unreadable line in {path}")
+    return messages
+
+
+class FileChatHistoryStore(ChatHistoryStore):
+    """Chat history stored as plain JSON files on disk."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.global_dir = os.path.join(root, "global")
+        self.folders_dir = os.path.join(root, "folders")
+        os.makedirs(self.global_dir, exist_ok=True)
+        os.makedirs(self.folders_dir, exist_ok=True)
+        self._chat_lock = KeyedLock()
+        self._folder_lock = KeyedLock()
+
+    # Helpers
+
+    def _folder_ids(self) -> List[str]:
+        return [
+            d for d in os.listdir(self.folders_dir)
+            if os.path.isdir(os.path.join(self.folders_dir, d))
+        ]
+
+    def _chat_dirs(self, parent: str) -> List[str]:
+        return [d for d in os.listdir(parent) if os.path.isdir(os.path.join(parent, d))]
+
+    def _folder_info(self, folder_id: str) -> Dict[str, Any]:
+        index_path = os.path.join(self.folders_dir, folder_id, "index.json")
+        if os.path.exists(index_path):
+            try:
+                return _read_json(index_path)
+            except Exception as e:
+                logger.warning(f"Error reading folder index file {index_path}: {e}")
+        return {"name": folder_id, "folder_id": folder_id}
+
+    def _find_chat(self, chat_uuid: str) -> tuple[str, Optional[str]]:
+        """Return the chat directory and its folder ID (None for global chats)."""
+        global_path = os.path.join(self.global_dir, chat_uuid)
+        if os.path.exists(global_path):
+            return global_path, None
+        for folder_id in self._folder_ids():
+            potential_path = os.path.join(self.folders_dir, folder_id, chat_uuid)
+            if os.path.exists(potential_path):
+                return potential_path, folder_id
+        raise ChatNotFoundError(chat_uuid)
+
+    def _chat_dir_for(self, chat_uuid: str, folder_id: Optional[str]) -> str:
+        if folder_id is None:
+            return os.path.join(self.global_dir, chat_uuid)
+        return os.path.join(self.folders_dir, folder_id, chat_uuid)
+
+    def _log_segments(self, chat_dir: str, chat_data: Dict[str, Any]) -> List[str]:
+        """Append log files of a chat that are not folded into its chat.json, oldest first."""
+        folded = set(chat_data.get("folded_logs", []))
+        segments = sorted(
+            name for name in os.listdir(chat_dir)
+            if name.startswith("messages.") and name.endswith(".jsonl")
+            and name != MESSAGE_LOG and name not in folded
+        )
+        if os.path.exists(os.path.join(chat_dir, MESSAGE_LOG)):
+            segments.append(MESSAGE_LOG)
+        return [os.path.join(chat_dir, name) for name in segments]
+
+    def _read_chat(self, chat_dir: str, with_messages: bool = True) -> Dict[str, Any]:
+        """Read chat.json and apply the chat's append log on top of it."""
+        chat_data = _read_json(os.path.join(chat_dir, "chat.json"))
+        segments = self._log_segments(chat_dir, chat_data)
+        chat_data.pop("folded_logs", None)
+        if segments:
+            # Appends do not rewrite chat.json, so the log's mtime is the last update
+            appended_at = datetime.fromtimestamp(max(map(os.path.getmtime, segments))).isoformat()
+            args = chat_data.setdefault("args", {})
+            if appended_at > (args.get("updated_at") or ""):
+                args["updated_at"] = appended_at
+            if with_messages:
+                for path in segments:
+                    chat_data.setdefault("messages", []).extend(_read_log(path))
+        return chat_data
+
+    def _fold_log(self, chat_dir: str, chat_data: Dict[str, Any]) -> List[str]:
+        """Move a chat's appended messages into ``chat_data``.
+
+        Returns the log files to delete once ``chat_data`` is written. Their names are
+        recorded in chat.json, so a crash before the deletion cannot apply them twice.
+        """
+        for name in chat_data.pop("folded_logs", []):
+            # Left behind by a crash during an earlier fold
+            try:
+                os.remove(os.path.join(chat_dir, name))
+            except FileNotFoundError:
+                pass
+        log_path = os.path.join(chat_dir, MESSAGE_LOG)
+        if os.path.exists(log_path):
+            # Freeze the live log so the fold has a fixed set of files to record
+            os.replace(log_path, os.path.join(chat_dir, f"messages.{time.time_ns():020d}.jsonl"))
+        segments = self._log_segments(chat_dir, chat_data)
+        for path in segments:
+            chat_data.setdefault("messages", []).extend(_read_log(path))
+        if segments:
+            chat_data["folded_logs"] = [os.path.basename(path) for path in segments]
+        return segments
+
+    def _summaries(
+        self, folder_id: Optional[str], with_messages: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Read the ``args`` of every chat in global (None) or in one folder."""
+        if folder_id is None:
+            parent = self.global_dir
+            extra: Dict[str, Any] = {"location": "global"}
+        else:
+            parent = os.path.join(self.folders_dir, folder_id)
+            folder_info = self._folder_info(folder_id)
+            extra = {
+                "location": "folder",
+                "folder_id": folder_id,
+                "folder_name": folder_info.get("name", folder_id),
+            }
+
+        result = []
+        for chat_uuid in self._chat_dirs(parent):
+            file_path = os.path.join(parent, chat_uuid, "chat.json")
+            if not os.path.exists(file_path):
+                continue
+            try:
+                chat_data = self._read_chat(os.path.join(parent, chat_uuid), with_messages)
+            except Exception as e:
+                logger.warning(f"Error reading chat file {file_path}: {e}")
+                continue
+            if "args" in chat_data and "title" in chat_data["args"]:
+                result.append({"args": chat_data["args"], "chat": chat_data, **extra})
+        return result
+
+    def _scopes(self, folder_id: Optional[str]) -> List[Optional[str]]:
+        if folder_id is None:
+            return [None, *self._folder_ids()]
+        if folder_id == "global":
+            return [None]
+        if os.path.isdir(os.path.join(self.folders_dir, folder_id)):
+            return [folder_id]
+        return []
+
+    # Chats
+
+    def save_chat(self, title, messages, args=None, folder_id=None):
+        args = args or {}
+        chat_uuid = str(uuid.uuid4())
+        if folder_id:
+            self.ensure_folder(folder_id)
+        chat_dir = self._chat_dir_for(chat_uuid, folder_id or None)
+        os.makedirs(chat_dir, exist_ok=True)
+
+        now = now_iso()
+        _write_json(
+            os.path.join(chat_dir, "chat.json"),
+            {
+                "args": {
+                    "title": title,
+                    "uuid": chat_uuid,
+                    "created_at": now,
+                    "updated_at": now,
+                    "model": "default",
+                    "is_favorite": args.get("is_favorite", False),
+                    "tags": args.get("tags", []),
+                },
+                "messages": messages,
+            },
+        )
+        return chat_uuid
+
+    def list_chats(self, folder_id=None, sort_by="updated_at", limit=None, after=None):
+        result = []
+        for scope in self._scopes(folder_id):
+            for summary in self._summaries(scope):
+                args = summary.pop("args")
+                summary.pop("chat")
+                result.append({
+                    "title": args["title"],
+                    "uuid": args["uuid"],
+                    **summary,
+                    "created_at": args.get("created_at"),
+                    "updated_at": args.get("updated_at"),
+                    "is_favorite": args.get("is_favorite", False),
+                })
+        result.sort(key=lambda x: (x.get(sort_by) or "", x["uuid"]), reverse=True)
+        if after is not None:
+            result = [x for x in result if (x.get(sort_by) or "", x["uuid"]) < tuple(after)]
+        return result if limit is None else result[:limit]
+
+    def get_chat(self, chat_uuid):
+        chat_dir, folder_id = self._find_chat(chat_uuid)
+        chat_data = self._read_chat(chat_dir)
+        if folder_id is None:
+            chat_data["location"] = "global"
+        else:
+            chat_data["location"] = "folder"
+            chat_data["folder_id"] = folder_id
+            chat_data["folder_name"] = self._folder_info(folder_id).get("name", folder_id)
+        return chat_data
+
+    def _modify(self, chat_uuid: str, modify) -> Optional[str]:
+        with self._chat_lock(chat_uuid):
+            chat_dir, folder_id = self._find_chat(chat_uuid)
+            chat_file_path = os.path.join(chat_dir, "chat.json")
+            if not os.path.exists(chat_file_path):
+                raise ChatNotFoundError(chat_uuid)
+            chat_data = _read_json(chat_file_path)
+            # chat.json is rewritten in full anyway, so take the append log along
+            folded = self._fold_log(chat_dir, chat_data)
+            modify(chat_data)
+            chat_data["args"]["updated_at"] = now_iso()
+            _write_json(chat_file_path, chat_data)
+            for path in folded:
+                os.remove(path)
+        return folder_id
+
+    def update_chat(self, chat_uuid, title=None, messages=None, args=None):
+        def modify(chat_data):
+            if title:
+                chat_data["args"]["title"] = title
+            if messages is not None:
+                chat_data["messages"] = messages
+            if args:
+                chat_data["args"].update(args)
+
+        return location_of(self._modify(chat_uuid, modify))
+
+    def append_messages(self, chat_uuid, messages):
+        data = "".join(dumps_compact(message) + "\n" for message in messages).encode("utf-8")
+        with self._chat_lock(chat_uuid):
+            chat_dir, folder_id = self._find_chat(chat_uuid)
+            with open(os.path.join(chat_dir, MESSAGE_LOG), "a+b") as f:
+                if f.tell():
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        # Terminate a line torn by a crash so it does not swallow ours
+                        data = b"\n" + data
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                log_size = f.tell()
+            if log_size > CHAT_LOG_COMPACT_BYTES:
+                self._modify(chat_uuid, lambda chat_data: None)
+        return location_of(folder_id)
+
+    def set_favorite(self, chat_uuid, favorite_status):
+        def modify(chat_data):
+            chat_data["args"]["is_favorite"] = favorite_status
+
+        return location_of(self._modify(chat_uuid, modify))
+
+    def add_tags(self, chat_uuid, tags):
+        updated_tags: List[str] = []
+
+        def modify(chat_data):
+            existing_tags = chat_data.get("args", {}).get("tags", [])
+            updated_tags.extend(dict.fromkeys(existing_tags + tags))
+            chat_data["args"]["tags"] = updated_tags
+
+        self._modify(chat_uuid, modify)
+        return updated_tags
+
+    def move_chat(self, chat_uuid, destination):
+        if destination == "global":
+            destination_path = self._chat_dir_for(chat_uuid, None)
+            folder_lock = contextlib.nullcontext()
+        else:
+            destination_path = self._chat_dir_for(chat_uuid, destination)
+            # Held for the move, so the folder cannot be deleted in between
+            folder_lock = self._folder_lock(destination)
+
+        with folder_lock:
+            if destination != "global":
+                self.ensure_folder(destination)
+            with self._chat_lock(chat_uuid):
+                source_path, source_folder_id = self._find_chat(chat_uuid)
+                if os.path.normpath(source_path) != os.path.normpath(destination_path):
+                    if os.path.exists(destination_path):
+                        shutil.rmtree(destination_path)
+                    # A rename within the history directory, so the chat is never half-moved
+                    shutil.move(source_path, destination_path)
+        return location_of(source_folder_id)
+
+    def delete_chat(self, chat_uuid):
+        with self._chat_lock(chat_uuid):
+            chat_dir, folder_id = self._find_chat(chat_uuid)
+            shutil.rmtree(chat_dir)
+        return location_of(folder_id)
+
+    def search_chats(
+        self,
+        query="",
+        folder_id=None,
+        filter_favorites=False,
+        filter_tags=None,
+        limit=None,
+        offset=0,
+    ):
+        # The file backend has no index: every chat is read and matched in turn
+        tokens = tokenize(query)
+        result = []
+        for scope in self._scopes(folder_id):
+            for summary in self._summaries(scope, with_messages=bool(tokens)):
+                args = summary.pop("args")
+                chat_data = summary.pop("chat")
+                if filter_favorites and not args.get("is_favorite", False):
+                    continue
+                if filter_tags and not any(tag in args.get("tags", []) for tag in filter_tags):
+                    continue
+                if tokens:
+                    text = normalize_text(args.get("title", "")) + "\n"
+                    text += extract_message_text(chat_data.get("messages", []))
+                    words = set(tokenize(text))
+                    if not all(any(word.startswith(token) for word in words) for token in tokens):
+                        continue
+                result.append({
+                    "uuid": args.get("uuid", ""),
+                    "title": args.get("title", ""),
+                    "created_at": args.get("created_at", ""),
+                    "updated_at": args.get("updated_at", ""),
+                    "is_favorite": args.get("is_favorite", False),
+                    "tags": args.get("tags", []),
+                    **summary,
+                })
+        result.sort(key=lambda x: x.get("updated_at") or x.get("created_at") or "", reverse=True)
+        return result[offset:None if limit is None else offset + limit]
+
+    # Folders
+
+    def create_folder(self, name, folder_id=None):
+        folder_id = folder_id or str(uuid.uuid4())
+        folder_path = os.path.join(self.folders_dir, folder_id)
+        with self._folder_lock(folder_id):
+            os.makedirs(folder_path, exist_ok=True)
+            folder_data = {"folder_id": folder_id, "name": name, "created_at": now_iso()}
+            _write_json(os.path.join(folder_path, "index.json"), folder_data)
+        return folder_data
+
+    def ensure_folder(self, folder_id):
+        with self._folder_lock(folder_id):
+            if not os.path.exists(os.path.join(self.folders_dir, folder_id)):
+                self.create_folder(default_folder_name(folder_id), folder_id=folder_id)
+
+    def list_folders(self):
+        result = []
+        for folder_id in self._folder_ids():
+            folder_path = os.path.join(self.folders_dir, folder_id)
+            index_path = os.path.join(folder_path, "index.json")
+            if not os.path.exists(index_path):
+                # Folder exists but has no index.json, give it a default one
+                _write_json(index_path, {
+                    "folder_id": folder_id,
+                    "name": default_folder_name(folder_id),
+                    "created_at": now_iso(),
+                })
+            try:
+                folder_data = _read_json(index_path)
+                result.append({
+                    "folder_id": folder_data.get("folder_id", folder_id),
+                    "name": folder_data.get("name", default_folder_name(folder_id)),
+                    "created_at": folder_data.get("created_at", ""),
+                    "chat_count": len(self._chat_dirs(folder_path)),
+                })
+            except Exception as e:
+                logger.warning(f"Error reading folder metadata: {e}")
+                result.append({
+                    "folder_id": folder_id,
+                    "name": default_folder_name(folder_id),
+                    "created_at": "",
+                    "chat_count": 0,
+                })
+        result.sort(key=lambda x: x.get("name", ""))
+        return result
+
+    def rename_folder(self, folder_id, name):
+        folder_path = os.path.join(self.folders_dir, folder_id)
+        with self._folder_lock(folder_id):
+            if not os.path.exists(folder_path):
+                raise FolderNotFoundError(folder_id)
+            index_path = os.path.join(folder_path, "index.json")
+            if os.path.exists(index_path):
+                folder_data = _read_json(index_path)
+            else:
+                folder_data = {"folder_id": folder_id, "created_at": now_iso()}
+            folder_data["name"] = name
+            folder_data["updated_at"] = now_iso()
+            _write_json(index_path, folder_data)
+        return folder_data
+
+    def delete_folder(self, folder_id, delete_chats=False):
+        folder_path = os.path.join(self.folders_dir, folder_id)
+        # Folder lock before chat locks, the order move_chat takes them in too
+        with self._folder_lock(folder_id):
+            if not os.path.exists(folder_path):
+                raise FolderNotFoundError(folder_id)
+            if not delete_chats:
+                for chat_uuid in self._chat_dirs(folder_path):
+                    with self._chat_lock(chat_uuid):
+                        destination_path = os.path.join(self.global_dir, chat_uuid)
+                        if os.path.exists(destination_path):
+                            shutil.rmtree(destination_path)
+                        shutil.move(os.path.join(folder_path, chat_uuid), destination_path)
+            shutil.rmtree(folder_path)
@@ -0,0 +1,627 @@
+"""
+SQLite chat history backend.
+
+Chat metadata lives in indexed columns so listing, lookup by UUID and filtering by
+folder, favorite or tag are index seeks instead of directory walks. The first time
+the database is opened, the legacy ``history/chat_history`` tree is imported.
+
+Messages added with ``append_messages`` go to ``chat_message_log`` one row each and
+are folded into the chat's ``messages`` column once the log passes
+``CHAT_LOG_COMPACT_BYTES``.
+
+Every write runs in its own transaction, so a crash never leaves a half-written
+chat. Chat payloads are stored as compact JSON.
+
+Chat titles and message text are kept in an FTS5 index that is updated in the same
+transaction as the chat row, so search is a ranked index lookup rather than a scan.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from src.storage.chat_history import (
+    CHAT_LOG_COMPACT_BYTES,
+    ChatHistoryStore,
+    ChatNotFoundError,
+    FolderNotFoundError,
+    SORT_FIELDS,
+    default_folder_name,
+    location_of,
+    now_iso,
+)
+from src.storage.text_index import build_match_query, extract_message_text, normalize_text
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS folders (
+    folder_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS chats (
+    uuid TEXT PRIMARY KEY,
+    folder_id TEXT,
+    title TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    is_favorite INTEGER NOT NULL DEFAULT 0,
+    tags TEXT NOT NULL DEFAULT '[]',
+    args TEXT NOT NULL,
+    messages TEXT NOT NULL
+);
+DROP INDEX IF EXISTS idx_chats_folder_updated;
+DROP INDEX IF EXISTS idx_chats_updated;
+DROP INDEX IF EXISTS idx_chats_created;
+CREATE INDEX IF NOT EXISTS idx_chats_folder_updated_uuid ON chats (folder_id, updated_at, uuid);
+CREATE INDEX IF NOT EXISTS idx_chats_folder_created_uuid ON chats (folder_id, created_at, uuid);
+CREATE INDEX IF NOT EXISTS idx_chats_updated_uuid ON chats (updated_at, uuid);
+CREATE INDEX IF NOT EXISTS idx_chats_created_uuid ON chats (created_at, uuid);
+CREATE INDEX IF NOT EXISTS idx_chats_favorite ON chats (is_favorite, updated_at);
+CREATE TABLE IF NOT EXISTS chat_tags (
+    tag TEXT NOT NULL,
+    uuid TEXT NOT NULL,
+    PRIMARY KEY (tag, uuid)
+);
+CREATE INDEX IF NOT EXISTS idx_chat_tags_uuid ON chat_tags (uuid);
+CREATE TABLE IF NOT EXISTS chat_message_log (
+    uuid TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (uuid, seq)
+);
+"""
+
+# Title hits rank above body hits; the uuid column is stored but not indexed
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS chats_fts USING fts5(
+    uuid UNINDEXED,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+FTS_RANK = "bm25(chats_fts, 0.0, 10.0, 1.0)"
+
+SUMMARY_COLUMNS = (
+    "c.uuid, c.title, c.folder_id, f.name AS folder_name, "
+    "c.created_at, c.updated_at, c.is_favorite, c.tags"
+)
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _sql_normalize_text(value: Optional[str]) -> Optional[str]:
+    """``normalize_text`` as an SQL function; NULL stays NULL."""
+    return None if value is None else normalize_text(value)
+
+
+def _fts_rowid(chat_uuid: str) -> int:
+    """Stable FTS rowid for a chat, so index rows can be replaced without a scan."""
+    return int.from_bytes(hashlib.blake2b(chat_uuid.encode(), digest_size=7).digest(), "big")
+
+
+def _folder_clause(folder_id: Optional[str], params: List[Any]) -> str:
+    """SQL condition restricting chats to all (None), global, or one folder."""
+    if folder_id is None:
+        return "1"
+    if folder_id == "global":
+        return "c.folder_id IS NULL"
+    params.append(folder_id)
+    return "c.folder_id = ?"
+
+
+class SQLiteChatHistoryStore(ChatHistoryStore):
+    """Chat history stored in an embedded SQLite database."""
+
+    def __init__(self, db_path: str, legacy_dir: Optional[str] = None):
+        self.db_path = db_path
+        self._local = threading.local()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        self.full_text_search = self._create_search_index(conn)
+        if legacy_dir and self._get_meta("legacy_migrated") is None:
+            self.migrate_legacy_tree(legacy_dir)
+        if self.full_text_search and self._get_meta("search_indexed") is None:
+            self.rebuild_search_index()
+
+    # Connection handling
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            # Lets substring search fold stored text the same way as the query
+            conn.create_function("normalize_text", 1, _sql_normalize_text, deterministic=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction.
+
+        ``BEGIN IMMEDIATE`` takes the database write lock up front, so the reads of a
+        read-modify-write see the latest committed state and concurrent writers (other
+        threads or processes) wait instead of losing updates. With ``immediate=False``
+        the transaction only gives several reads one consistent snapshot.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # Full-text search index
+
+    @staticmethod
+    def _create_search_index(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.executescript(FTS_SCHEMA)
+            return True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite FTS5 unavailable, chat search falls back to scanning: {e}")
+            return False
+
+    def _index_chat(
+        self,
+        conn: sqlite3.Connection,
+        chat_uuid: str,
+        title: str,
+        messages: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Replace a chat's search index entry.
+
+        When ``messages`` is None only the title changed and the indexed body is kept.
+        """
+        if not self.full_text_search:
+            return
+        rowid = _fts_rowid(chat_uuid)
+        if messages is None:
+            conn.execute(
+                "UPDATE chats_fts SET title = ? WHERE rowid = ?", (normalize_text(title), rowid)
+            )
+            return
+        conn.execute("DELETE FROM chats_fts WHERE rowid = ?", (rowid,))
+        conn.execute(
+            "INSERT INTO chats_fts (rowid, uuid, title, body) VALUES (?, ?, ?, ?)",
+            (rowid, chat_uuid, normalize_text(title), extract_message_text(messages)),
+        )
+
+    def _append_to_index(
+        self, conn: sqlite3.Connection, chat_uuid: str, messages: List[Dict[str, Any]]
+    ) -> None:
+        text = extract_message_text(messages)
+        if self.full_text_search and text:
+            conn.execute(
+                "UPDATE chats_fts SET body = body || ? WHERE rowid = ?",
+                ("\n" + text, _fts_rowid(chat_uuid)),
+            )
+
+    def _unindex_chat(self, conn: sqlite3.Connection, chat_uuid: str) -> None:
+        if self.full_text_search:
+            conn.execute("DELETE FROM chats_fts WHERE rowid = ?", (_fts_rowid(chat_uuid),))
+
+    def rebuild_search_index(self) -> None:
+        """Re-index every chat, e.g. after upgrading a database created without FTS."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM chats_fts")
+            for row in conn.execute("SELECT uuid, title, messages FROM chats").fetchall():
+                messages = self._load_messages(conn, row["uuid"], row["messages"])
+                self._index_chat(conn, row["uuid"], row["title"], messages)
+            self._set_meta(conn, "search_indexed", now_iso())
+
+    # Migration
+
+    def migrate_legacy_tree(self, root: str) -> int:
+        """Import chats and folders from the legacy directory layout.
+
+        Existing rows are left untouched, so the import can safely be repeated.
+
+        Returns:
+            int: Number of chats imported
+        """
+        from src.storage.file_store import FileChatHistoryStore
+
+        imported = 0
+        with self._transaction() as conn:
+            if os.path.isdir(root):
+                legacy = FileChatHistoryStore(root)
+                for folder in legacy.list_folders():
+                    conn.execute(
+                        "INSERT OR IGNORE INTO folders (folder_id, name, created_at) VALUES (?, ?, ?)",
+                        (folder["folder_id"], folder["name"], folder["created_at"] or now_iso()),
+                    )
+                for summary in legacy.list_chats():
+                    try:
+                        chat_data = legacy.get_chat(summary["uuid"])
+                    except Exception as e:
+                        logger.warning(f"Skipping legacy chat {summary['uuid']}: {e}")
+                        continue
+                    args = chat_data.get("args", {})
+                    if self._insert_chat(conn, args, chat_data.get("messages", []), summary.get("folder_id")):
+                        imported += 1
+            self._set_meta(conn, "legacy_migrated", now_iso())
+        if imported:
+            logger.info(f"Imported {imported} chats from {root} into {self.db_path}")
+        return imported
+
+    # Helpers
+
+    def _insert_chat(
+        self,
+        conn: sqlite3.Connection,
+        args: Dict[str, Any],
+        messages: List[Dict[str, Any]],
+        folder_id: Optional[str],
+    ) -> bool:
+        tags = list(args.get("tags") or [])
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO chats "
+            "(uuid, folder_id, title, created_at, updated_at, is_favorite, tags, args, messages) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                args["uuid"],
+                folder_id,
+                args.get("title", ""),
+                args.get("created_at") or now_iso(),
+                args.get("updated_at") or args.get("created_at") or now_iso(),
+                int(bool(args.get("is_favorite", False))),
+                _dumps(tags),
+                _dumps(args),
+                _dumps(messages),
+            ),
+        )
+        if cursor.rowcount:
+            self._set_tags(conn, args["uuid"], tags)
+            self._index_chat(conn, args["uuid"], args.get("title", ""), messages)
+        return bool(cursor.rowcount)
+
+    def _set_tags(self, conn: sqlite3.Connection, chat_uuid: str, tags: Iterable[str]) -> None:
+        conn.execute("DELETE FROM chat_tags WHERE uuid = ?", (chat_uuid,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO chat_tags (tag, uuid) VALUES (?, ?)",
+            [(tag, chat_uuid) for tag in tags],
+        )
+
+    def _load_args(self, conn: sqlite3.Connection, chat_uuid: str) -> sqlite3.Row:
+        row = conn.execute(
+            "SELECT folder_id, args FROM chats WHERE uuid = ?", (chat_uuid,)
+        ).fetchone()
+        if row is None:
+            raise ChatNotFoundError(chat_uuid)
+        return row
+
+    def _write_args(
+        self,
+        conn: sqlite3.Connection,
+        chat_uuid: str,
+        args: Dict[str, Any],
+        messages: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        args["updated_at"] = now_iso()
+        tags = list(args.get("tags") or [])
+        assignments = "title = ?, updated_at = ?, is_favorite = ?, tags = ?, args = ?"
+        params: List[Any] = [
+            args.get("title", ""),
+            args["updated_at"],
+            int(bool(args.get("is_favorite", False))),
+            _dumps(tags),
+            _dumps(args),
+        ]
+        if messages is not None:
+            assignments += ", messages = ?"
+            params.append(_dumps(messages))
+            conn.execute("DELETE FROM chat_message_log WHERE uuid = ?", (chat_uuid,))
+        conn.execute(f"UPDATE chats SET {assignments} WHERE uuid = ?", (*params, chat_uuid))
+        self._set_tags(conn, chat_uuid, tags)
+        self._index_chat(conn, chat_uuid, args.get("title", ""), messages)
+
+    def _load_messages(
+        self, conn: sqlite3.Connection, chat_uuid: str, messages_json: str
+    ) -> List[Dict[str, Any]]:
+        """The chat's compacted messages followed by any appended since."""
+        messages = json.loads(messages_json)
+        rows = conn.execute(
+            "SELECT message FROM chat_message_log WHERE uuid = ? ORDER BY seq", (chat_uuid,)
+        ).fetchall()
+        messages.extend(json.loads(row["message"]) for row in rows)
+        return messages
+
+    def _compact_log(self, conn: sqlite3.Connection, chat_uuid: str) -> None:
+        """Fold a chat's appended messages into its ``messages`` column."""
+        row = conn.execute("SELECT messages FROM chats WHERE uuid = ?", (chat_uuid,)).fetchone()
+        messages = self._load_messages(conn, chat_uuid, row["messages"])
+        conn.execute("UPDATE chats SET messages = ? WHERE uuid = ?", (_dumps(messages), chat_uuid))
+        conn.execute("DELETE FROM chat_message_log WHERE uuid = ?", (chat_uuid,))
+
+    def _ensure_folder(self, conn: sqlite3.Connection, folder_id: str) -> None:
+        conn.execute(
+            "INSERT OR IGNORE INTO folders (folder_id, name, created_at) VALUES (?, ?, ?)",
+            (folder_id, default_folder_name(folder_id), now_iso()),
+        )
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {"title": row["title"], "uuid": row["uuid"]}
+        if row["folder_id"] is None:
+            summary["location"] = "global"
+        else:
+            summary["location"] = "folder"
+            summary["folder_id"] = row["folder_id"]
+            summary["folder_name"] = row["folder_name"] or row["folder_id"]
+        summary["created_at"] = row["created_at"]
+        summary["updated_at"] = row["updated_at"]
+        summary["is_favorite"] = bool(row["is_favorite"])
+        return summary
+
+    # Chats
+
+    def save_chat(self, title, messages, args=None, folder_id=None):
+        args = args or {}
+        chat_uuid = str(uuid.uuid4())
+        now = now_iso()
+        with self._transaction() as conn:
+            if folder_id:
+                self._ensure_folder(conn, folder_id)
+            self._insert_chat(
+                conn,
+                {
+                    "title": title,
+                    "uuid": chat_uuid,
+                    "created_at": now,
+                    "updated_at": now,
+                    "model": "default",
+                    "is_favorite": args.get("is_favorite", False),
+                    "tags": args.get("tags", []),
+                },
+                messages,
+                folder_id or None,
+            )
+        return chat_uuid
+
+    def list_chats(self, folder_id=None, sort_by="updated_at", limit=None, after=None):
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort chats by {sort_by}")
+        params: List[Any] = []
+        conditions = [_folder_clause(folder_id, params)]
+        if after is not None:
+            # Keyset pagination: seek past the previous page using the (sort, uuid) index
+            conditions.append(f"(c.{sort_by}, c.uuid) < (?, ?)")
+            params.extend(after)
+        params.append(-1 if limit is None else limit)
+        rows = self._conn().execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM chats c "
+            f"LEFT JOIN folders f ON f.folder_id = c.folder_id "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY c.{sort_by} DESC, c.uuid DESC LIMIT ?",
+            params,
+        ).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def get_chat(self, chat_uuid):
+        with self._transaction(immediate=False) as conn:
+            row = conn.execute(
+                "SELECT c.folder_id, f.name AS folder_name, c.args, c.messages FROM chats c "
+                "LEFT JOIN folders f ON f.folder_id = c.folder_id WHERE c.uuid = ?",
+                (chat_uuid,),
+            ).fetchone()
+            if row is None:
+                raise ChatNotFoundError(chat_uuid)
+            messages = self._load_messages(conn, chat_uuid, row["messages"])
+        chat_data: Dict[str, Any] = {"args": json.loads(row["args"]), "messages": messages}
+        if row["folder_id"] is None:
+            chat_data["location"] = "global"
+        else:
+            chat_data["location"] = "folder"
+            chat_data["folder_id"] = row["folder_id"]
+            chat_data["folder_name"] = row["folder_name"] or row["folder_id"]
+        return chat_data
+
+    def update_chat(self, chat_uuid, title=None, messages=None, args=None):
+        with self._transaction() as conn:
+            row = self._load_args(conn, chat_uuid)
+            chat_args = json.loads(row["args"])
+            if title:
+                chat_args["title"] = title
+            if args:
+                chat_args.update(args)
+            self._write_args(conn, chat_uuid, chat_args, messages)
+        return location_of(row["folder_id"])
+
+    def append_messages(self, chat_uuid, messages):
+        with self._transaction() as conn:
+            row = self._load_args(conn, chat_uuid)
+            log = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) AS seq, COALESCE(SUM(size), 0) AS size "
+                "FROM chat_message_log WHERE uuid = ?",
+                (chat_uuid,),
+            ).fetchone()
+            encoded = [_dumps(message) for message in messages]
+            conn.executemany(
+                "INSERT INTO chat_message_log (uuid, seq, size, message) VALUES (?, ?, ?, ?)",
+                [
+                    (chat_uuid, log["seq"] + i, len(message), message)
+                    for i, message in enumerate(encoded, start=1)
+                ],
+            )
+            # Only the small args document is rewritten, never the message list
+            chat_args = json.loads(row["args"])
+            chat_args["updated_at"] = now_iso()
+            conn.execute(
+                "UPDATE chats SET updated_at = ?, args = ? WHERE uuid = ?",
+                (chat_args["updated_at"], _dumps(chat_args), chat_uuid),
+            )
+            self._append_to_index(conn, chat_uuid, messages)
+            if log["size"] + sum(len(message) for message in encoded) > CHAT_LOG_COMPACT_BYTES:
+                self._compact_log(conn, chat_uuid)
+        return location_of(row["folder_id"])
+
+    def set_favorite(self, chat_uuid, favorite_status):
+        return self.update_chat(chat_uuid, args={"is_favorite": favorite_status})
+
+    def add_tags(self, chat_uuid, tags):
+        with self._transaction() as conn:
+            row = self._load_args(conn, chat_uuid)
+            chat_args = json.loads(row["args"])
+            chat_args["tags"] = list(dict.fromkeys(list(chat_args.get("tags") or []) + tags))
+            self._write_args(conn, chat_uuid, chat_args)
+        return chat_args["tags"]
+
+    def move_chat(self, chat_uuid, destination):
+        destination_folder = None if destination == "global" else destination
+        with self._transaction() as conn:
+            row = self._load_args(conn, chat_uuid)
+            if destination_folder is not None:
+                self._ensure_folder(conn, destination_folder)
+            conn.execute(
+                "UPDATE chats SET folder_id = ? WHERE uuid = ?", (destination_folder, chat_uuid)
+            )
+        return location_of(row["folder_id"])
+
+    def delete_chat(self, chat_uuid):
+        with self._transaction() as conn:
+            row = self._load_args(conn, chat_uuid)
+            conn.execute("DELETE FROM chats WHERE uuid = ?", (chat_uuid,))
+            conn.execute("DELETE FROM chat_tags WHERE uuid = ?", (chat_uuid,))
+            conn.execute("DELETE FROM chat_message_log WHERE uuid = ?", (chat_uuid,))
+            self._unindex_chat(conn, chat_uuid)
+        return location_of(row["folder_id"])
+
+    def search_chats(
+        self,
+        query="",
+        folder_id=None,
+        filter_favorites=False,
+        filter_tags=None,
+        limit=None,
+        offset=0,
+    ):
+        params: List[Any] = []
+        conditions = [_folder_clause(folder_id, params)]
+        if filter_favorites:
+            conditions.append("c.is_favorite = 1")
+        if filter_tags:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM chat_tags t WHERE t.uuid = c.uuid "
+                f"AND t.tag IN ({', '.join('?' for _ in filter_tags)}))"
+            )
+            params.extend(filter_tags)
+
+        source = "chats c"
+        order = "c.updated_at DESC, c.uuid DESC"
+        match = build_match_query(query) if query else ""
+        if match and self.full_text_search:
+            source = "chats_fts JOIN chats c ON c.uuid = chats_fts.uuid"
+            conditions.insert(0, "chats_fts MATCH ?")
+            params.insert(0, match)
+            order = f"{FTS_RANK}, {order}"
+        elif query:
+            needle = normalize_text(query)
+            conditions.append(
+                "(instr(normalize_text(c.title), ?) > 0 OR instr(normalize_text(c.messages), ?) > 0 "
+                "OR EXISTS (SELECT 1 FROM chat_message_log l "
+                "WHERE l.uuid = c.uuid AND instr(normalize_text(l.message), ?) > 0))"
+            )
+            params.extend([needle, needle, needle])
+
+        params.extend([-1 if limit is None else limit, offset])
+        rows = self._conn().execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM {source} "
+            f"LEFT JOIN folders f ON f.folder_id = c.folder_id "
+            f"WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT ? OFFSET ?",
+            params,
+        ).fetchall()
+
+        results = []
+        for row in rows:
+            summary = self._summary(row)
+            summary["tags"] = json.loads(row["tags"])
+            results.append(summary)
+        return results
+
+    # Folders
+
+    def create_folder(self, name, folder_id=None):
+        folder_data = {
+            "folder_id": folder_id or str(uuid.uuid4()),
+            "name": name,
+            "created_at": now_iso(),
+        }
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO folders (folder_id, name, created_at) VALUES (?, ?, ?)",
+                (folder_data["folder_id"], name, folder_data["created_at"]),
+            )
+        return folder_data
+
+    def ensure_folder(self, folder_id):
+        with self._transaction() as conn:
+            self._ensure_folder(conn, folder_id)
+
+    def list_folders(self):
+        rows = self._conn().execute(
+            "SELECT f.folder_id, f.name, f.created_at, COUNT(c.uuid) AS chat_count "
+            "FROM folders f LEFT JOIN chats c ON c.folder_id = f.folder_id "
+            "GROUP BY f.folder_id ORDER BY f.name"
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def rename_folder(self, folder_id, name):
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE folders SET name = ?, updated_at = ? WHERE folder_id = ?",
+                (name, now_iso(), folder_id),
+            )
+            if not cursor.rowcount:
+                raise FolderNotFoundError(folder_id)
+            row = conn.execute("SELECT * FROM folders WHERE folder_id = ?", (folder_id,)).fetchone()
+        return dict(row)
+
+    def delete_folder(self, folder_id, delete_chats=False):
+        with self._transaction() as conn:
+            cursor = conn.execute("DELETE FROM folders WHERE folder_id = ?", (folder_id,))
+            if not cursor.rowcount:
+                raise FolderNotFoundError(folder_id)
+            if delete_chats:
+                rows = conn.execute("SELECT uuid FROM chats WHERE folder_id = ?", (folder_id,)).fetchall()
+                for row in rows:
+                    self._unindex_chat(conn, row["uuid"])
+                for table in ("chat_tags", "chat_message_log"):
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE uuid IN (SELECT uuid FROM chats WHERE folder_id = ?)",
+                        (folder_id,),
+                    )
+                conn.execute("DELETE FROM chats WHERE folder_id = ?", (folder_id,))
+            else:
+                conn.execute("UPDATE chats SET folder_id = NULL WHERE folder_id = ?", (folder_id,))
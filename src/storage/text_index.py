@@ -0,0 +1,66 @@
+"""
+Text helpers for the chat full-text search index.
+
+Both the indexed text and the search query go through ``normalize_text`` so that
+Arabic spelling variants and diacritics match, and English matching is case
+insensitive.
+"""
+
+import re
+from typing import Any, Iterable, List
+
+# Arabic diacritics (tashkeel), superscript alef and tatweel carry no meaning for search
+_ARABIC_MARKS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+_ARABIC_LETTERS = str.maketrans({
+    "آ": "ا",  # alef with madda -> alef
+    "أ": "ا",  # alef with hamza above -> alef
+    "إ": "ا",  # alef with hamza below -> alef
+    "ٱ": "ا",  # alef wasla -> alef
+    "ى": "ي",  # alef maksura -> yeh
+    "ة": "ه",  # teh marbuta -> heh
+})
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Message keys whose values are binary payloads or identifiers, never searchable text
+_SKIPPED_KEYS = {"id", "type", "role", "image_url", "file_data", "url", "message_id", "tool_call_id", "agent_id"}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and fold Arabic letter variants so equivalent spellings match."""
+    return _ARABIC_MARKS.sub("", text).translate(_ARABIC_LETTERS).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into word tokens (Arabic and Latin scripts alike)."""
+    return _TOKEN.findall(normalize_text(text))
+
+
+def _strings(value: Any) -> Iterable[str]:
+    if isinstance(value, str):
+        if not value.startswith("data:"):
+            yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key not in _SKIPPED_KEYS:
+                yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def extract_message_text(messages: List[Any]) -> str:
+    """Collect the searchable text of a chat's messages, normalized for indexing."""
+    parts = []
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else message
+        parts.extend(_strings(content))
+    return normalize_text("\n".join(parts))
+
+
+def build_match_query(query: str) -> str:
+    """Turn a user query into an FTS5 MATCH expression.
+
+    Every token must appear and is matched as a prefix, so "pyth prog" finds
+    "Python programming".
+    """
+    return " ".join(f'"{token}"*' for token in tokenize(query))
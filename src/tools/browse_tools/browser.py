@@ -10,7 +10,7 @@ from typing import Optional, ClassVar, Type
 from langchain.tools import BaseTool
 from browser_use import AgentHistoryList, Browser, BrowserConfig
 from browser_use import Agent as BrowserAgent
-from src.config.llm import browser_tool_llm as llm
+from src.config.llm import get_llm
 from src.tools.decorators import create_logged_tool
 from dotenv import load_dotenv
 
@@ -167,14 +167,14 @@ class BrowserTool(BaseTool):
         if use_user_chrome_instance:
             self._agent = BrowserAgent(
                 task=instruction,
-                llm=llm,
+                llm=get_llm("browser_tool_llm"),
                 browser=self._browser,
                 generate_gif=generated_gif_path,
             )
         else:
             self._agent = BrowserAgent(
                 task=instruction,
-                llm=llm,
+                llm=get_llm("browser_tool_llm"),
                 generate_gif=generated_gif_path,
             )
 
@@ -223,14 +223,14 @@ class BrowserTool(BaseTool):
         if use_user_chrome_instance:
             self._agent = BrowserAgent(
                 task=instruction,
-                llm=llm,
+                llm=get_llm("browser_tool_llm"),
                 browser=self._browser,
                 generate_gif=generated_gif_path,
             )
         else:
             self._agent = BrowserAgent(
                 task=instruction,
-                llm=llm,
+                llm=get_llm("browser_tool_llm"),
                 generate_gif=generated_gif_path,
             )
             
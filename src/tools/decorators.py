@@ -1,7 +1,12 @@
 import logging
 import functools
+import inspect
 from typing import Any, Callable, Type, TypeVar
 
+from langchain_core.tools import BaseTool
+
+from src.tools.executor import run_blocking
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
@@ -17,14 +22,22 @@ def log_io(func: Callable) -> Callable:
         The wrapped function with input/output logging
     """
 
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            _log_call(func.__name__, args, kwargs)
+            result = await func(*args, **kwargs)
+            logger.debug(f"Tool {func.__name__} returned: {result}")
+            return result
+
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
         # Log input parameters
         func_name = func.__name__
-        params = ", ".join(
-            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
-        )
-        logger.debug(f"Tool {func_name} called with parameters: {params}")
+        _log_call(func_name, args, kwargs)
 
         # Execute the function
         result = func(*args, **kwargs)
@@ -37,6 +50,13 @@ def log_io(func: Callable) -> Callable:
     return wrapper
 
 
+def _log_call(func_name: str, args: tuple, kwargs: dict) -> None:
+    params = ", ".join(
+        [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
+    )
+    logger.debug(f"Tool {func_name} called with parameters: {params}")
+
+
 class LoggedToolMixin:
     """A mixin class that adds logging functionality to any tool."""
 
@@ -57,6 +77,32 @@ class LoggedToolMixin:
         )
         return result
 
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        """Override _arun method to add logging.
+
+        Tools without an async implementation of their own run ``_run`` in the
+        bounded tool executor rather than the event loop's default one.
+        """
+        self._log_operation("_arun", *args, **kwargs)
+        if _has_native_arun(type(self)):
+            result = await super()._arun(*args, **kwargs)
+        else:
+            result = await run_blocking(super()._run, *args, **kwargs)
+        logger.debug(
+            f"Tool {self.__class__.__name__.replace('Logged', '')} returned: {result}"
+        )
+        return result
+
+
+def _has_native_arun(tool_class: type) -> bool:
+    """Whether a tool class implements _arun itself instead of BaseTool's thread fallback."""
+    for cls in tool_class.__mro__:
+        if cls is BaseTool:
+            return False
+        if cls is not LoggedToolMixin and "_arun" in vars(cls):
+            return True
+    return False
+
 
 def create_logged_tool(base_tool_class: Type[T]) -> Type[T]:
     """
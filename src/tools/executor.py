@@ -0,0 +1,79 @@
+"""
+Bounded thread pool for blocking tool calls.
+
+Async agent runs call their tools with ``ainvoke``. Tools with a native async
+implementation (Tavily search, the crawler, the browser) run on the event loop;
+the ones that are only synchronous (file management, shell, Python, Wikipedia,
+...) run in this pool instead of the event loop's default executor, so a burst of
+slow tool calls cannot take the threads that the rest of the server needs.
+
+The pool size is set with ``TOOL_EXECUTOR_WORKERS``.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial, wraps
+from typing import Any, Callable, Optional, TypeVar
+
+from dotenv import load_dotenv
+from langchain_core.runnables.config import run_in_executor
+from langchain_core.tools import BaseTool, StructuredTool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TOOL_EXECUTOR_WORKERS = int(os.getenv("TOOL_EXECUTOR_WORKERS", "16"))
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """The process wide pool blocking tool calls run in."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=TOOL_EXECUTOR_WORKERS, thread_name_prefix="tool")
+    return _executor
+
+
+def shutdown_tool_executor() -> None:
+    """Stop the pool, e.g. on shutdown; it is recreated on next use."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call in the tool executor without blocking the event loop.
+
+    The call sees the caller's context variables (callbacks, tracing, cache
+    bypass), like ``asyncio.to_thread``.
+    """
+    return await run_in_executor(get_tool_executor(), partial(copy_context().run, func), *args, **kwargs)
+
+
+def bind_tool_executor(tool: BaseTool) -> BaseTool:
+    """Return ``tool`` with async calls of its sync function run in the tool executor.
+
+    Only function tools without a coroutine are changed (a copy is returned);
+    logged tool classes do the same in ``LoggedToolMixin._arun`` and tools with a
+    native async implementation keep it.
+    """
+    if not isinstance(tool, StructuredTool) or tool.coroutine is not None or tool.func is None:
+        return tool
+
+    @wraps(tool.func)
+    async def coroutine(*args: Any, **kwargs: Any) -> Any:
+        return await run_blocking(tool.func, *args, **kwargs)
+
+    return tool.model_copy(update={"coroutine": coroutine})
@@ -13,4 +13,7 @@ LoggedTavilySearch = create_logged_tool(TavilySearchResults)
 tavily_tool = LoggedTavilySearch(name="planner_tavily_search", max_results=5)
 
 def search(query):
-    return tavily_tool.invoke({"query": query})
\ No newline at end of file
+    return tavily_tool.invoke({"query": query})
+
+async def asearch(query):
+    return await tavily_tool.ainvoke({"query": query})
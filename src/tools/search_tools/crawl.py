@@ -2,7 +2,7 @@ import logging
 from typing import Annotated
 
 from langchain_core.messages import HumanMessage
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from src.tools.decorators import log_io
 
 from src.tools.search_tools.crawler.crawler import Crawler
@@ -13,9 +13,8 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-@tool
 @log_io
-def crawl_tool(
+def crawl(
     url: Annotated[str, "The url to crawl."],
 ) -> HumanMessage:
     """Use this to crawl a url and get a readable content in markdown format."""
@@ -27,3 +26,20 @@ def crawl_tool(
         error_msg = f"Failed to crawl. Error: {repr(e)}"
         logger.error(error_msg)
         return error_msg
+
+
+@log_io
+async def acrawl(
+    url: Annotated[str, "The url to crawl."],
+) -> HumanMessage:
+    """Use this to crawl a url and get a readable content in markdown format."""
+    try:
+        article = await Crawler().acrawl(url)
+        return {"role": "user", "content": article.to_message()}
+    except BaseException as e:
+        error_msg = f"Failed to crawl. Error: {repr(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+
+crawl_tool = StructuredTool.from_function(func=crawl, coroutine=acrawl, name="crawl_tool")
@@ -1,5 +1,6 @@
 import sys
 
+from src.tools.executor import run_blocking
 from src.tools.search_tools.crawler.article import Article
 from .jina_client import JinaClient
 from .readability_extractor import ReadabilityExtractor
@@ -23,3 +24,10 @@ class Crawler:
         article = extractor.extract_article(html)
         article.url = url
         return article
+
+    async def acrawl(self, url: str) -> Article:
+        html = await JinaClient().acrawl(url, return_format="html")
+        # Readability runs a Node.js subprocess, so it stays off the event loop
+        article = await run_blocking(ReadabilityExtractor().extract_article, html)
+        article.url = url
+        return article
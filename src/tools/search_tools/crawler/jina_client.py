@@ -1,13 +1,26 @@
 import logging
 import os
 
+import httpx
 import requests
 
 logger = logging.getLogger(__name__)
 
+# Jina renders the page before answering, which can take a while
+JINA_TIMEOUT = 120
+
 
 class JinaClient:
     def crawl(self, url: str, return_format: str = "html") -> str:
+        response = requests.post("https://r.jina.ai/", headers=self._headers(return_format), json={"url": url})
+        return response.text
+
+    async def acrawl(self, url: str, return_format: str = "html") -> str:
+        async with httpx.AsyncClient(timeout=JINA_TIMEOUT) as client:
+            response = await client.post("https://r.jina.ai/", headers=self._headers(return_format), json={"url": url})
+        return response.text
+
+    def _headers(self, return_format: str) -> dict:
         headers = {
             "Content-Type": "application/json",
             "X-Return-Format": return_format,
@@ -18,6 +31,4 @@ class JinaClient:
             logger.warning(
                 "Jina API key is not set. Provide your own key to access a higher rate limit. See https://jina.ai/reader for more information."
             )
-        data = {"url": url}
-        response = requests.post("https://r.jina.ai/", headers=headers, json=data)
-        return response.text
+        return headers
@@ -0,0 +1,89 @@
+"""
+Import-time profile of the application's modules.
+
+Runs ``python -X importtime`` on a module in a fresh interpreter and summarizes the
+result, so slow startups (e.g. under ``uvicorn --reload``) can be traced back to
+the packages that cause them::
+
+    python -m src.utils.import_profile                  # profiles src.api.app
+    python -m src.utils.import_profile src.agent.graph --top 40
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def run_importtime(module: str) -> List[ImportRecord]:
+    """Import ``module`` in a fresh interpreter and parse its ``-X importtime`` output."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    records = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            # Nested imports are indented by two spaces per level
+            records.append(ImportRecord(name, int(self_us), int(cumulative_us), len(indent) // 2))
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        raise RuntimeError(f"Importing {module} failed: {error[-1] if error else result.returncode}")
+    return records
+
+
+def summarize(records: List[ImportRecord]) -> Dict[str, int]:
+    """Total self time per top-level package, in microseconds."""
+    totals: Dict[str, int] = defaultdict(int)
+    for record in records:
+        totals[record.module.split(".")[0]] += record.self_us
+    return dict(totals)
+
+
+def print_report(module: str, records: List[ImportRecord], top: int) -> None:
+    total_us = sum(record.self_us for record in records)
+    print(f"Import profile for {module}: {total_us / 1e6:.2f}s across {len(records)} modules\n")
+
+    print(f"Top {top} packages by self time:")
+    for package, self_us in sorted(summarize(records).items(), key=lambda x: -x[1])[:top]:
+        print(f"  {self_us / 1e3:10.1f} ms  {100 * self_us / max(total_us, 1):5.1f}%  {package}")
+
+    print(f"\nTop {top} project modules by cumulative time:")
+    own = [record for record in records if record.module.split(".")[0] == "src"]
+    for record in sorted(own, key=lambda x: -x.cumulative_us)[:top]:
+        print(f"  {record.cumulative_us / 1e3:10.1f} ms  {record.module}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show what makes importing a module slow")
+    parser.add_argument("module", nargs="?", default="src.api.app", help="module to import")
+    parser.add_argument("--top", type=int, default=20, help="number of rows per table")
+    args = parser.parse_args()
+
+    try:
+        records = run_importtime(args.module)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    print_report(args.module, records, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Microbenchmark of the supervisor's per-hop message preparation.
+
+Compares deep-copying the history to wrap team member responses (the previous
+approach) with ``format_member_responses``, on synthetic histories of agent
+reports, tool-sized outputs and inline images::
+
+    python -m src.utils.message_benchmark
+    python -m src.utils.message_benchmark --sizes 50 200 1000 --repeat 20
+"""
+
+import argparse
+import base64
+import os
+import time
+from copy import deepcopy
+from typing import Callable, List
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from src.agent.agents.supervisor import RESPONSE_FORMAT, format_member_responses
+from src.config.team import TEAM_MEMBERS
+
+IMAGE_URL = "data:image/png;base64," + base64.b64encode(os.urandom(96 * 1024)).decode()
+
+
+def make_history(size: int) -> List[BaseMessage]:
+    """A session of ``size`` messages in the shape the graph produces."""
+    messages: List[BaseMessage] = []
+    for i in range(size):
+        if i % 10 == 0:
+            messages.append(HumanMessage(
+                content=[
+                    {"type": "text", "text": f"Request {i}"},
+                    {"type": "image_url", "image_url": {"url": IMAGE_URL}},
+                ],
+                id=f"user-{i}",
+            ))
+        elif i % 3 == 0:
+            messages.append(AIMessage(content="Thinking " * 50, id=f"ai-{i}"))
+        else:
+            agent = TEAM_MEMBERS[i % len(TEAM_MEMBERS)]
+            messages.append(HumanMessage(content=f"# Findings {i}\n\n" + "result " * 1500, name=agent, id=f"{agent}-{i}"))
+    return messages
+
+
+def deepcopy_member_responses(messages: list) -> list:
+    """The previous supervisor code: copy everything, then rewrap in place."""
+    messages = deepcopy(messages)
+    for message in messages:
+        if isinstance(message, BaseMessage) and message.name in TEAM_MEMBERS:
+            message.content = RESPONSE_FORMAT.format(message.name, message.content)
+    return messages
+
+
+def time_per_hop(prepare: Callable[[list], list], messages: list, repeat: int) -> float:
+    """Average seconds per call of ``prepare``, after a warm-up call."""
+    prepare(messages)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        prepare(messages)
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the supervisor's message preparation per hop")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000], help="history lengths")
+    parser.add_argument("--repeat", type=int, default=10, help="hops timed per history length")
+    args = parser.parse_args()
+
+    print(f"{'messages':>10}  {'deepcopy':>12}  {'cached':>12}  {'speedup':>8}")
+    for size in args.sizes:
+        messages = make_history(size)
+        before = time_per_hop(deepcopy_member_responses, messages, args.repeat)
+        after = time_per_hop(format_member_responses, messages, args.repeat)
+        print(f"{size:>10}  {before * 1e3:>9.2f} ms  {after * 1e3:>9.3f} ms  {before / max(after, 1e-9):>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Locks shared by every process of the API.
+
+With several API workers, each process runs its own agents, but some of what
+they drive exists once per machine: the browser agent uses one Chrome debugging
+session and the computer agent the one desktop. Their nodes hold a lock file in
+``LOCK_DIR`` while they run, so at most one browser and one computer step runs at
+a time across all workers, however the requests were spread over them.
+
+The same locks elect a single worker for housekeeping such as checkpoint
+compaction.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+from dotenv import load_dotenv
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LOCK_DIR = os.getenv("LOCK_DIR", "history/locks")
+
+# Seconds between attempts while waiting for a lock without blocking on it
+LOCK_POLL_INTERVAL = 0.5
+
+
+class FileLock:
+    """Exclusive lock on a file, held by one open handle at a time.
+
+    The lock is released when the handle is closed, including when its process
+    dies, so a crashed worker never leaves a stale lock behind. Two handles
+    conflict even within one process, so threads and tasks are serialized too.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    @property
+    def locked(self) -> bool:
+        return self._file is not None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; without ``blocking``, return False if another handle holds it."""
+        if self._file is not None:
+            raise RuntimeError(f"Lock {self.path} is already held by this handle")
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        file = open(self.path, "a+b")
+        try:
+            if os.name == "nt":
+                file.seek(0)
+                # LK_LOCK gives up after ten seconds, so blocking waits poll instead
+                while True:
+                    try:
+                        msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            file.close()
+                            return False
+                        time.sleep(LOCK_POLL_INTERVAL)
+            else:
+                try:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    file.close()
+                    return False
+        except BaseException:
+            file.close()
+            raise
+        self._file = file
+        return True
+
+    def release(self) -> None:
+        file, self._file = self._file, None
+        if file is None:
+            return
+        try:
+            if os.name == "nt":
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+        finally:
+            file.close()
+
+
+def lock_path(name: str) -> str:
+    return os.path.join(LOCK_DIR, f"{name}.lock")
+
+
+@contextmanager
+def exclusive(name: str) -> Iterator[None]:
+    """Hold the machine wide lock ``name``, waiting for it if needed."""
+    lock = FileLock(lock_path(name))
+    if not lock.acquire(blocking=False):
+        logger.info(f"Waiting for {name} lock held by another run")
+        lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+@asynccontextmanager
+async def aexclusive(name: str) -> AsyncIterator[None]:
+    """Async version of ``exclusive`` that waits without blocking the event loop."""
+    lock = FileLock(lock_path(name))
+    if not lock.acquire(blocking=False):
+        logger.info(f"Waiting for {name} lock held by another run")
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+@contextmanager
+def try_exclusive(name: str) -> Iterator[bool]:
+    """Hold the lock ``name`` if it is free; yields whether it was acquired."""
+    lock = FileLock(lock_path(name))
+    acquired = lock.acquire(blocking=False)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
@@ -1,10 +1,10 @@
-from src.agent.graph import build_graph
+from src.agent.graph import get_graph
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
-graph = build_graph()
+graph = get_graph()
 
 def save_graph():
     output_dir = Path("../../")
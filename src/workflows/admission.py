@@ -0,0 +1,265 @@
+"""
+Admission control for streamed chat requests.
+
+Every request to ``/api/chat/stream`` takes a ticket before its workflow runs. A
+ticket counts against the client's limit (``ADMISSION_MAX_PER_CLIENT`` concurrent
+requests) and holds a slot in one of two lanes:
+
+- ``reply``: the coordinator's turn, which is one cheap LLM call and often the
+  whole answer (greetings, small talk). Every request starts here.
+- ``workflow``: planning and the team's steps. A request moves to this lane when
+  the coordinator hands off to the planner, giving up its reply slot first.
+
+Each lane has its own concurrency limit, so conversational replies never wait
+behind full workflows. When a lane is full, requests wait in a FIFO queue of at
+most ``ADMISSION_MAX_QUEUE`` entries and get ``queue_status`` events with their
+position and an ETA based on how long slots of that lane are held. Requests over
+the client limit or finding the queue full are rejected.
+
+Limits apply per API worker process.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from dotenv import load_dotenv
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langgraph.config import get_config
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "True") == "True"
+ADMISSION_MAX_REPLIES = int(os.getenv("ADMISSION_MAX_REPLIES", "32"))
+ADMISSION_MAX_WORKFLOWS = int(os.getenv("ADMISSION_MAX_WORKFLOWS", "4"))
+ADMISSION_MAX_PER_CLIENT = int(os.getenv("ADMISSION_MAX_PER_CLIENT", "2"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "50"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "600"))
+
+# Seconds between queue_status events of a waiting request
+STATUS_INTERVAL = 2.0
+# Weight of the latest slot hold time in the average used for ETAs
+HOLD_TIME_SMOOTHING = 0.2
+
+REPLY_LANE = "reply"
+WORKFLOW_LANE = "workflow"
+
+# Key of the run's ticket in the graph config's "configurable"
+TICKET_CONFIG_KEY = "admission_ticket"
+
+
+class AdmissionRejected(Exception):
+    """A request was turned away; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: int = 10):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Lane:
+    """Concurrency limit with a bounded FIFO wait queue."""
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.rejected = 0
+        # Average seconds a slot is held, None until one has been released
+        self.avg_hold: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def check_capacity(self) -> None:
+        """Raise if a new request could neither run nor queue right now."""
+        if self.active >= self.limit and len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(f"The {self.name} queue is full", retry_after=self.retry_after())
+
+    def retry_after(self) -> int:
+        return max(1, round(self.avg_hold or STATUS_INTERVAL * 5))
+
+    def status(self, waiter: asyncio.Future) -> Dict[str, Any]:
+        position = self._waiters.index(waiter) + 1
+        eta = None
+        if self.avg_hold is not None:
+            # Slots free up `limit` at a time on average
+            eta = round(position * self.avg_hold / self.limit, 1)
+        return {"lane": self.name, "position": position, "queue_length": len(self._waiters), "eta_s": eta}
+
+    async def acquire(self) -> AsyncIterator[Dict[str, Any]]:
+        """Take a slot, yielding a status every STATUS_INTERVAL seconds while queued."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        self.check_capacity()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        deadline = time.monotonic() + ADMISSION_QUEUE_TIMEOUT
+        try:
+            while True:
+                yield self.status(waiter)
+                timeout = min(STATUS_INTERVAL, deadline - time.monotonic())
+                if timeout <= 0:
+                    self.rejected += 1
+                    raise AdmissionRejected(f"Timed out waiting in the {self.name} queue")
+                done, _ = await asyncio.wait({waiter}, timeout=timeout)
+                if done:
+                    return
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.release(None)
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, held_since: Optional[float]) -> None:
+        if held_since is not None:
+            held = time.monotonic() - held_since
+            self.avg_hold = held if self.avg_hold is None else (
+                (1 - HOLD_TIME_SMOOTHING) * self.avg_hold + HOLD_TIME_SMOOTHING * held
+            )
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot goes straight to the next request, `active` stays the same
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "rejected": self.rejected,
+            "avg_hold_s": None if self.avg_hold is None else round(self.avg_hold, 2),
+        }
+
+
+class Ticket:
+    """One admitted request; holds at most one lane slot at a time."""
+
+    def __init__(self, controller: "AdmissionController", client_id: str):
+        self.controller = controller
+        self.client_id = client_id
+        self.lane: Optional[Lane] = None
+        self._held_since: Optional[float] = None
+        self._closed = False
+
+    async def enter(self, lane_name: str) -> AsyncIterator[Dict[str, Any]]:
+        """Move to ``lane_name``, yielding queue statuses while waiting for a slot."""
+        lane = self.controller.lanes[lane_name]
+        if self.lane is lane:
+            return
+        self._leave_lane()
+        async for status in lane.acquire():
+            yield status
+        self.lane = lane
+        self._held_since = time.monotonic()
+        if self._closed:
+            # Closed while waiting (client went away); give the slot back
+            self._leave_lane()
+
+    def _leave_lane(self) -> None:
+        if self.lane is not None:
+            self.lane.release(self._held_since)
+            self.lane = None
+            self._held_since = None
+
+    def close(self) -> None:
+        """Release the lane slot and the client's slot; safe to call more than once."""
+        if self._closed:
+            return
+        self._closed = True
+        self._leave_lane()
+        self.controller._client_done(self.client_id)
+
+
+class AdmissionController:
+    """Lanes and per-client limits of one API process."""
+
+    def __init__(
+        self,
+        max_replies: int = ADMISSION_MAX_REPLIES,
+        max_workflows: int = ADMISSION_MAX_WORKFLOWS,
+        max_per_client: int = ADMISSION_MAX_PER_CLIENT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+    ):
+        self.lanes = {
+            REPLY_LANE: Lane(REPLY_LANE, max_replies, max_queue),
+            WORKFLOW_LANE: Lane(WORKFLOW_LANE, max_workflows, max_queue),
+        }
+        self.max_per_client = max_per_client
+        self.rejected_clients = 0
+        self._clients: Dict[str, int] = {}
+
+    def check(self, client_id: str) -> None:
+        """Raise if a new request of ``client_id`` would be rejected right now.
+
+        Raises:
+            AdmissionRejected: When the client already has ``max_per_client``
+                requests running or the reply queue is full.
+        """
+        if self._clients.get(client_id, 0) >= self.max_per_client:
+            self.rejected_clients += 1
+            raise AdmissionRejected(
+                f"Too many concurrent requests from this client (limit {self.max_per_client})",
+                retry_after=self.lanes[REPLY_LANE].retry_after(),
+            )
+        self.lanes[REPLY_LANE].check_capacity()
+
+    def admit(self, client_id: str) -> Ticket:
+        """Take a ticket for a new request of ``client_id``; it must be closed when the request ends.
+
+        Raises:
+            AdmissionRejected: As for ``check``.
+        """
+        self.check(client_id)
+        self._clients[client_id] = self._clients.get(client_id, 0) + 1
+        return Ticket(self, client_id)
+
+    def _client_done(self, client_id: str) -> None:
+        remaining = self._clients.get(client_id, 0) - 1
+        if remaining > 0:
+            self._clients[client_id] = remaining
+        else:
+            self._clients.pop(client_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+            "clients": len(self._clients),
+            "max_per_client": self.max_per_client,
+            "rejected_clients": self.rejected_clients,
+        }
+
+
+async def enter_workflow_lane() -> None:
+    """Wait for a workflow slot before planning, if the run was admitted with a ticket.
+
+    Called by the planner. The ticket comes from the run config
+    (``configurable[TICKET_CONFIG_KEY]``). Queue statuses are sent as
+    ``queue_status`` custom events, which the stream forwards to the client.
+    """
+    ticket = get_config().get("configurable", {}).get(TICKET_CONFIG_KEY)
+    if ticket is None:
+        return
+    async for status in ticket.enter(WORKFLOW_LANE):
+        await adispatch_custom_event("queue_status", status)
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+    return _admission_controller
@@ -0,0 +1,373 @@
+"""
+Batch runner: replays prompts from a JSONL file through the agent graph.
+
+Each input line is a JSON object with the prompt in ``prompt``, ``user_input``,
+``input`` or ``body`` (a ``title`` is put in front of a ``body``), an optional
+``id`` or ``request_id``, and optional ``deep_thinking_mode`` and
+``search_before_planning`` flags. Results are appended to the output JSONL as
+runs finish, one line per prompt with its status, timing and final answer::
+
+    python -m src.workflows.batch requests.jsonl -o results.jsonl --concurrency 4
+
+Prompts already recorded in the output file are skipped, so an interrupted
+batch continues where it stopped; ``--retry-failed`` runs the failed ones again.
+LLM request rates are limited per provider by the ``rate_limits`` section of
+credentials.json.
+
+The API starts batches as background jobs (``BatchJobs``), each with its input
+and results under ``BATCH_JOBS_DIR/<job id>/``.
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from src.workflows.sessions import SessionManager, get_session_manager
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BATCH_JOBS_DIR = os.getenv("BATCH_JOBS_DIR", "history/batches")
+
+PROMPT_FIELDS = ("prompt", "user_input", "input", "body")
+
+
+@dataclass
+class BatchItem:
+    id: str
+    prompt: str
+    deep_thinking_mode: bool = False
+    search_before_planning: bool = False
+
+
+@dataclass
+class BatchSummary:
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    duration_s: float = 0.0
+
+
+def parse_item(record: Dict[str, Any], line_number: int) -> BatchItem:
+    """Build a batch item from one input record.
+
+    Raises:
+        ValueError: When the record has no prompt.
+    """
+    field = next((name for name in PROMPT_FIELDS if record.get(name)), None)
+    if field is None:
+        raise ValueError(f"Line {line_number} has no prompt (expected one of {', '.join(PROMPT_FIELDS)})")
+    prompt = str(record[field])
+    if field == "body" and record.get("title"):
+        prompt = f"{record['title']}\n\n{prompt}"
+    return BatchItem(
+        id=str(record.get("id") or record.get("request_id") or line_number),
+        prompt=prompt,
+        deep_thinking_mode=bool(record.get("deep_thinking_mode", False)),
+        search_before_planning=bool(record.get("search_before_planning", False)),
+    )
+
+
+def read_items(path: str) -> Iterator[BatchItem]:
+    """Stream batch items from a JSONL file, skipping blank lines."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            if line.strip():
+                yield parse_item(json.loads(line), line_number)
+
+
+def completed_ids(path: str, include_failed: bool = False) -> Set[str]:
+    """Ids already recorded in an output file (only successful ones unless ``include_failed``)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash; that run is simply repeated
+                continue
+            if record.get("status") == "ok" or include_failed:
+                done.add(str(record.get("id")))
+    return done
+
+
+def _ends_mid_line(path: str) -> bool:
+    with open(path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        if file.tell() == 0:
+            return False
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) != b"\n"
+
+
+def _result_record(item: BatchItem, thread_id: str, started: float, result: Optional[Dict[str, Any]],
+                   error: Optional[BaseException]) -> Dict[str, Any]:
+    record = {
+        "id": item.id,
+        "status": "ok" if error is None else "error",
+        "thread_id": thread_id,
+        "started_at": datetime.fromtimestamp(started, timezone.utc).isoformat(),
+        "duration_s": round(time.time() - started, 3),
+    }
+    if error is not None:
+        record["error"] = f"{type(error).__name__}: {error}"
+    else:
+        messages = result.get("messages", [])
+        record["full_plan"] = result.get("full_plan")
+        record["message_count"] = len(messages)
+        record["response"] = messages[-1].content if messages else None
+    return record
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 4,
+    retry_failed: bool = False,
+    sessions: Optional[SessionManager] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> BatchSummary:
+    """Run every prompt of ``input_path`` through the agent graph.
+
+    Args:
+        input_path: JSONL file of prompts.
+        output_path: JSONL file the results are appended to; also read to skip
+            prompts that already ran.
+        concurrency: Number of workflows running at the same time.
+        retry_failed: Run prompts again whose recorded run failed.
+        sessions: Session manager to run the workflows with.
+        on_result: Called with every result record as it is written.
+
+    Returns:
+        Counts of succeeded, failed and skipped prompts and the total time.
+    """
+    sessions = sessions or get_session_manager()
+    done = completed_ids(output_path, include_failed=not retry_failed)
+    summary = BatchSummary()
+    started = time.time()
+    write_lock = threading.Lock()
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    def run_item(item: BatchItem) -> None:
+        thread_id = f"batch-{item.id}-{int(time.time() * 1000)}"
+        item_started = time.time()
+        result, error = None, None
+        try:
+            result = sessions.run(
+                sessions.create(thread_id),
+                item.prompt,
+                deep_thinking_mode=item.deep_thinking_mode,
+                search_before_planning=item.search_before_planning,
+            )
+        except Exception as e:
+            logger.error(f"Batch item {item.id} failed: {e}")
+            error = e
+        finally:
+            sessions.close(thread_id)
+        record = _result_record(item, thread_id, item_started, result, error)
+        with write_lock:
+            output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+            if error is None:
+                summary.succeeded += 1
+            else:
+                summary.failed += 1
+        if on_result is not None:
+            on_result(record)
+
+    with open(output_path, "a", encoding="utf-8") as output, ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="batch"
+    ) as executor:
+        if _ends_mid_line(output_path):
+            # End the line a crash cut short, so the first new result is not glued to it
+            output.write("\n")
+        # Only `concurrency` items are read ahead, so the input can be arbitrarily large
+        pending: Set[Future] = set()
+        for item in read_items(input_path):
+            if item.id in done:
+                summary.skipped += 1
+                continue
+            if len(pending) >= concurrency:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending.add(executor.submit(run_item, item))
+        wait(pending)
+
+    summary.duration_s = round(time.time() - started, 3)
+    return summary
+
+
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+@dataclass
+class BatchJob:
+    id: str
+    total: int
+    concurrency: int
+    retry_failed: bool = False
+    # pending, running, done, error, or interrupted for a job of an earlier process
+    status: str = "pending"
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def input_path(self) -> str:
+        return os.path.join(BATCH_JOBS_DIR, self.id, "input.jsonl")
+
+    @property
+    def output_path(self) -> str:
+        return os.path.join(BATCH_JOBS_DIR, self.id, "results.jsonl")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class BatchJobs:
+    """Batches run in the background of the API process, one thread per job."""
+
+    def __init__(self, sessions: Optional[SessionManager] = None):
+        self.sessions = sessions
+        self._jobs: Dict[str, BatchJob] = {}
+        self._lock = threading.Lock()
+
+    def start(self, records: List[Dict[str, Any]], concurrency: int = 4) -> BatchJob:
+        """Write ``records`` to a new job's input file and start running them.
+
+        Raises:
+            ValueError: When a record has no prompt.
+        """
+        items = [parse_item(record, line_number) for line_number, record in enumerate(records, start=1)]
+        job = BatchJob(id=uuid.uuid4().hex, total=len(items), concurrency=concurrency)
+        os.makedirs(os.path.dirname(job.input_path), exist_ok=True)
+        with open(job.input_path, "w", encoding="utf-8") as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        with self._lock:
+            self._jobs[job.id] = job
+        self._run(job)
+        return job
+
+    def resume(self, job_id: str, retry_failed: bool = False, concurrency: Optional[int] = None) -> BatchJob:
+        """Run the prompts of a job that have no result yet, e.g. after a restart.
+
+        Raises:
+            KeyError: When there is no such job.
+            RuntimeError: When the job is still running.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id) or self._load(job_id)
+            if job.status in ("pending", "running"):
+                raise RuntimeError(f"Batch job {job_id} is still running")
+            job.status = "pending"
+            job.retry_failed = retry_failed
+            job.concurrency = concurrency or job.concurrency
+            job.succeeded = job.failed = 0
+            # Prompts with a result are not run again
+            job.skipped = len(completed_ids(job.output_path, include_failed=not retry_failed))
+            job.error = job.finished_at = None
+            self._jobs[job_id] = job
+        self._run(job)
+        return job
+
+    def get(self, job_id: str) -> BatchJob:
+        """Return a job of this process, or one found on disk from an earlier run.
+
+        Raises:
+            KeyError: When there is no such job.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._jobs[job_id] = self._load(job_id)
+            return job
+
+    def _load(self, job_id: str) -> BatchJob:
+        if not _JOB_ID.fullmatch(job_id) or not os.path.exists(os.path.join(BATCH_JOBS_DIR, job_id, "input.jsonl")):
+            raise KeyError(job_id)
+        job = BatchJob(id=job_id, total=0, concurrency=4)
+        job.total = sum(1 for _ in read_items(job.input_path))
+        done = completed_ids(job.output_path, include_failed=True)
+        job.succeeded = len(completed_ids(job.output_path))
+        job.failed = len(done) - job.succeeded
+        job.status = "done" if len(done) >= job.total else "interrupted"
+        return job
+
+    def _run(self, job: BatchJob) -> None:
+        def on_result(record: Dict[str, Any]) -> None:
+            with self._lock:
+                if record["status"] == "ok":
+                    job.succeeded += 1
+                else:
+                    job.failed += 1
+
+        def run() -> None:
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                summary = run_batch(
+                    job.input_path, job.output_path, job.concurrency, job.retry_failed, self.sessions, on_result
+                )
+                job.skipped = summary.skipped
+                job.status = "done"
+            except Exception as e:
+                logger.error(f"Batch job {job.id} failed: {e}")
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = "error"
+            finally:
+                job.finished_at = time.time()
+
+        threading.Thread(target=run, name=f"batch-job-{job.id[:8]}", daemon=True).start()
+
+
+_batch_jobs: Optional[BatchJobs] = None
+
+
+def get_batch_jobs() -> BatchJobs:
+    """Return the process wide batch job registry, creating it on first use."""
+    global _batch_jobs
+    if _batch_jobs is None:
+        _batch_jobs = BatchJobs()
+    return _batch_jobs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run prompts from a JSONL file through the agent workflow")
+    parser.add_argument("input", help="JSONL file of prompts")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="workflows run at the same time")
+    parser.add_argument("--retry-failed", action="store_true", help="run prompts again whose last run failed")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def report(record: Dict[str, Any]) -> None:
+        sys.stdout.write(f"[{record['status']}] {record['id']} in {record['duration_s']}s\n")
+
+    summary = run_batch(args.input, args.output, args.concurrency, args.retry_failed, on_result=report)
+    sys.stdout.write(
+        f"Done in {summary.duration_s}s: {summary.succeeded} succeeded, "
+        f"{summary.failed} failed, {summary.skipped} skipped\n"
+    )
+
+
+if __name__ == "__main__":
+    main()
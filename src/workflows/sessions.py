@@ -0,0 +1,179 @@
+"""
+Conversation sessions for the synchronous (CLI and batch) workflow.
+
+Every session is one graph thread. When the graph has a checkpointer the thread's
+state lives there and each turn only sends the new user message; without one the
+session keeps its messages itself. Turns of one session run one at a time, while
+different sessions can run concurrently from several threads.
+
+Sessions idle for ``SESSION_TTL`` seconds, or beyond the ``SESSION_MAX`` most
+recently used, are forgotten by the manager. Their checkpointed state stays (and
+is subject to the checkpointer's own retention), so they can still be resumed.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from src.config.team import TEAM_MEMBER_CONFIGRATIONS, TEAM_MEMBERS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SESSION_MAX = int(os.getenv("SESSION_MAX", "100"))
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+
+
+@dataclass
+class Session:
+    thread_id: str
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    # Messages sent with the next turn: the whole history without a checkpointer,
+    # the history a fork was copied from until its first turn otherwise
+    messages: List[Any] = field(default_factory=list)
+    forked_from: Optional[str] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": self.thread_id}}
+
+
+class SessionManager:
+    """Per-thread conversation state on top of a compiled agent graph."""
+
+    def __init__(self, graph=None, max_sessions: int = SESSION_MAX, ttl: float = SESSION_TTL):
+        self._graph = graph
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            from src.agent.graph import get_graph
+
+            self._graph = get_graph()
+        return self._graph
+
+    @property
+    def checkpointed(self) -> bool:
+        return self.graph.checkpointer is not None
+
+    # Session lookup
+
+    def _add(self, session: Session) -> Session:
+        with self._lock:
+            self._sessions[session.thread_id] = session
+            self._evict()
+        return session
+
+    def _evict(self) -> None:
+        """Forget idle sessions and the least recently used ones over the limit."""
+        now = time.time()
+        for thread_id, session in list(self._sessions.items()):
+            if self.ttl > 0 and now - session.last_used > self.ttl and not session.lock.locked():
+                del self._sessions[thread_id]
+        while len(self._sessions) > self.max_sessions:
+            thread_id, _ = self._sessions.popitem(last=False)
+            logger.info(f"Evicted session {thread_id}")
+
+    def create(self, thread_id: Optional[str] = None) -> Session:
+        """Start a new session, with a random thread id unless one is given."""
+        return self._add(Session(thread_id=thread_id or str(uuid.uuid4())))
+
+    def get(self, thread_id: str) -> Session:
+        """The session of ``thread_id``, created if it does not exist yet."""
+        with self._lock:
+            session = self._sessions.get(thread_id)
+            if session is not None:
+                self._sessions.move_to_end(thread_id)
+                return session
+        return self.create(thread_id)
+
+    def resume(self, thread_id: str) -> Session:
+        """Continue an existing conversation.
+
+        Raises:
+            KeyError: When there is no conversation with this thread id.
+        """
+        with self._lock:
+            if thread_id in self._sessions:
+                self._sessions.move_to_end(thread_id)
+                return self._sessions[thread_id]
+        if not (self.checkpointed and self.graph.get_state(Session(thread_id).config).values):
+            raise KeyError(f"No conversation found for thread {thread_id}")
+        return self.create(thread_id)
+
+    def fork(self, thread_id: str, new_thread_id: Optional[str] = None) -> Session:
+        """Start a new session that continues from a copy of another one's history."""
+        source = self.resume(thread_id)
+        with source.lock:
+            messages = list(source.messages)
+            if self.checkpointed:
+                messages = list(self.graph.get_state(source.config).values.get("messages", [])) + messages
+        session = self.create(new_thread_id)
+        session.messages = messages
+        session.forked_from = thread_id
+        return session
+
+    def close(self, thread_id: str, delete: bool = False) -> None:
+        """Forget a session, and with ``delete`` also its checkpointed state."""
+        with self._lock:
+            self._sessions.pop(thread_id, None)
+        if delete and self.checkpointed:
+            self.graph.checkpointer.delete_thread(thread_id)
+
+    def sessions(self) -> List[Session]:
+        with self._lock:
+            self._evict()
+            return list(self._sessions.values())
+
+    # Running turns
+
+    def run(
+        self,
+        session: Session,
+        user_input: str,
+        deep_thinking_mode: bool = False,
+        search_before_planning: bool = False,
+    ) -> Dict[str, Any]:
+        """Run one turn of ``session`` and return the final graph state."""
+        with session.lock:
+            result = self.graph.invoke(
+                {
+                    "TEAM_MEMBERS": TEAM_MEMBERS,
+                    "TEAM_MEMBER_CONFIGRATIONS": TEAM_MEMBER_CONFIGRATIONS,
+                    "messages": session.messages + [{"role": "user", "content": user_input}],
+                    "deep_thinking_mode": deep_thinking_mode,
+                    "search_before_planning": search_before_planning,
+                },
+                config=session.config,
+            )
+            # The checkpointer has the history now; without one the session keeps it
+            session.messages = [] if self.checkpointed else result.get("messages", [])
+            session.last_used = time.time()
+        return result
+
+
+_session_manager: Optional[SessionManager] = None
+_session_manager_lock = threading.Lock()
+
+
+def get_session_manager() -> SessionManager:
+    global _session_manager
+    if _session_manager is None:
+        with _session_manager_lock:
+            if _session_manager is None:
+                _session_manager = SessionManager()
+    return _session_manager
@@ -1,7 +1,7 @@
 import logging
 from langchain import hub
 from dotenv import load_dotenv
-from src.config.llm import single_agent_llm
+from src.config.llm import get_llm
 from langchain.agents import AgentExecutor, create_structured_chat_agent
 from langchain_core.messages import HumanMessage, AIMessage
 from src.tools.single_agent import tools
@@ -25,22 +25,23 @@ chat = [
     HumanMessage(content=get_prompt_template('single_agent')),
 ]
 
-agent = create_structured_chat_agent(
-    llm=single_agent_llm, 
-    tools=tools, 
-    prompt=prompt
-)
 
-app = AgentExecutor(
-    agent=agent, 
-    tools=tools, 
-    verbose=True,
-    handle_parsing_errors=True,
-)
+def build_app() -> AgentExecutor:
+    """Build the agent executor, with the model as currently configured."""
+    agent = create_structured_chat_agent(
+        llm=get_llm("single_agent_llm"),
+        tools=tools,
+        prompt=prompt
+    )
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=True,
+        handle_parsing_errors=True,
+    )
 
 def run_agent_workflow(user_input: str, debug: bool = False):
     global chat
-    global app
     if not user_input:
         raise ValueError("Input could not be empty")
 
@@ -48,7 +49,7 @@ def run_agent_workflow(user_input: str, debug: bool = False):
         enable_debug_logging()
 
     logger.info(f"Starting workflow with user input: {user_input}")
-    result = app.invoke(
+    result = build_app().invoke(
         {
             "input": user_input,
             "chat_history": chat
@@ -1,14 +1,29 @@
 import asyncio
 import logging
-from typing import Dict, List, Any, Generator, Optional
+import os
+from typing import TYPE_CHECKING, AsyncIterator, Dict, FrozenSet, List, Any, Generator, Optional
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage
+from langgraph.graph.message import add_messages
 
 from src.config.team import TEAM_MEMBERS, TEAM_MEMBER_CONFIGRATIONS
-from src.agent.graph import build_graph
+from src.agent.graph import get_graph
+from src.config.llm_cache import bypass_llm_cache
 from langchain_community.adapters.openai import convert_message_to_dict
-from src.config.constants import STREAMING_LLM_AGENTS, EventType
+from src.config.constants import CLIENT_CUSTOM_EVENTS, STREAMING_LLM_AGENTS, EventType
+from src.workflows.admission import TICKET_CONFIG_KEY
 import uuid
 
-from src.tools.browse_tools.browser import browser_tool
+load_dotenv()
+
+# Stream the coordinator's turn before (and usually instead of) running the graph
+COORDINATOR_FAST_PATH = os.getenv("COORDINATOR_FAST_PATH", "True") == "True"
+
+if TYPE_CHECKING:
+    # browser_use is heavy, only import it for type checking
+    from src.tools.browse_tools.browser import browser_tool
+    from src.workflows.admission import Ticket
 
 # Configure logging
 logging.basicConfig(
@@ -24,11 +39,8 @@ def enable_debug_logging():
 
 logger = logging.getLogger(__name__)
 
-# Create the graph
-graph = build_graph()
-
 # Global variable to track current browser tool instance
-current_browser_tool: Optional[browser_tool] = None
+current_browser_tool: Optional["browser_tool"] = None
 
 
 async def run_agent_workflow(
@@ -38,6 +50,8 @@ async def run_agent_workflow(
     search_before_planning: Optional[bool] = False,
     team_members: Optional[list] = None,
     thread_id: Optional[str] = "default",
+    bypass_cache: Optional[bool] = False,
+    admission_ticket: Optional["Ticket"] = None,
 ):
     """Run the agent workflow to process and respond to user input messages.
 
@@ -56,6 +70,10 @@ async def run_agent_workflow(
             If None, uses default TEAM_MEMBERS configuration
         thread_id: Optional string identifier for maintaining conversation context.
             If not provided, defaults to "default"
+        bypass_cache: If True, no LLM call of this run is answered from the LLM
+            response cache
+        admission_ticket: Admission ticket of the request; the planner moves it to
+            the workflow lane when the coordinator hands off
 
     Returns:
         Yields various event dictionaries containing workflow state and progress information,
@@ -76,42 +94,62 @@ async def run_agent_workflow(
     workflow_id = str(uuid.uuid4())
 
     team_members = team_members if team_members else TEAM_MEMBERS
+    # Nodes whose tool calls are streamed; checked for every event, so a set
+    tool_nodes = frozenset(team_members) | {"planner"}
 
     # Reset flag at the start of each workflow
     is_workflow_triggered = False
     last_event_data = None
 
+    graph = get_graph()
+    config = {"configurable": {"thread_id": thread_id, TICKET_CONFIG_KEY: admission_ticket}}
+    graph_input = {
+        "TEAM_MEMBERS": team_members,
+        "TEAM_MEMBER_CONFIGRATIONS": TEAM_MEMBER_CONFIGRATIONS,
+        "messages": [user_input_messages[-1]],
+        "deep_thinking_mode": deep_thinking_mode,
+        "search_before_planning": search_before_planning,
+        "handoff_to_planner": False,
+    }
+
     try:
-        async for event in graph.astream_events(
-            {
-                "TEAM_MEMBERS": team_members,
-                "TEAM_MEMBER_CONFIGRATIONS": TEAM_MEMBER_CONFIGRATIONS,
-                "messages": [user_input_messages[-1]],
-                "deep_thinking_mode": deep_thinking_mode,
-                "search_before_planning": search_before_planning,
-            },
-            config={"configurable": {"thread_id": thread_id}},
-            version="v2",
-        ):
-            kind, data, name, node, langgraph_step, run_id = _extract_event_data(event)
-            last_event_data = data
-
-            # Process events and generate output data
-            for ydata in _process_event(
-                kind,
-                data,
-                name,
-                node,
-                workflow_id,
-                langgraph_step,
-                run_id,
-                user_input_messages,
-                team_members,
-            ):
-                if ydata:
-                    if ydata.get("event") == "start_of_workflow":
-                        is_workflow_triggered = True
+        # Fresh answers when asked for, e.g. when the user regenerates a response
+        with bypass_llm_cache(bypass_cache):
+            if COORDINATOR_FAST_PATH:
+                fast_path = CoordinatorFastPath(graph, config, graph_input, workflow_id, user_input_messages)
+                async for ydata in fast_path.run():
                     yield ydata
+                if not fast_path.handed_off:
+                    for final_event in _generate_final_events(
+                        workflow_id, {"output": fast_path.final_state}, False
+                    ):
+                        yield final_event
+                    return
+                graph_input["handoff_to_planner"] = True
+
+            async for event in graph.astream_events(graph_input, config=config, version="v2"):
+                kind, data, name, node, langgraph_step, run_id = _extract_event_data(event)
+                last_event_data = data
+                if graph_input["handoff_to_planner"] and "coordinator" in (name, node):
+                    # The fast path already streamed the coordinator's turn
+                    continue
+
+                # Process events and generate output data
+                for ydata in _process_event(
+                    kind,
+                    data,
+                    name,
+                    node,
+                    workflow_id,
+                    langgraph_step,
+                    run_id,
+                    user_input_messages,
+                    tool_nodes,
+                ):
+                    if ydata:
+                        if ydata.get("event") == "start_of_workflow":
+                            is_workflow_triggered = True
+                        yield ydata
     except asyncio.CancelledError:
         logger.info("Workflow cancelled, terminating browser agent if exists")
         global current_browser_tool
@@ -126,6 +164,93 @@ async def run_agent_workflow(
         yield final_event
 
 
+class CoordinatorFastPath:
+    """The coordinator's turn, streamed without the graph.
+
+    Most conversational turns end with the coordinator (greetings, small talk,
+    refusals), so its reply is streamed straight from the LLM and only a
+    ``handoff_to_planner`` call starts the graph. That spares those turns the
+    graph's setup and event overhead, and puts the first token one LLM call away.
+    The events sent are the ones the graph run would have sent for the
+    coordinator, and its reply is checkpointed like the graph would have.
+    """
+
+    def __init__(
+        self,
+        graph: Any,
+        config: Dict[str, Any],
+        graph_input: Dict[str, Any],
+        workflow_id: str,
+        user_input_messages: List[Dict[str, Any]],
+    ):
+        self.graph = graph
+        self.config = config
+        self.graph_input = graph_input
+        self.workflow_id = workflow_id
+        self.user_input_messages = user_input_messages
+        self.handed_off = False
+        # Conversation state after the turn, when the coordinator answered itself
+        self.final_state: Optional[Dict[str, Any]] = None
+
+    async def run(self) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the coordinator's events; check ``handed_off`` once it is done."""
+        from src.agent.agents.coordinator import astream_coordinator
+
+        previous = {}
+        last_step = None
+        if self.graph.checkpointer is not None:
+            snapshot = await self.graph.aget_state(self.config)
+            previous = snapshot.values
+            last_step = (snapshot.metadata or {}).get("step")
+        user_message = add_messages([], self.graph_input["messages"])
+        state = {
+            **previous,
+            **self.graph_input,
+            "messages": add_messages(previous.get("messages", []), user_message),
+        }
+
+        step = _coordinator_step(last_step)
+        for ydata in _handle_chain_start("coordinator", self.workflow_id, step, self.user_input_messages):
+            yield ydata
+        for ydata in _handle_chat_model_start("coordinator"):
+            yield ydata
+        content = ""
+        async for chunk in astream_coordinator(state):
+            # A chunk can carry the last of the text along with the handoff call
+            if isinstance(chunk.content, str):
+                content += chunk.content
+            for ydata in _handle_chat_model_stream({"chunk": chunk}, "coordinator"):
+                yield ydata
+            if chunk.tool_call_chunks:
+                self.handed_off = True
+        for ydata in _handle_chat_model_end("coordinator"):
+            yield ydata
+        for ydata in _handle_chain_end("coordinator", self.workflow_id, step):
+            yield ydata
+
+        if self.handed_off:
+            logger.info("Coordinator handed off to the planner, starting the workflow graph")
+            return
+        reply = AIMessage(content=content, name="coordinator")
+        if self.graph.checkpointer is not None:
+            await self.graph.aupdate_state(
+                self.config,
+                {**self.graph_input, "messages": user_message + [reply]},
+                as_node="coordinator",
+            )
+        self.final_state = {**state, "messages": state["messages"] + [reply]}
+
+
+def _coordinator_step(last_step: Optional[int]) -> str:
+    """The langgraph_step a graph run on the thread would report for the coordinator.
+
+    A run writes its input one step after the thread's last checkpoint (at -1 on
+    a new thread), runs ``__start__`` next and the coordinator after that.
+    """
+    input_step = -1 if last_step is None else last_step + 1
+    return str(input_step + 2)
+
+
 def _extract_event_data(
     event: Dict[str, Any],
 ) -> tuple[str, Dict[str, Any], str, str, str, str]:
@@ -159,11 +284,16 @@ def _process_event(
     langgraph_step: str,
     run_id: str,
     user_input_messages: List[Dict[str, Any]],
-    team_members: Optional[List[str]],
+    tool_nodes: FrozenSet[str],
 ) -> Generator[Dict[str, Any], None, None]:
     """Process events and return corresponding output data"""
+    # Handle chat model stream events, by far the most frequent
+    if kind == EventType.CHAT_MODEL_STREAM.value:
+        if node in STREAMING_LLM_AGENTS:
+            yield from _handle_chat_model_stream(data, node)
+
     # Handle chain start events
-    if kind == EventType.CHAIN_START.value and name in STREAMING_LLM_AGENTS:
+    elif kind == EventType.CHAIN_START.value and name in STREAMING_LLM_AGENTS:
         yield from _handle_chain_start(
             name, workflow_id, langgraph_step, user_input_messages
         )
@@ -180,18 +310,18 @@ def _process_event(
     elif kind == EventType.CHAT_MODEL_END.value and node in STREAMING_LLM_AGENTS:
         yield from _handle_chat_model_end(node)
 
-    # Handle chat model stream events
-    elif kind == EventType.CHAT_MODEL_STREAM.value and node in STREAMING_LLM_AGENTS:
-        yield from _handle_chat_model_stream(data, node)
-
     # Handle tool start events
-    elif kind == EventType.TOOL_START.value and node in team_members + ["planner"]:
+    elif kind == EventType.TOOL_START.value and node in tool_nodes:
         yield from _handle_tool_start(node, name, data, workflow_id, run_id)
 
     # Handle tool end events
-    elif kind == EventType.TOOL_END.value and node in team_members + ["planner"]:
+    elif kind == EventType.TOOL_END.value and node in tool_nodes:
         yield from _handle_tool_end(node, name, data, workflow_id, run_id)
 
+    # Forward events nodes send for the client, e.g. the position in the workflow queue
+    elif kind == EventType.CUSTOM.value and name in CLIENT_CUSTOM_EVENTS:
+        yield {"event": name, "data": data}
+
     return None
 
 
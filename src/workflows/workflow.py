@@ -1,6 +1,6 @@
 import logging
-from src.config.team import TEAM_MEMBER_CONFIGRATIONS, TEAM_MEMBERS
-from src.agent.graph import build_graph
+from typing import Optional
+from src.workflows.sessions import get_session_manager
 import os
 from pathlib import Path
 
@@ -14,17 +14,14 @@ def enable_debug_logging():
 
 logger = logging.getLogger(__name__)
 
-graph = build_graph()
-
-chat = []
-
 def run_agent_workflow(
     user_input: str, 
     debug: bool = False,
     deep_thinking_mode: bool = False,
-    search_before_planning: bool = False
+    search_before_planning: bool = False,
+    thread_id: Optional[str] = "default",
 ):
-    global chat
+    """Run one turn of the conversation ``thread_id`` and return the final state."""
     if not user_input:
         raise ValueError("Input could not be empty")
 
@@ -32,21 +29,13 @@ def run_agent_workflow(
         enable_debug_logging()
 
     logger.info(f"Starting workflow with user input: {user_input}")
-    result = graph.invoke(
-        {
-            "TEAM_MEMBERS": TEAM_MEMBERS,
-            "TEAM_MEMBER_CONFIGRATIONS": TEAM_MEMBER_CONFIGRATIONS,
-            "messages": chat + [{"role": "user", "content": user_input}],
-            "deep_thinking_mode": deep_thinking_mode,
-            "search_before_planning": search_before_planning,
-        },
-        config={
-            "configurable": {
-                "thread_id": "default"
-            }
-        }
+    sessions = get_session_manager()
+    result = sessions.run(
+        sessions.get(thread_id) if thread_id else sessions.create(),
+        user_input,
+        deep_thinking_mode=deep_thinking_mode,
+        search_before_planning=search_before_planning,
     )
     # logger.debug(f"Final workflow state: {result}")
-    chat = result.get("messages", [])
     logger.info("Workflow completed successfully")
-    return result
\ No newline at end of file
+    return result
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from src.workflows.admission import REPLY_LANE, WORKFLOW_LANE, AdmissionController, AdmissionRejected, Lane
+
+
+async def _acquire(lane: Lane, statuses: list) -> None:
+    async for status in lane.acquire():
+        statuses.append(status)
+
+
+def test_acquire_takes_a_free_slot_without_queueing():
+    async def run():
+        lane = Lane("test", limit=1, max_queue=1)
+        statuses = []
+        await _acquire(lane, statuses)
+        return lane, statuses
+
+    lane, statuses = asyncio.run(run())
+    assert statuses == []
+    assert lane.active == 1
+
+
+def test_release_hands_the_slot_to_the_first_waiter():
+    async def run():
+        lane = Lane("test", limit=1, max_queue=2)
+        await _acquire(lane, [])
+        first_statuses, second_statuses = [], []
+        first = asyncio.create_task(_acquire(lane, first_statuses))
+        second = asyncio.create_task(_acquire(lane, second_statuses))
+        await asyncio.sleep(0)
+
+        lane.release(None)
+        await first
+        assert not second.done()
+        assert lane.active == 1
+
+        lane.release(None)
+        await second
+        lane.release(None)
+        return lane, first_statuses, second_statuses
+
+    lane, first_statuses, second_statuses = asyncio.run(run())
+    assert first_statuses[0]["position"] == 1
+    assert second_statuses[0]["position"] == 2
+    assert lane.active == 0
+    assert lane.stats()["queued"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        lane = Lane("test", limit=1, max_queue=2)
+        await _acquire(lane, [])
+        cancelled = asyncio.create_task(_acquire(lane, []))
+        waiting = asyncio.create_task(_acquire(lane, []))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert lane.stats()["queued"] == 1
+
+        # The slot skips the cancelled request
+        lane.release(None)
+        await waiting
+        return lane
+
+    lane = asyncio.run(run())
+    assert lane.active == 1
+    assert lane.stats()["queued"] == 0
+
+
+def test_slot_handed_over_while_cancelling_is_passed_on():
+    async def run():
+        lane = Lane("test", limit=1, max_queue=2)
+        await _acquire(lane, [])
+        first = asyncio.create_task(_acquire(lane, []))
+        second = asyncio.create_task(_acquire(lane, []))
+        await asyncio.sleep(0)
+
+        # The slot reaches `first` in the same loop iteration it is cancelled
+        lane.release(None)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await second
+        return lane
+
+    lane = asyncio.run(run())
+    assert lane.active == 1
+
+
+def test_full_queue_rejects():
+    async def run():
+        lane = Lane("test", limit=1, max_queue=1)
+        await _acquire(lane, [])
+        waiting = asyncio.create_task(_acquire(lane, []))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            await _acquire(lane, [])
+        waiting.cancel()
+        return lane
+
+    lane = asyncio.run(run())
+    assert lane.rejected == 1
+
+
+def test_ticket_moves_between_lanes_and_closing_frees_everything():
+    async def run():
+        controller = AdmissionController(max_replies=1, max_workflows=1, max_per_client=1, max_queue=4)
+        ticket = controller.admit("client")
+        async for _ in ticket.enter(REPLY_LANE):
+            pass
+        with pytest.raises(AdmissionRejected):
+            controller.admit("client")
+
+        async for _ in ticket.enter(WORKFLOW_LANE):
+            pass
+        # Moving on gave the reply slot back
+        assert controller.lanes[REPLY_LANE].active == 0
+        assert controller.lanes[WORKFLOW_LANE].active == 1
+
+        ticket.close()
+        ticket.close()
+        return controller
+
+    controller = asyncio.run(run())
+    stats = controller.stats()
+    assert stats["clients"] == 0
+    assert all(lane["active"] == 0 for lane in stats["lanes"].values())
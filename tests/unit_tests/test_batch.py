@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.workflows import batch
+from src.workflows.batch import BatchJobs, completed_ids, parse_item, run_batch
+
+
+class FakeSessions:
+    """Session manager answering every prompt, failing those that contain "fail"."""
+
+    def __init__(self, fail=("fail",)):
+        self.fail = fail
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def create(self, thread_id):
+        return thread_id
+
+    def close(self, thread_id):
+        pass
+
+    def run(self, session, prompt, **options):
+        with self._lock:
+            self.prompts.append(prompt)
+        if any(word in prompt for word in self.fail):
+            raise RuntimeError("model unavailable")
+        return {"messages": [SimpleNamespace(content=f"answer to {prompt}")], "full_plan": None}
+
+
+def _write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+
+def _results(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_parse_item_accepts_the_request_format():
+    item = parse_item({"request_id": "r-1", "title": "Title", "body": "Body", "deep_thinking_mode": True}, 3)
+
+    assert (item.id, item.prompt, item.deep_thinking_mode) == ("r-1", "Title\n\nBody", True)
+    assert parse_item({"prompt": "p"}, 7).id == "7"
+    with pytest.raises(ValueError):
+        parse_item({"title": "no prompt"}, 1)
+
+
+def test_run_batch_writes_a_result_per_prompt(tmp_path):
+    _write_jsonl(tmp_path / "in.jsonl", [{"id": str(i), "prompt": f"prompt {i}"} for i in range(5)])
+
+    summary = run_batch(str(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"), concurrency=3,
+                        sessions=FakeSessions())
+
+    results = _results(tmp_path / "out.jsonl")
+    assert (summary.succeeded, summary.failed, summary.skipped) == (5, 0, 0)
+    assert sorted(result["id"] for result in results) == ["0", "1", "2", "3", "4"]
+    assert all(result["status"] == "ok" and result["response"].startswith("answer") for result in results)
+
+
+def test_run_batch_resumes_and_retries_failed_prompts(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(input_path, [{"id": "a", "prompt": "first"}, {"id": "b", "prompt": "fail once"},
+                              {"id": "c", "prompt": "third"}])
+    # An earlier run finished "a" and was cut off while writing another line
+    output_path.write_text(json.dumps({"id": "a", "status": "ok"}) + "\n" + '{"id": "c", "sta', encoding="utf-8")
+
+    sessions = FakeSessions()
+    first = run_batch(str(input_path), str(output_path), sessions=sessions)
+    assert (first.succeeded, first.failed, first.skipped) == (1, 1, 1)
+    assert sorted(sessions.prompts) == ["fail once", "third"]
+
+    # Failed prompts are only run again when asked to
+    sessions = FakeSessions(fail=())
+    again = run_batch(str(input_path), str(output_path), sessions=sessions)
+    assert (again.succeeded, again.failed, again.skipped) == (0, 0, 3)
+    retried = run_batch(str(input_path), str(output_path), retry_failed=True, sessions=sessions)
+    assert (retried.succeeded, retried.failed, retried.skipped) == (1, 0, 2)
+    assert completed_ids(str(output_path)) == {"a", "b", "c"}
+
+
+def test_batch_jobs_run_in_the_background_and_resume(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_JOBS_DIR", str(tmp_path))
+    jobs = BatchJobs(FakeSessions())
+
+    job = jobs.start([{"id": "a", "prompt": "one"}, {"id": "b", "prompt": "fail"}], concurrency=2)
+    _wait(jobs, job.id)
+    assert (job.status, job.total, job.succeeded, job.failed) == ("done", 2, 1, 1)
+
+    # A new process finds the job on disk and can retry the failed prompt
+    restarted = BatchJobs(FakeSessions(fail=()))
+    assert restarted.get(job.id).status == "done"
+    resumed = restarted.resume(job.id, retry_failed=True)
+    _wait(restarted, job.id)
+    assert (resumed.status, resumed.succeeded, resumed.skipped) == ("done", 1, 1)
+
+    with pytest.raises(KeyError):
+        jobs.get("../../etc")
+    with pytest.raises(ValueError):
+        jobs.start([{"title": "no prompt"}])
+
+
+def _wait(jobs, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while jobs.get(job_id).status in ("pending", "running"):
+        assert time.monotonic() < deadline, "batch job did not finish"
+        time.sleep(0.01)
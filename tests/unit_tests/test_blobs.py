@@ -0,0 +1,84 @@
+import base64
+
+import pytest
+
+from src.storage.blobs import BlobNotFoundError, BlobStore, absolute_blob_urls, parse_blob_ref
+
+DATA = bytes(range(256)) * 8
+DATA_URL = "data:image/png;base64," + base64.b64encode(DATA).decode("ascii")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / "blobs"))
+
+
+def _image(url):
+    return {"type": "image_url", "image_url": {"url": url}}
+
+
+def test_attachments_are_stored_once_and_resolved_back(store):
+    messages = [{"role": "user", "content": [{"type": "text", "text": "look"}, _image(DATA_URL)]},
+                {"role": "user", "content": [_image(DATA_URL)]}]
+
+    stored = store.externalize(messages)
+    ref = stored[0]["content"][1]["image_url"]["url"]
+
+    assert parse_blob_ref(ref) is not None
+    assert stored[1]["content"][0]["image_url"]["url"] == ref
+    assert store.read(parse_blob_ref(ref)) == DATA
+    assert store.resolve(stored) == messages
+    # The input is not modified
+    assert messages[0]["content"][1]["image_url"]["url"] == DATA_URL
+
+
+@pytest.mark.parametrize(
+    "part, path",
+    [
+        ({"type": "file", "file": {"filename": "a.pdf", "file_data": DATA_URL}}, ("file", "file_data")),
+        ({"type": "input_file", "filename": "a.pdf", "file_data": DATA_URL}, ("file_data",)),
+        ({"type": "image_url", "image_url": DATA_URL}, ("image_url",)),
+    ],
+)
+def test_file_parts_are_externalized(store, part, path):
+    stored = store.externalize(part)
+    value = stored
+    for key in path:
+        value = value[key]
+
+    assert parse_blob_ref(value) is not None
+    assert store.resolve(stored) == part
+
+
+def test_text_that_looks_like_attachments_is_left_alone(store):
+    message = {"role": "user", "content": [{"type": "text", "text": DATA_URL}], "note": "/api/blobs/" + "a" * 64}
+
+    assert store.externalize(message) == message
+    assert store.resolve(message) == message
+    assert absolute_blob_urls(message, "http://host") == message
+
+
+def test_small_data_urls_stay_inline(store):
+    small = "data:image/png;base64," + base64.b64encode(b"tiny").decode("ascii")
+
+    assert store.externalize(_image(small)) == _image(small)
+
+
+def test_absolute_urls_are_stored_as_references(store):
+    stored = store.externalize(_image(DATA_URL))
+    ref = stored["image_url"]["url"]
+
+    absolute = absolute_blob_urls(stored, "http://host:8000/")
+
+    assert absolute["image_url"]["url"] == "http://host:8000" + ref
+    assert store.externalize(absolute) == stored
+
+
+def test_missing_blobs_raise_and_are_left_as_references(store):
+    missing = "/api/blobs/" + "0" * 64
+
+    with pytest.raises(BlobNotFoundError):
+        store.read("0" * 64)
+    with pytest.raises(BlobNotFoundError):
+        store.path("../etc/passwd")
+    assert store.resolve(_image(missing)) == _image(missing)
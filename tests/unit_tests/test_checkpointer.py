@@ -0,0 +1,86 @@
+import operator
+import time
+from typing import Annotated
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import TypedDict
+
+from src.storage.checkpointer import SQLiteCheckpointSaver
+
+
+class CounterState(TypedDict):
+    items: Annotated[list, operator.add]
+    turns: int
+
+
+def _graph(checkpointer):
+    def step(state: CounterState):
+        return {"items": [len(state["items"])], "turns": state.get("turns", 0) + 1}
+
+    builder = StateGraph(CounterState)
+    builder.add_node("step", step)
+    builder.add_edge(START, "step")
+    builder.add_edge("step", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def _config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+@pytest.fixture
+def saver(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.db"), keep_last=3, thread_ttl=0)
+    yield saver
+    saver.close()
+
+
+def _count(saver, table):
+    return saver._conn().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_state_survives_a_new_saver(saver):
+    graph = _graph(saver)
+    for turn in range(3):
+        graph.invoke({"items": [turn]}, _config("thread"))
+
+    reopened = _graph(SQLiteCheckpointSaver(saver.db_path))
+
+    assert reopened.get_state(_config("thread")).values == graph.get_state(_config("thread")).values
+    assert reopened.get_state(_config("thread")).values["turns"] == 3
+
+
+def test_compact_keeps_the_latest_checkpoints_and_their_values(saver):
+    graph = _graph(saver)
+    for thread_id in ("a", "b"):
+        for turn in range(5):
+            graph.invoke({"items": [turn]}, _config(thread_id))
+    before = {thread_id: graph.get_state(_config(thread_id)).values for thread_id in ("a", "b")}
+    blobs_before = _count(saver, "checkpoint_blobs")
+
+    removed = saver.compact()
+
+    assert removed["checkpoints"] > 0 and removed["blobs"] > 0
+    assert _count(saver, "checkpoint_blobs") == blobs_before - removed["blobs"]
+    for thread_id in ("a", "b"):
+        assert len(list(saver.list(_config(thread_id)))) == 3
+        assert graph.get_state(_config(thread_id)).values == before[thread_id]
+    # Nothing left to prune, and the thread still takes new turns
+    assert saver.compact() == {"threads": 0, "checkpoints": 0, "blobs": 0}
+    graph.invoke({"items": [9]}, _config("a"))
+    assert graph.get_state(_config("a")).values["turns"] == 6
+
+
+def test_compact_deletes_idle_threads(saver):
+    graph = _graph(saver)
+    graph.invoke({"items": [1]}, _config("idle"))
+    saver.thread_ttl = 0.01
+    time.sleep(0.05)
+    graph.invoke({"items": [1]}, _config("active"))
+
+    removed = saver.compact()
+
+    assert removed["threads"] == 1
+    assert saver.get_tuple(_config("idle")) is None
+    assert saver.get_tuple(_config("active")) is not None
@@ -0,0 +1,42 @@
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from src.agent.context import count_tokens, fit_messages, message_tokens
+
+LONG = "lorem ipsum dolor sit amet " * 400
+
+
+def _history():
+    return [
+        HumanMessage(content="research the topic"),
+        HumanMessage(content=LONG, name="researcher"),
+        ToolMessage(content=LONG, tool_call_id="call_1"),
+        HumanMessage(content="plan", name="planner"),
+        HumanMessage(content=LONG, name="coder"),
+        HumanMessage(content="latest", name="supervisor"),
+    ]
+
+
+def test_count_tokens_is_stable_for_repeated_text():
+    assert count_tokens(LONG) == count_tokens(LONG) > 0
+    assert count_tokens("") == 0
+
+
+def test_history_within_budget_is_returned_as_is():
+    history = _history()
+
+    assert fit_messages(history, budget=10 ** 6) == history
+
+
+def test_older_messages_are_shortened_until_the_history_fits():
+    history = _history()
+    budget = sum(message_tokens(message) for message in history) // 2
+
+    fitted = fit_messages(history, budget=budget, keep_recent=2)
+
+    assert sum(message_tokens(message) for message in fitted) <= budget
+    # The first request, the latest plan and the recent messages are untouched
+    assert [fitted[i] for i in (0, 3, 4, 5)] == [history[i] for i in (0, 3, 4, 5)]
+    assert "omitted to fit the context window" in fitted[1].content
+    assert fitted[2].tool_call_id == "call_1"
+    # Originals are not modified
+    assert history[1].content == LONG
@@ -0,0 +1,65 @@
+import json
+import os
+import threading
+
+import pytest
+
+from src.storage.atomic import atomic_write_json
+from src.storage.chat_history import ChatNotFoundError
+from src.storage.file_store import FileChatHistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FileChatHistoryStore(str(tmp_path / "history"))
+
+
+def _run_concurrently(*targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_atomic_write_replaces_the_file_and_leaves_no_temporary_files(tmp_path):
+    path = tmp_path / "chat.json"
+    atomic_write_json(str(path), {"version": 1})
+    atomic_write_json(str(path), {"version": 2})
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {"version": 2}
+    assert os.listdir(tmp_path) == ["chat.json"]
+
+
+def test_concurrent_appends_are_all_kept(store):
+    chat_uuid = store.save_chat("chat", [])
+
+    def append(worker):
+        def run():
+            for i in range(10):
+                store.append_messages(chat_uuid, [{"role": "user", "content": f"{worker}-{i}"}])
+        return run
+
+    _run_concurrently(*(append(worker) for worker in range(4)))
+
+    messages = store.get_chat(chat_uuid)["messages"]
+    assert sorted(message["content"] for message in messages) == sorted(
+        f"{worker}-{i}" for worker in range(4) for i in range(10)
+    )
+
+
+def test_moving_a_chat_into_a_folder_being_deleted_never_loses_it(store):
+    for _ in range(10):
+        folder_id = store.create_folder("folder")["folder_id"]
+        chat_uuid = store.save_chat("chat", [])
+
+        _run_concurrently(
+            lambda: store.move_chat(chat_uuid, folder_id),
+            lambda: store.delete_folder(folder_id, delete_chats=False),
+        )
+
+        # Whichever ran first, the chat still exists somewhere
+        try:
+            store.get_chat(chat_uuid)
+        except ChatNotFoundError:
+            pytest.fail("chat lost while its destination folder was deleted")
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.config.llm_cache import CachedChatOpenAI, MemoryResponseCache, SQLiteResponseCache, request_key
+
+
+def _llm(cache, **kwargs):
+    # Nothing listens on the base URL, so a cache miss fails fast instead of calling a provider
+    return CachedChatOpenAI(
+        model="gpt-4o", api_key="test", base_url="http://127.0.0.1:9", temperature=0,
+        max_retries=0, timeout=2, response_cache=cache, **kwargs,
+    )
+
+
+def _messages(time="2025-01-01 10:00"):
+    return [
+        SystemMessage(content=f"You are the coordinator.\nCURRENT_TIME: {time}"),
+        HumanMessage(content="hello", id="random-id"),
+    ]
+
+
+def _remember(llm, messages, message):
+    llm._cache_store(request_key(llm, messages, None, {}), message)
+
+
+def test_request_key_ignores_message_ids_and_the_current_time():
+    llm = _llm(None)
+    other = _messages(time="2030-06-01 23:59")
+    other[1].id = "another-id"
+
+    assert request_key(llm, _messages(), None, {}) == request_key(llm, other, None, {})
+
+
+def test_request_key_depends_on_content_model_and_tools():
+    llm = _llm(None)
+    key = request_key(llm, _messages(), None, {})
+
+    assert key != request_key(llm, _messages()[:1] + [HumanMessage(content="bye")], None, {})
+    assert key != request_key(llm.model_copy(update={"model_name": "o3"}), _messages(), None, {})
+    assert key != request_key(llm.model_copy(update={"temperature": 0.7}), _messages(), None, {})
+    assert key != request_key(llm, _messages(), None, {"tools": [{"name": "handoff_to_planner"}]})
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryResponseCache()
+    return SQLiteResponseCache(str(tmp_path / "llm_cache.db"))
+
+
+def test_invoke_replays_a_cached_answer(cache):
+    llm = _llm(cache)
+    _remember(llm, _messages(), AIMessage(content="Hi! How can I help?"))
+
+    response = llm.invoke(_messages(time="later"))
+
+    assert response.content == "Hi! How can I help?"
+    assert response.response_metadata["cached"] is True
+    assert cache.stats.hits == 1
+
+
+def test_stream_replays_a_cached_answer_in_chunks_with_tool_calls(cache):
+    llm = _llm(cache)
+    answer = AIMessage(
+        content="Let me hand this over to the planner.",
+        tool_calls=[{"name": "handoff_to_planner", "args": {"task": "x"}, "id": "call_1"}],
+    )
+    _remember(llm, _messages(), answer)
+
+    chunks = list(llm.stream(_messages()))
+    merged = chunks[0]
+    for chunk in chunks[1:]:
+        merged += chunk
+
+    assert len(chunks) > 1
+    assert merged.content == answer.content
+    assert [(call["name"], call["args"]) for call in merged.tool_calls] == [("handoff_to_planner", {"task": "x"})]
+
+
+def test_async_calls_replay_a_cached_answer(cache):
+    llm = _llm(cache)
+    _remember(llm, _messages(), AIMessage(content="cached"))
+
+    async def run():
+        chunks = [chunk.content async for chunk in llm.astream(_messages())]
+        return (await llm.ainvoke(_messages())).content, "".join(chunks)
+
+    assert asyncio.run(run()) == ("cached", "cached")
+
+
+def test_bypass_skips_the_cache(cache):
+    llm = _llm(cache)
+    _remember(llm, _messages(), AIMessage(content="cached"))
+
+    # The live call has nowhere to go
+    with pytest.raises(Exception):
+        llm.invoke(_messages(), bypass_cache=True)
+    assert cache.stats.hits == 0
@@ -0,0 +1,107 @@
+import importlib
+import json
+import sys
+import types
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.types import Send
+
+from src.agent.plan import agent_response, parse_plan, plan_progress, ready_steps, step_failure
+
+TEAM = ["researcher", "coder", "reporter"]
+
+
+@pytest.fixture(scope="module")
+def supervisor():
+    """The supervisor module; its model is never called, so no credentials are needed."""
+    with pytest.MonkeyPatch.context() as patch:
+        llm = types.ModuleType("src.config.llm")
+        llm.get_llm = lambda name: pytest.fail(f"{name} called")
+        patch.setitem(sys.modules, "src.config.llm", llm)
+        patch.delitem(sys.modules, "src.agent.agents.supervisor", raising=False)
+        yield importlib.import_module("src.agent.agents.supervisor")
+        sys.modules.pop("src.agent.agents.supervisor", None)
+
+
+def _plan(*steps):
+    return json.dumps({
+        "thought": "",
+        "title": "plan",
+        "steps": [
+            {"agent_name": agent, "title": f"step {number}", "description": "", **extra}
+            for number, (agent, extra) in enumerate(steps, start=1)
+        ],
+    })
+
+
+def _state(full_plan, *results):
+    messages = [HumanMessage(content="request"), HumanMessage(content=full_plan, name="planner")]
+    return {"TEAM_MEMBERS": TEAM, "full_plan": full_plan, "messages": messages + list(results)}
+
+
+def _result(agent, step, content="done"):
+    return agent_response({"plan_step": step}, agent, content)
+
+
+def _dispatched(command):
+    assert all(isinstance(send, Send) for send in command.goto)
+    return [(send.node, send.arg["plan_step"]) for send in command.goto]
+
+
+def test_steps_without_depends_on_run_in_order():
+    steps = parse_plan(_plan(("researcher", {}), ("coder", {}), ("reporter", {})))
+
+    assert [sorted(step.depends_on) for step in steps] == [[], [1], [2]]
+    assert [step.number for step in ready_steps(steps, set())] == [1]
+    assert [step.number for step in ready_steps(steps, {1})] == [2]
+
+
+def test_depends_on_only_keeps_earlier_steps():
+    steps = parse_plan(_plan(("researcher", {}), ("coder", {"depends_on": [1, 2, 3, "x"]})))
+
+    assert steps[1].depends_on == {1}
+
+
+def test_independent_steps_are_dispatched_together(supervisor):
+    full_plan = _plan(
+        ("researcher", {"depends_on": []}),
+        ("coder", {"depends_on": []}),
+        ("reporter", {"depends_on": [1, 2]}),
+    )
+
+    first = supervisor.dispatch_plan_steps(_state(full_plan))
+    waiting = supervisor.dispatch_plan_steps(_state(full_plan, _result("researcher", 1)))
+    last = supervisor.dispatch_plan_steps(_state(full_plan, _result("researcher", 1), _result("coder", 2)))
+
+    assert _dispatched(first) == [("researcher", 1), ("coder", 2)]
+    assert _dispatched(waiting) == [("coder", 2)]
+    assert _dispatched(last) == [("reporter", 3)]
+
+
+def test_finished_plan_ends_the_run(supervisor):
+    full_plan = _plan(("researcher", {}), ("reporter", {}))
+
+    command = supervisor.dispatch_plan_steps(_state(full_plan, _result("researcher", 1), _result("reporter", 2)))
+
+    assert command.goto == "__end__"
+
+
+def test_empty_result_still_completes_the_step(supervisor):
+    full_plan = _plan(("researcher", {}), ("reporter", {}))
+
+    command = supervisor.dispatch_plan_steps(_state(full_plan, _result("researcher", 1, content="")))
+
+    assert _dispatched(command) == [("reporter", 2)]
+
+
+def test_failed_step_hands_routing_to_the_llm(supervisor):
+    full_plan = _plan(("researcher", {}), ("reporter", {}))
+    failure = step_failure({"plan_step": 1}, "researcher", TimeoutError("search timed out"))
+
+    assert plan_progress(_state(full_plan, failure)["messages"]).failed == {1}
+    assert supervisor.dispatch_plan_steps(_state(full_plan, failure)) is None
+
+
+def test_unknown_agent_hands_routing_to_the_llm(supervisor):
+    assert supervisor.dispatch_plan_steps(_state(_plan(("painter", {})))) is None
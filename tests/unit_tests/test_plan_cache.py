@@ -0,0 +1,70 @@
+import pytest
+
+from src.agent.plan_cache import PlanCache, hashed_embedding, request_keys
+
+SCOPE = "team"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PlanCache(str(tmp_path / "plan_cache.db"))
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("Plan a trip to Germany in May", "plan the trip to germany in may"),
+        ("ابحث عن أسعار الذهب", "ابحث عن اسعار الذهب"),
+        ("Summarize the report, please!", "please summarize the report"),
+    ],
+)
+def test_request_keys_ignore_case_spelling_variants_and_stopwords(first, second):
+    assert request_keys(first) == request_keys(second)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("plan a trip to germany", "plan a trip to france"),
+        ("ابحث عن أسعار الذهب", "ابحث عن أسعار الفضة"),
+        ("sales report for 2024-05-01", "sales report for 2024-05-02"),
+        ("top 10 python libraries", "top 20 python libraries"),
+    ],
+)
+def test_request_keys_tell_entities_dates_and_numbers_apart(first, second):
+    assert request_keys(first) != request_keys(second)
+
+
+def test_lookup_returns_the_plan_of_the_same_request(cache):
+    cache.add("Write a report on the Nile river", SCOPE, "nile plan", plan_seconds=4.0)
+
+    hit = cache.lookup("write a report on the nile river", SCOPE)
+
+    assert hit is not None and hit.plan == "nile plan"
+    assert cache.stats.as_dict()["seconds_saved"] == 4.0
+
+
+def test_lookup_skips_similar_requests_about_something_else(cache):
+    cache.add("write a report on the nile river", SCOPE, "nile plan", plan_seconds=4.0)
+    cache.add("write a report on the amazon river", SCOPE, "amazon plan", plan_seconds=4.0)
+
+    assert cache.lookup("write a report on the amazon river", SCOPE).plan == "amazon plan"
+    assert cache.lookup("write a report on the danube river", SCOPE) is None
+    assert cache.lookup("write a report on the nile river", "other team") is None
+
+
+def test_semantic_embedder_still_needs_the_same_words(tmp_path):
+    # An embedder that finds every request identical
+    cache = PlanCache(str(tmp_path / "plan_cache.db"), threshold=0.5, embed=lambda text: [1.0, 0.0],
+                      embedder="constant")
+    cache.add("weather in cairo today", SCOPE, "cairo plan", plan_seconds=1.0)
+
+    assert cache.lookup("weather in Cairo today?", SCOPE).plan == "cairo plan"
+    assert cache.lookup("weather in alexandria today", SCOPE) is None
+
+
+def test_hashed_embedding_is_a_unit_vector():
+    vector = hashed_embedding("hello world")
+
+    assert vector.shape == (2048,)
+    assert abs(float((vector ** 2).sum()) - 1.0) < 1e-5
@@ -0,0 +1,73 @@
+import pytest
+
+from src.storage.chat_history import SORT_FIELDS
+from src.storage.sqlite_store import SQLiteChatHistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteChatHistoryStore(str(tmp_path / "chats.db"))
+
+
+def _pages(store, page_size, **kwargs):
+    pages, after = [], None
+    while True:
+        page = store.list_chats(limit=page_size, after=after, **kwargs)
+        if not page:
+            return pages
+        pages.append([chat["uuid"] for chat in page])
+        last = page[-1]
+        after = (last[kwargs.get("sort_by", "updated_at")], last["uuid"])
+
+
+@pytest.mark.parametrize("sort_by", SORT_FIELDS)
+def test_list_chats_cursor_pages_cover_every_chat_once(store, sort_by):
+    for i in range(7):
+        store.save_chat(f"chat {i}", [{"role": "user", "content": f"message {i}"}])
+    # Equal timestamps make the uuid tie-breaker matter
+    store._conn().execute(
+        "UPDATE chats SET updated_at = '2025-01-01T00:00:00', created_at = '2025-01-01T00:00:00' "
+        "WHERE title IN ('chat 2', 'chat 3', 'chat 4')"
+    )
+
+    pages = _pages(store, 3, sort_by=sort_by)
+    listed = [chat_uuid for page in pages for chat_uuid in page]
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert listed == [chat["uuid"] for chat in store.list_chats(sort_by=sort_by)]
+    assert len(set(listed)) == 7
+
+
+def test_list_chats_pages_stay_within_a_folder(store):
+    folder = store.create_folder("work")
+    in_folder = {store.save_chat(f"work {i}", [], folder_id=folder["folder_id"]) for i in range(4)}
+    store.save_chat("elsewhere", [])
+
+    listed = [chat_uuid for page in _pages(store, 2, folder_id=folder["folder_id"]) for chat_uuid in page]
+
+    assert sorted(listed) == sorted(in_folder)
+
+
+def test_list_chats_rejects_unknown_sort_field(store):
+    with pytest.raises(ValueError):
+        store.list_chats(sort_by="messages")
+
+
+@pytest.mark.parametrize("full_text_search", [True, False])
+@pytest.mark.parametrize(
+    "query",
+    [
+        "محمد",  # the title is stored with diacritics
+        "احمد",  # stored with hamza: أحمد
+        "مدرسه",  # stored with teh marbuta: مدرسة
+        "école",  # stored upper case
+    ],
+)
+def test_search_chats_matches_arabic_variants_and_case(store, full_text_search, query):
+    if full_text_search and not store.full_text_search:
+        pytest.skip("SQLite built without FTS5")
+    store.full_text_search = full_text_search
+    expected = store.save_chat("مُحَمَّد أحمد", [{"role": "user", "content": "ÉCOLE مدرسة"}])
+    store.save_chat("unrelated", [{"role": "user", "content": "nothing to see"}])
+
+    assert [chat["uuid"] for chat in store.search_chats(query)] == [expected]
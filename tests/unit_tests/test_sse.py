@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from src.api.sse import batch_message_deltas, encode_json, sse_frame
+
+
+def _delta(text, message_id="m1"):
+    return {"event": "message", "data": {"message_id": message_id, "delta": {"content": text}}}
+
+
+async def _events(items, pause_after=None, pause=0.0):
+    for index, item in enumerate(items):
+        yield item
+        if index == pause_after:
+            await asyncio.sleep(pause)
+
+
+def _batched(events, **kwargs):
+    async def run():
+        return [event async for event in batch_message_deltas(events, **kwargs)]
+
+    return asyncio.run(run())
+
+
+def test_sse_frame_is_a_single_data_line():
+    frame = sse_frame("message", {"text": "line one\nمرحبا"})
+
+    assert frame.endswith(b"\n\n")
+    event, data = frame.decode("utf-8").strip().split("\n")
+    assert event == "event: message"
+    assert json.loads(data.removeprefix("data: ")) == {"text": "line one\nمرحبا"}
+
+
+def test_encode_json_keeps_big_integers():
+    assert json.loads(encode_json({"n": 2 ** 70})) == {"n": 2 ** 70}
+
+
+def test_consecutive_deltas_are_merged_in_order():
+    events = [_delta("Hel"), _delta("lo"), {"event": "end_of_agent", "data": {}}, _delta("!", "m2")]
+
+    batched = _batched(_events(events), interval_ms=1000, max_deltas=32)
+
+    assert batched == [_delta("Hello"), {"event": "end_of_agent", "data": {}}, _delta("!", "m2")]
+
+
+def test_deltas_are_sent_after_max_deltas():
+    batched = _batched(_events([_delta(str(i)) for i in range(5)]), interval_ms=1000, max_deltas=2)
+
+    assert [event["data"]["delta"]["content"] for event in batched] == ["01", "23", "4"]
+
+
+def test_deltas_are_flushed_while_the_model_pauses():
+    async def run():
+        received = []
+        events = _events([_delta("a"), _delta("b")], pause_after=0, pause=0.2)
+        async for event in batch_message_deltas(events, interval_ms=20, max_deltas=32):
+            received.append(event["data"]["delta"]["content"])
+        return received
+
+    assert asyncio.run(run()) == ["a", "b"]
+
+
+def test_errors_are_raised_after_the_buffered_deltas():
+    async def failing():
+        yield _delta("partial")
+        raise RuntimeError("workflow failed")
+
+    async def run():
+        received = []
+        try:
+            async for event in batch_message_deltas(failing(), interval_ms=1000, max_deltas=32):
+                received.append(event)
+        except RuntimeError as e:
+            return received, str(e)
+
+    assert asyncio.run(run()) == ([_delta("partial")], "workflow failed")
@@ -135,9 +135,11 @@ def run_api_server():
     print(f"{Fore.YELLOW}Working directory for API: {current_dir}{Style.RESET_ALL}")
     
     # Use sys.executable to ensure we're using the correct Python interpreter
+    # API_WORKERS > 1 serves concurrent chats from several processes
+    workers = os.getenv("API_WORKERS", "1")
     api_process = subprocess.Popen(
         [sys.executable, "-m", "uvicorn", "src.api.app:app", 
-         "--host", "0.0.0.0", "--port", str(port), "--log-level", "info"],
+         "--host", "0.0.0.0", "--port", str(port), "--workers", workers, "--log-level", "info"],
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         universal_newlines=True,